@@ -9,12 +9,14 @@ import logging
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
-from routes.mealplan import router as mealplan_router
+from routes.mealplan import router as mealplan_router, nutrition_service, meal_plan_service, meal_plan_jobs
 from routes.auth import router as auth_router
 from routes.test_mealplan import router as test_mealplan_router
 from routes.debug import router as debug_router
 from routes.aicoach import router as aicoach_router
+from services.cache_warmer import CacheWarmer
 from utils.database import init_db
+from utils.llm import llm_executor
 
 load_dotenv()
 
@@ -28,12 +30,24 @@ logger = logging.getLogger(__name__)
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
+# Background nutrition cache warm-up
+cache_warmer = CacheWarmer(nutrition_service)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize database on startup
     await init_db()
+    # Add stored meals to the bundled meal library
+    await meal_plan_service.meal_library.load()
+    # Warm the nutrition cache without delaying readiness
+    cache_warmer.start()
+    # Start the background meal plan workers
+    await meal_plan_jobs.start()
     yield
-    # Place any shutdown cleanup here if needed
+    await meal_plan_jobs.stop()
+    await cache_warmer.stop()
+    # Stop the Gemini worker threads
+    llm_executor.shutdown()
 
 app = FastAPI(
     title="Fitness Tracker API",
@@ -75,6 +89,18 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/warmup")
+async def warmup_status():
+    return cache_warmer.get_status()
+
+@app.get("/health/llm")
+async def llm_status():
+    return llm_executor.get_stats()
+
+@app.get("/health/meal-library")
+async def meal_library_status():
+    return meal_plan_service.meal_library.get_stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -90,6 +90,48 @@ class MealPlanResponse(BaseModel):
     message: str
     data: Optional[MealPlan] = None
 
+class WeeklyDayPlan(BaseModel):
+    day: str
+    meals: DayMealPlan
+
+class WeeklyMealPlan(BaseModel):
+    id: Optional[str] = None
+    user_id: Optional[str] = None
+    days: List[WeeklyDayPlan]
+    total_calories: float = 0
+    total_protein: float = 0
+    total_carbs: float = 0
+    total_fat: float = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    preferences: Dict = {}
+
+class WeeklyMealPlanResponse(BaseModel):
+    success: bool
+    message: str
+    data: Optional[WeeklyMealPlan] = None
+
+class MealPlanJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class MealPlanJob(BaseModel):
+    id: str
+    user_id: Optional[str] = None
+    status: MealPlanJobStatus = MealPlanJobStatus.queued
+    plan_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class MealPlanJobResponse(BaseModel):
+    success: bool
+    message: str
+    job: Optional[MealPlanJob] = None
+    data: Optional[MealPlan] = None
+
 class NutrientSearchRequest(BaseModel):
     food_items: List[str]
     portions: Optional[List[str]] = None
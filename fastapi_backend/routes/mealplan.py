@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
+from fastapi.responses import StreamingResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime
+import json
 import logging
+import os
 
 from models.mealplan import (
-    MealPlanRequest, MealPlanResponse, MealPlan,
-    UserProfile, NutrientSearchRequest, NutrientSearchResponse
+    MealPlanRequest, MealPlanResponse, MealPlan, MealType,
+    UserProfile, NutrientSearchRequest, NutrientSearchResponse,
+    MealPlanJobResponse, MealPlanJobStatus, WeeklyMealPlanResponse
 )
 from models.user import User
+from services.meal_plan_jobs import MealPlanJobQueue, QueueFullError
 from services.mealplan_service import MealPlanService
 from services.nutrition_service import NutritionService
 from utils.auth import get_current_active_user
@@ -26,6 +31,36 @@ limiter = Limiter(key_func=get_remote_address)
 
 router = APIRouter()
 
+async def _generate_and_save_meal_plan(meal_plan_request: MealPlanRequest, user_id: Optional[str]) -> MealPlan:
+    """Generate a meal plan and store it for the user"""
+    meal_plan = await meal_plan_service.generate_meal_plan(meal_plan_request)
+    return await _save_meal_plan(meal_plan, user_id, meal_plan_request.regenerate)
+
+async def _save_meal_plan(meal_plan: MealPlan, user_id: Optional[str], regenerate: bool = False) -> MealPlan:
+    """Store a generated meal plan for the user"""
+    meal_plan.user_id = user_id
+    
+    # Save to database
+    meal_plans_collection = await get_collection("meal_plans")
+    
+    # If regenerating, delete old plans first
+    if regenerate:
+        await meal_plans_collection.delete_many({"user_id": user_id})
+    
+    meal_plan_dict = meal_plan.dict()
+    meal_plan_dict["_id"] = meal_plan_dict.pop("id", None)
+    
+    result = await meal_plans_collection.insert_one(meal_plan_dict)
+    meal_plan.id = str(result.inserted_id)
+    return meal_plan
+
+async def _run_meal_plan_job(meal_plan_request: MealPlanRequest, user_id: Optional[str]) -> str:
+    meal_plan = await _generate_and_save_meal_plan(meal_plan_request, user_id)
+    return meal_plan.id
+
+# Background generation jobs, started and stopped by the app lifespan
+meal_plan_jobs = MealPlanJobQueue(_run_meal_plan_job)
+
 @router.post("/generate", response_model=MealPlanResponse)
 @limiter.limit("5/minute")
 async def generate_meal_plan(
@@ -41,22 +76,7 @@ async def generate_meal_plan(
         # Set regenerate flag if specified
         meal_plan_request.regenerate = meal_plan_request.regenerate or False
         
-        # Generate meal plan
-        meal_plan = await meal_plan_service.generate_meal_plan(meal_plan_request)
-        meal_plan.user_id = current_user.id
-        
-        # Save to database
-        meal_plans_collection = await get_collection("meal_plans")
-        
-        # If regenerating, delete old plans first
-        if meal_plan_request.regenerate:
-            await meal_plans_collection.delete_many({"user_id": current_user.id})
-        
-        meal_plan_dict = meal_plan.dict()
-        meal_plan_dict["_id"] = meal_plan_dict.pop("id", None)
-        
-        result = await meal_plans_collection.insert_one(meal_plan_dict)
-        meal_plan.id = str(result.inserted_id)
+        meal_plan = await _generate_and_save_meal_plan(meal_plan_request, current_user.id)
         
         logger.info(f"Successfully generated meal plan with ID: {meal_plan.id}")
         
@@ -73,6 +93,167 @@ async def generate_meal_plan(
             detail=f"Failed to generate meal plan: {str(e)}"
         )
 
+@router.post("/generate/weekly", response_model=WeeklyMealPlanResponse)
+@limiter.limit("2/minute")
+async def generate_weekly_meal_plan(
+    request: Request,
+    meal_plan_request: MealPlanRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Generate a 7-day meal plan for the current user"""
+    try:
+        logger.info(f"Generating weekly meal plan for user: {current_user.email} (ID: {current_user.id})")
+        
+        meal_plan_request.regenerate = meal_plan_request.regenerate or False
+        
+        weekly_plan = await meal_plan_service.generate_weekly_meal_plan(meal_plan_request)
+        weekly_plan.user_id = current_user.id
+        
+        # Weekly plans have their own collection so daily plan listings are unaffected
+        weekly_plans_collection = await get_collection("weekly_meal_plans")
+        
+        if meal_plan_request.regenerate:
+            await weekly_plans_collection.delete_many({"user_id": current_user.id})
+        
+        weekly_plan_dict = weekly_plan.dict()
+        weekly_plan_dict.pop("id", None)
+        
+        result = await weekly_plans_collection.insert_one(weekly_plan_dict)
+        weekly_plan.id = str(result.inserted_id)
+        
+        logger.info(f"Successfully generated weekly meal plan with ID: {weekly_plan.id}")
+        
+        return WeeklyMealPlanResponse(
+            success=True,
+            message="Weekly meal plan generated successfully",
+            data=weekly_plan
+        )
+        
+    except Exception as e:
+        logger.error(f"Error generating weekly meal plan: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate weekly meal plan: {str(e)}"
+        )
+
+def _sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/generate/stream")
+@limiter.limit("5/minute")
+async def stream_meal_plan(
+    request: Request,
+    meal_plan_request: MealPlanRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Generate a daily meal plan as Server-Sent Events.
+
+    Emits a ``meal`` event per meal as soon as Gemini finishes writing it,
+    then ``daily_totals``, then ``done`` with the stored plan id (or
+    ``error``).
+    """
+    meal_plan_request.regenerate = meal_plan_request.regenerate or False
+    logger.info(f"Streaming meal plan for user: {current_user.email} (ID: {current_user.id})")
+    
+    async def events():
+        try:
+            async for event, payload in meal_plan_service.stream_meal_plan(meal_plan_request):
+                if event == "meal":
+                    yield _sse_event("meal", {"meal_type": payload["meal_type"], "meal": payload["meal"].dict()})
+                elif event == "daily_totals":
+                    yield _sse_event("daily_totals", payload)
+                elif event == "plan":
+                    meal_plan = await _save_meal_plan(payload, current_user.id, meal_plan_request.regenerate)
+                    yield _sse_event("done", {"plan_id": meal_plan.id})
+        except Exception as e:
+            logger.error(f"Error streaming meal plan: {e}")
+            yield _sse_event("error", {"detail": f"Failed to generate meal plan: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/generate/jobs", response_model=MealPlanJobResponse, status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("5/minute")
+async def enqueue_meal_plan_job(
+    request: Request,
+    meal_plan_request: MealPlanRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Queue meal plan generation and return the job id immediately"""
+    try:
+        meal_plan_request.regenerate = meal_plan_request.regenerate or False
+        job = await meal_plan_jobs.enqueue(meal_plan_request, current_user.id)
+        
+        logger.info(f"Queued meal plan job {job.id} for user: {current_user.email}")
+        
+        return MealPlanJobResponse(
+            success=True,
+            message="Meal plan generation queued",
+            job=job
+        )
+        
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error queueing meal plan job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue meal plan generation: {str(e)}"
+        )
+
+@router.get("/jobs/{job_id}", response_model=MealPlanJobResponse)
+async def get_meal_plan_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the status of a meal plan job, with the plan once it has completed"""
+    try:
+        job = await meal_plan_jobs.get_job(job_id, current_user.id)
+        
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Meal plan job not found"
+            )
+        
+        meal_plan = None
+        if job.status == MealPlanJobStatus.completed and job.plan_id:
+            from bson import ObjectId
+            meal_plans_collection = await get_collection("meal_plans")
+            doc = await meal_plans_collection.find_one({"_id": ObjectId(job.plan_id), "user_id": current_user.id})
+            if doc:
+                doc["id"] = str(doc.pop("_id"))
+                meal_plan = MealPlan.parse_obj(doc)
+        
+        messages = {
+            MealPlanJobStatus.queued: "Meal plan generation is queued",
+            MealPlanJobStatus.running: "Meal plan is being generated",
+            MealPlanJobStatus.completed: "Meal plan generated successfully",
+            MealPlanJobStatus.failed: f"Failed to generate meal plan: {job.error}",
+        }
+        
+        return MealPlanJobResponse(
+            success=job.status != MealPlanJobStatus.failed,
+            message=messages[job.status],
+            job=job,
+            data=meal_plan
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching meal plan job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch meal plan job"
+        )
+
 @router.get("/", response_model=List[MealPlan])
 async def get_user_meal_plans(
     current_user: User = Depends(get_current_active_user),
@@ -183,18 +364,17 @@ async def analyze_nutrition(
     try:
         logger.info(f"Analyzing nutrition for user: {current_user.email}")
         
-        nutrition_data = {}
-        
+        food_items_with_portions = []
         for i, food_item in enumerate(nutrition_request.food_items):
-            portion = None
             if nutrition_request.portions and i < len(nutrition_request.portions):
                 portion = nutrition_request.portions[i]
-                food_item_with_portion = f"{portion} {food_item}"
+                food_items_with_portions.append(f"{portion} {food_item}")
             else:
-                food_item_with_portion = food_item
-            
-            nutrition_info = await nutrition_service.get_ingredient_nutrition(food_item_with_portion)
-            nutrition_data[food_item] = nutrition_info
+                food_items_with_portions.append(food_item)
+        
+        # Resolve the whole request with one batched lookup
+        nutrition_infos = await nutrition_service.get_ingredients_nutrition(food_items_with_portions)
+        nutrition_data = dict(zip(nutrition_request.food_items, nutrition_infos))
         
         return NutrientSearchResponse(
             success=True,
@@ -209,6 +389,141 @@ async def analyze_nutrition(
             detail=f"Failed to analyze nutrition: {str(e)}"
         )
 
+def _bulk_item_label(item) -> Optional[Tuple[str, str]]:
+    """Turn a bulk item into (food item, ingredient string).
+
+    Items are plain strings or objects with ``food_item`` and optional ``portion``.
+    """
+    if isinstance(item, str):
+        item = item.strip()
+        return (item, item) if item else None
+    if isinstance(item, dict) and isinstance(item.get("food_item"), str) and item["food_item"].strip():
+        food_item = item["food_item"].strip()
+        portion = item.get("portion")
+        return food_item, f"{portion} {food_item}" if portion else food_item
+    return None
+
+async def _read_ndjson_items(request: Request) -> AsyncIterator:
+    """Read newline-delimited items from a streamed request body"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if buffer.strip():
+        yield _parse_ndjson_line(buffer)
+
+def _parse_ndjson_line(line: bytes):
+    text = line.decode("utf-8", errors="replace").strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        # Plain-text lines like "2 eggs" are accepted as they are
+        return text
+
+@router.post("/nutrition/analyze/bulk")
+@limiter.limit("10/minute")
+async def analyze_nutrition_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Analyze nutrition for many food items, streaming results as NDJSON.
+
+    The body is either JSON (a list of items, or ``{"food_items": [...],
+    "portions": [...]}``) or, with an ``application/x-ndjson`` content
+    type, one item per line. Each result line is
+    ``{"index", "food_item", "nutrition"}``, or ``{"index", "error"}`` for an
+    item that is not a food item, where ``index`` is the item's position in
+    the request. Lines arrive as soon as each item is resolved, not in input
+    order.
+    """
+    max_items = int(os.getenv("NUTRITION_BULK_MAX_ITEMS", "1000"))
+    
+    # The body is read before streaming starts: a StreamingResponse listens
+    # for disconnects on the same receive channel while it sends
+    if "ndjson" in request.headers.get("content-type", ""):
+        items = [item async for item in _read_ndjson_items(request)]
+    else:
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request body must be JSON or NDJSON")
+        
+        if isinstance(items, dict):
+            food_items = items.get("food_items") or []
+            portions = items.get("portions") or []
+            items = [
+                {"food_item": food_item, "portion": portions[i] if i < len(portions) else None}
+                for i, food_item in enumerate(food_items)
+            ]
+        if not isinstance(items, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a list of food items")
+    
+    if len(items) > max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {max_items} food items per request"
+        )
+    
+    # (position in the request, food item) of each item sent for analysis
+    resolved: List[Tuple[int, str]] = []
+    
+    def ingredients():
+        for position, item in enumerate(items):
+            parsed = _bulk_item_label(item)
+            if parsed is None:
+                continue
+            food_item, ingredient = parsed
+            resolved.append((position, food_item))
+            yield ingredient
+    
+    async def results():
+        for position, item in enumerate(items):
+            if _bulk_item_label(item) is None:
+                yield json.dumps({"index": position, "error": "Expected a non-empty food item"}) + "\n"
+        
+        try:
+            async for offset, nutrition in nutrition_service.iter_ingredients_nutrition(ingredients()):
+                position, food_item = resolved[offset]
+                yield json.dumps({
+                    "index": position,
+                    "food_item": food_item,
+                    "nutrition": nutrition.dict()
+                }) + "\n"
+        except Exception as e:
+            logger.error(f"Error streaming bulk nutrition analysis: {e}")
+            yield json.dumps({"error": "Failed to analyze remaining food items"}) + "\n"
+    
+    logger.info(f"Streaming bulk nutrition analysis of {len(items)} items for user: {current_user.email}")
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.get("/nutrition/stats")
+async def get_nutrition_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get nutrition lookup statistics"""
+    return {
+        "success": True,
+        "stats": nutrition_service.get_stats()
+    }
+
+def _profile_from_user(current_user: User) -> UserProfile:
+    """Create a user profile from current user data"""
+    return UserProfile(
+        age=current_user.age or 30,
+        weight=current_user.weight or 70,
+        height=current_user.height or 170,
+        gender=current_user.gender or "other",
+        activity_level=current_user.activity_level or "moderately_active",
+        fitness_goal=current_user.fitness_goal or "maintenance",
+        dietary_preferences=current_user.dietary_preferences or [],
+        allergies=current_user.allergies or [],
+        disliked_foods=current_user.disliked_foods or [],
+        preferred_cuisines=current_user.preferred_cuisines or []
+    )
+
 @router.post("/regenerate/{plan_id}", response_model=MealPlanResponse)
 @limiter.limit("3/minute")
 async def regenerate_meal_plan(
@@ -235,23 +550,9 @@ async def regenerate_meal_plan(
                 detail="Meal plan not found"
             )
         
-        # Create user profile from current user data
-        user_profile = UserProfile(
-            age=current_user.age or 30,
-            weight=current_user.weight or 70,
-            height=current_user.height or 170,
-            gender=current_user.gender or "other",
-            activity_level=current_user.activity_level or "moderately_active",
-            fitness_goal=current_user.fitness_goal or "maintenance",
-            dietary_preferences=current_user.dietary_preferences or [],
-            allergies=current_user.allergies or [],
-            disliked_foods=current_user.disliked_foods or [],
-            preferred_cuisines=current_user.preferred_cuisines or []
-        )
-        
-        # Create meal plan request
+        # Create meal plan request from current user data
         meal_plan_request = MealPlanRequest(
-            user_profile=user_profile,
+            user_profile=_profile_from_user(current_user),
             regenerate=True
         )
         
@@ -279,4 +580,61 @@ async def regenerate_meal_plan(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to regenerate meal plan: {str(e)}"
+        )
+
+@router.post("/regenerate/{plan_id}/{meal_type}", response_model=MealPlanResponse)
+@limiter.limit("5/minute")
+async def regenerate_meal(
+    request: Request,
+    plan_id: str,
+    meal_type: MealType,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Regenerate a single meal of a meal plan, keeping the other meals"""
+    try:
+        meal_plans_collection = await get_collection("meal_plans")
+        
+        from bson import ObjectId
+        if ObjectId.is_valid(plan_id):
+            query = {"_id": ObjectId(plan_id), "user_id": current_user.id}
+        else:
+            query = {"id": plan_id, "user_id": current_user.id}
+        
+        existing_plan = await meal_plans_collection.find_one(query)
+        
+        if not existing_plan:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Meal plan not found"
+            )
+        
+        existing_plan["id"] = str(existing_plan.pop("_id"))
+        meal_plan = MealPlan.parse_obj(existing_plan)
+        
+        meal_plan_request = MealPlanRequest(user_profile=_profile_from_user(current_user))
+        day_plan = await meal_plan_service.regenerate_meal(meal_plan_request, meal_plan.meals, meal_type.value)
+        
+        # Patch only the regenerated meal and the recomputed totals
+        await meal_plans_collection.update_one(query, {"$set": {
+            f"meals.{meal_type.value}": getattr(day_plan, meal_type.value).dict(),
+            "meals.total_calories": day_plan.total_calories,
+            "meals.total_protein": day_plan.total_protein,
+            "meals.total_carbs": day_plan.total_carbs,
+            "meals.total_fat": day_plan.total_fat,
+        }})
+        meal_plan.meals = day_plan
+        
+        return MealPlanResponse(
+            success=True,
+            message=f"{meal_type.value.capitalize()} regenerated successfully",
+            data=meal_plan
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error regenerating meal: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to regenerate meal: {str(e)}"
         )
\ No newline at end of file
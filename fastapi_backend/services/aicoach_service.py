@@ -1,11 +1,12 @@
 import os
-import json
 import re
 import logging
 from typing import List, Optional, Dict, Any
 from google.generativeai import GenerativeModel, configure
 from models.aicoach import ChatRequest, ChatResponse, Recipe, UserContext, ConversationMessage
 from models.user import User
+from utils.json_stream import parse_json
+from utils.llm import llm_executor
 
 logger = logging.getLogger(__name__)
 
@@ -158,25 +159,31 @@ Return ONLY a valid JSON array in this format:
   }}
 ]"""
             
-            result = self.model.generate_content(recipe_prompt)
-            response_text = result.text
-            
-            # Extract JSON from response
-            json_match = re.search(r'\[[\s\S]*\]', response_text)
-            if json_match:
-                recipes_data = json.loads(json_match.group(0))
-                recipes = []
-                for recipe_data in recipes_data:
-                    recipe = Recipe(**recipe_data)
-                    recipes.append(recipe)
-                return recipes
-            
-            return None
+            result = await llm_executor.generate_content(
+                self.model, recipe_prompt, call_type="recipes",
+                validate=lambda text: bool(self._parse_recipes(text))
+            )
+            return self._parse_recipes(result.text) or None
             
         except Exception as e:
             logger.error(f"Error generating recipes: {e}")
             return None
     
+    def _parse_recipes(self, response_text: str) -> List[Recipe]:
+        """Parse the recipe array in a response, skipping recipes that are unfinished or invalid"""
+        try:
+            recipes_data = parse_json(response_text, expect="[", keep_partial=False)
+        except ValueError:
+            return []
+        
+        recipes = []
+        for recipe_data in recipes_data:
+            try:
+                recipes.append(Recipe(**recipe_data))
+            except Exception as e:
+                logger.warning(f"Skipping invalid recipe in AI response: {e}")
+        return recipes
+    
     async def generate_chat_response(self, chat_request: ChatRequest, user: User) -> ChatResponse:
         """Generate AI coach response"""
         if not self.model:
@@ -204,7 +211,7 @@ Return ONLY a valid JSON array in this format:
             logger.info(f"Context length: {len(conversation_context)}")
             
             # Generate response
-            result = self.model.generate_content(conversation_context)
+            result = await llm_executor.generate_content(self.model, conversation_context, call_type="chat")
             raw_response = result.text
             
             # Clean response
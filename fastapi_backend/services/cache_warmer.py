@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from services.nutrition_service import NutritionService
+from utils.database import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_SEED_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "warmup_ingredients.txt")
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+
+class CacheWarmer:
+    """Fills the nutrition cache in the background after startup.
+
+    The seed list is the top-N ingredients from a seed file and from the
+    ingredients of stored meal plans (most frequent first). Foods already
+    cached or answered by the local nutrient table are skipped; the rest
+    are resolved in batches, at most ``concurrency`` Gemini calls at a
+    time. ``get_status`` reports progress so traffic can be gated on it.
+    """
+
+    def __init__(self, nutrition_service: NutritionService, seed_path: Optional[str] = None,
+                 top_n: Optional[int] = None, concurrency: Optional[int] = None):
+        self.nutrition_service = nutrition_service
+        self.enabled = os.getenv("NUTRITION_WARMUP_ENABLED", "true").lower() == "true"
+        self.seed_path = seed_path or os.getenv("NUTRITION_WARMUP_SEED_PATH", DEFAULT_WARMUP_SEED_PATH)
+        self.use_meal_plans = os.getenv("NUTRITION_WARMUP_FROM_MEAL_PLANS", "true").lower() == "true"
+        self.top_n = top_n or int(os.getenv("NUTRITION_WARMUP_TOP_N", "200"))
+        self.concurrency = concurrency or int(os.getenv("NUTRITION_WARMUP_CONCURRENCY", "2"))
+        self._task: Optional[asyncio.Task] = None
+
+        self.state = "idle"
+        self.total = 0
+        self.warmed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.error: Optional[str] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def start(self) -> Optional[asyncio.Task]:
+        """Start warming in the background; returns immediately"""
+        if not self.enabled:
+            self.state = "disabled"
+            return None
+        if self.nutrition_service.gemini_model is None:
+            self.state = "disabled"
+            self.error = "Gemini is not configured"
+            return None
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel a warm-up that is still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self):
+        """Load the seed list and resolve every ingredient that is not cached yet"""
+        self.state = "loading"
+        self.started_at = datetime.utcnow()
+        try:
+            seeds = await self.load_seeds()
+            self.total = len(seeds)
+            self.state = "warming"
+            logger.info(f"Warming nutrition cache with {self.total} seed ingredients")
+
+            pending = []
+            for name in seeds:
+                if await self._is_resolved(name):
+                    self.skipped += 1
+                else:
+                    pending.append(name)
+
+            batch_size = self.nutrition_service.batch_size
+            batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def warm(batch: List[str]):
+                async with semaphore:
+                    await self.nutrition_service.get_ingredients_nutrition(batch)
+                for name in batch:
+                    if await self.nutrition_service._get_cached_vector(name) is not None:
+                        self.warmed += 1
+                    else:
+                        self.failed += 1
+
+            await asyncio.gather(*[warm(batch) for batch in batches])
+            self.state = "done"
+            logger.info(f"Nutrition cache warm-up done: {self.warmed} warmed, "
+                        f"{self.skipped} already available, {self.failed} failed")
+
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Nutrition cache warm-up failed: {e}")
+        finally:
+            self.finished_at = datetime.utcnow()
+
+    async def _is_resolved(self, name: str) -> bool:
+        """Whether a canonical ingredient is already answered without Gemini"""
+        if self.nutrition_service._get_builtin_vector(name) is not None:
+            return True
+        return await self.nutrition_service._get_cached_vector(name) is not None
+
+    async def load_seeds(self) -> List[str]:
+        """Get up to ``top_n`` distinct canonical ingredient names, seed file first"""
+        raw_names = self._load_seed_file()
+        if self.use_meal_plans:
+            raw_names.extend(await self._load_meal_plan_ingredients())
+
+        seeds: Dict[str, None] = {}
+        for raw_name in raw_names:
+            name = self.nutrition_service._get_canonical_name(raw_name)
+            if name:
+                seeds.setdefault(name)
+            if len(seeds) >= self.top_n:
+                break
+        return list(seeds)
+
+    def _load_seed_file(self) -> List[str]:
+        try:
+            with open(self.seed_path, encoding="utf-8") as f:
+                return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        except FileNotFoundError:
+            logger.warning(f"Warm-up seed file not found at '{self.seed_path}'")
+            return []
+
+    async def _load_meal_plan_ingredients(self) -> List[str]:
+        """Most frequent ingredients across stored meal plans"""
+        if db.database is None:
+            return []
+
+        ingredient_lists = [{"$ifNull": [f"$meals.{meal_type}.ingredients", []]} for meal_type in MEAL_TYPES]
+        pipeline = [
+            {"$project": {"ingredients": {"$concatArrays": ingredient_lists}}},
+            {"$unwind": "$ingredients"},
+            {"$group": {"_id": "$ingredients", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": self.top_n * 2},
+        ]
+        try:
+            cursor = db.database.meal_plans.aggregate(pipeline)
+            return [doc["_id"] async for doc in cursor if isinstance(doc.get("_id"), str)]
+        except Exception as e:
+            logger.error(f"Error loading warm-up ingredients from meal plans: {e}")
+            return []
+
+    def get_status(self) -> Dict[str, Any]:
+        """Warm-up progress"""
+        processed = self.warmed + self.skipped + self.failed
+        return {
+            "state": self.state,
+            "ready": self.state in ("done", "disabled", "failed", "cancelled"),
+            "total": self.total,
+            "warmed": self.warmed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "progress": round(processed / self.total, 3) if self.total else (1.0 if self.state == "done" else 0.0),
+            "error": self.error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
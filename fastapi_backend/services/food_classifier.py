@@ -0,0 +1,190 @@
+import logging
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from services.ingredient_index import singularize
+
+logger = logging.getLogger(__name__)
+
+def _estimate(calories: float, protein: float, carbs: float, fat: float) -> Dict[str, float]:
+    """Per-100g estimate with the usual fiber, sugar, sodium and saturated fat guesses"""
+    return {
+        "calories": calories, "protein": protein, "carbs": carbs, "fat": fat,
+        "fiber": 2, "sugar": 5, "sodium": 100, "cholesterol": 0, "saturated_fat": fat * 0.3,
+    }
+
+# Food categories used for the offline nutrition estimate. Keywords match
+# whole words (plurals included); when several keywords match a name the
+# longest one wins, then the higher priority.
+FOOD_CATEGORIES = {
+    "protein": {
+        "priority": 60,
+        "keywords": [
+            "chicken", "beef", "pork", "fish", "salmon", "tuna", "egg", "egg white", "tofu",
+            "turkey", "shrimp", "prawn", "lamb", "tempeh", "cod", "tilapia", "steak", "lentil",
+            "chickpea", "seitan", "whey", "protein powder",
+        ],
+        "nutrition": _estimate(150, 20, 0, 8),
+    },
+    "dairy": {
+        "priority": 50,
+        "keywords": [
+            "milk", "cheese", "yogurt", "yoghurt", "cream", "buttermilk", "kefir",
+            "cottage cheese", "cream cheese", "sour cream",
+        ],
+        "nutrition": _estimate(100, 8, 5, 6),
+    },
+    "grain": {
+        "priority": 40,
+        "keywords": [
+            "rice", "pasta", "bread", "oat", "oatmeal", "quinoa", "potato", "sweet potato",
+            "noodle", "spaghetti", "tortilla", "couscous", "barley", "flour", "cereal",
+            "bagel", "toast", "granola", "cracker", "wrap",
+        ],
+        "nutrition": _estimate(120, 4, 25, 1),
+    },
+    "fat": {
+        "priority": 30,
+        "keywords": [
+            "oil", "olive oil", "coconut oil", "butter", "peanut butter", "almond butter", "ghee",
+            "lard", "margarine", "mayonnaise", "avocado", "nut", "almond", "walnut", "cashew",
+            "peanut", "pecan", "pistachio", "seed", "chia", "flaxseed", "tahini",
+        ],
+        "nutrition": _estimate(500, 5, 5, 50),
+    },
+    "fruit": {
+        "priority": 20,
+        "keywords": [
+            "apple", "banana", "orange", "berry", "blueberry", "strawberry", "raspberry",
+            "blackberry", "cranberry", "grape", "pear", "mango", "pineapple", "peach", "plum",
+            "lemon", "lime", "kiwi", "melon", "watermelon", "cherry", "date", "fig", "papaya",
+        ],
+        "nutrition": _estimate(50, 1, 12, 0),
+    },
+    "vegetable": {
+        "priority": 20,
+        "keywords": [
+            "broccoli", "spinach", "carrot", "tomato", "pepper", "bell pepper", "onion", "lettuce",
+            "kale", "cucumber", "zucchini", "cauliflower", "cabbage", "celery", "mushroom",
+            "asparagus", "green bean", "pea", "eggplant", "garlic", "beet", "squash", "greens",
+            "arugula", "radish",
+        ],
+        "nutrition": _estimate(25, 2, 5, 0),
+    },
+    "seasoning": {
+        "priority": 10,
+        "keywords": [
+            "seasoning", "spice", "herb", "peppercorn", "black pepper", "white pepper", "cayenne",
+            "cumin", "paprika", "oregano", "basil", "thyme", "rosemary", "cinnamon", "turmeric",
+            "chili powder", "garlic powder", "onion powder", "curry powder", "garam masala",
+            "nutmeg", "bay leaf", "bay leaves", "dill", "sage", "parsley", "cilantro", "coriander",
+            "red pepper flake", "chili flake", "mint",
+        ],
+        "nutrition": {
+            "calories": 5, "protein": 0.1, "carbs": 1, "fat": 0.1,
+            "fiber": 0, "sugar": 0, "sodium": 0, "cholesterol": 0, "saturated_fat": 0,
+        },
+    },
+}
+
+# Used when no category matches
+DEFAULT_ESTIMATE = _estimate(100, 3, 15, 3)
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+class FoodClassifier:
+    """Multi-pattern food classifier over the FOOD_CATEGORIES table.
+
+    Keywords are compiled once into an Aho-Corasick automaton whose
+    alphabet is (singularized) words rather than characters, so matches
+    always fall on word boundaries: "eggplant" is not an egg and
+    "peppercorn" is not a pepper. A batch of names is classified in a
+    single scan over their concatenated word streams.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, dict]] = None):
+        self.categories = categories if categories is not None else FOOD_CATEGORIES
+
+        # Automaton: goto transitions, failure links and per-state matches
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int, str]]] = [[]]
+        self._build()
+
+    @staticmethod
+    def _words(name: str) -> List[str]:
+        return [singularize(word) for word in _WORD_RE.findall(name.lower())]
+
+    def _build(self):
+        for category, spec in self.categories.items():
+            for keyword in spec["keywords"]:
+                words = self._words(keyword)
+                if not words:
+                    continue
+                state = 0
+                for word in words:
+                    next_state = self._goto[state].get(word)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][word] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append([])
+                    state = next_state
+                # (length, priority, category) sorts the preferred match last
+                self._output[state].append((len(words), spec.get("priority", 0), category))
+
+        # Breadth-first pass to set failure links and merge their outputs
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(word, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+    def classify(self, name: str) -> Optional[str]:
+        """Get the food category of a name, or None if no keyword matches"""
+        return self.classify_many([name])[0]
+
+    def _scan(self, words: List[str]) -> Iterator[Tuple[int, Tuple[int, int, str]]]:
+        """Yield ``(end position, (length, priority, category))`` for each keyword in a word stream"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for match in output[state]:
+                yield position, match
+
+    def classify_many(self, names: Sequence[str]) -> List[Optional[str]]:
+        """Classify several names in one pass over their words"""
+        results: List[Optional[str]] = []
+
+        for name in names:
+            # Each name restarts at the root, as if separated by an unmatched word
+            best = max((match for _, match in self._scan(self._words(name))), default=None)
+            results.append(best[2] if best else None)
+
+        return results
+
+    def is_only(self, name: str, category: str) -> bool:
+        """Whether keywords of one category cover every word of a name ("dried basil", not "basil pesto")"""
+        words = self._words(name)
+        covered = [False] * len(words)
+        for position, (length, _, match_category) in self._scan(words):
+            if match_category == category:
+                covered[position - length + 1:position + 1] = [True] * length
+        return bool(words) and all(covered)
+
+    def get_estimate(self, category: Optional[str]) -> Dict[str, float]:
+        """Per-100g estimated nutrition for a category"""
+        if category is None or category not in self.categories:
+            return DEFAULT_ESTIMATE
+        return self.categories[category]["nutrition"]
+
+# Shared classifier used by the nutrition service
+food_classifier = FoodClassifier()
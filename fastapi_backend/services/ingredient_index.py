@@ -0,0 +1,171 @@
+import logging
+import math
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Words that never change which food an ingredient refers to
+IGNORED_WORDS = {"of", "the", "a", "an", "boneless", "skinless", "organic"}
+
+def singularize(word: str) -> str:
+    """Strip common English plural endings ("berries" -> "berry", "tomatoes" -> "tomato")"""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+class IngredientIndex:
+    """Maps normalized ingredient names to a canonical food key.
+
+    Names are first reduced to a signature (singular tokens, filler words
+    dropped, tokens sorted), so "chicken breasts", "boneless chicken
+    breast" and "breast of chicken" share one key. Names whose signature
+    is new are matched against the known canonical names with a character
+    trigram inverted index, which catches spelling variants such as
+    "brocoli". Anything below the similarity threshold is its own key;
+    only seeded names and foods whose nutrition was cached are registered
+    as canonical names, so free-text lookups cannot grow the index.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, max_memo_size: int = 10000,
+                 max_names: int = 50000):
+        self.threshold = threshold or float(os.getenv("INGREDIENT_MATCH_THRESHOLD", "0.82"))
+        self.max_memo_size = max_memo_size
+        self.max_names = max_names
+
+        self.canonical_names: List[str] = []
+        self.canonical_trigrams: List[Set[str]] = []
+        self.signature_to_id: Dict[str, int] = {}
+        self.trigram_index: Dict[str, Set[int]] = defaultdict(set)
+        self.memo: Dict[str, str] = {}
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.merges = 0
+
+    _singularize = staticmethod(singularize)
+
+    def signature(self, name: str) -> str:
+        """Order- and plural-insensitive signature of a normalized name"""
+        tokens = [self._singularize(token) for token in name.split() if token not in IGNORED_WORDS]
+        return " ".join(sorted(tokens))
+
+    @staticmethod
+    def _trigrams(text: str) -> Set[str]:
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, name: str) -> str:
+        """Register a canonical name, returning the canonical key it resolves to"""
+        signature = self.signature(name)
+        if not signature:
+            return name
+
+        canonical_id = self.signature_to_id.get(signature)
+        if canonical_id is not None:
+            return self.canonical_names[canonical_id]
+        if len(self.canonical_names) >= self.max_names:
+            return name
+
+        canonical_id = len(self.canonical_names)
+        trigrams = self._trigrams(signature)
+        self.canonical_names.append(name)
+        self.canonical_trigrams.append(trigrams)
+        self.signature_to_id[signature] = canonical_id
+        for trigram in trigrams:
+            self.trigram_index[trigram].add(canonical_id)
+        return name
+
+    def add_many(self, names: Iterable[str]):
+        """Register several canonical names"""
+        for name in names:
+            self.add(name)
+
+    def _best_match(self, signature: str) -> Optional[int]:
+        """Find the most similar canonical entry by trigram Dice coefficient.
+
+        A candidate scoring at least ``threshold`` must share at least
+        ``threshold * n / (2 - threshold)`` of the query's ``n`` trigrams,
+        so only the rarest trigrams need to be probed for candidates
+        (prefix filtering); each candidate is then scored exactly.
+        """
+        trigrams = self._trigrams(signature)
+        min_shared = math.ceil(self.threshold * len(trigrams) / (2.0 - self.threshold))
+        by_rarity = sorted(trigrams, key=lambda trigram: len(self.trigram_index.get(trigram, ())))
+
+        candidates: Set[int] = set()
+        for trigram in by_rarity[:len(by_rarity) - min_shared + 1]:
+            candidates.update(self.trigram_index.get(trigram, ()))
+
+        # Entries whose size alone rules out the threshold are skipped
+        min_size = len(trigrams) * self.threshold / (2.0 - self.threshold)
+        max_size = len(trigrams) * (2.0 - self.threshold) / self.threshold
+
+        best_id = None
+        best_score = 0.0
+        for canonical_id in candidates:
+            candidate_trigrams = self.canonical_trigrams[canonical_id]
+            if not min_size <= len(candidate_trigrams) <= max_size:
+                continue
+            shared = len(trigrams & candidate_trigrams)
+            score = 2.0 * shared / (len(trigrams) + len(candidate_trigrams))
+            if score > best_score:
+                best_id, best_score = canonical_id, score
+
+        if best_id is not None and best_score >= self.threshold:
+            return best_id
+        return None
+
+    def canonicalize(self, name: str) -> str:
+        """Get the canonical key for a normalized ingredient name"""
+        canonical = self.memo.get(name)
+        if canonical is not None:
+            self.hits += 1
+            return canonical
+
+        signature = self.signature(name)
+        if not signature:
+            return name
+
+        canonical_id = self.signature_to_id.get(signature)
+        if canonical_id is not None:
+            self.hits += 1
+            canonical = self.canonical_names[canonical_id]
+        else:
+            canonical_id = self._best_match(signature)
+            if canonical_id is not None:
+                self.merges += 1
+                canonical = self.canonical_names[canonical_id]
+                logger.info(f"Merged ingredient '{name}' into '{canonical}'")
+            else:
+                # Registered once its nutrition is cached (see ``add``)
+                self.misses += 1
+                canonical = name
+
+        if len(self.memo) >= self.max_memo_size:
+            self.memo.clear()
+        self.memo[name] = canonical
+        return canonical
+
+    def __len__(self) -> int:
+        return len(self.canonical_names)
+
+    def get_stats(self) -> dict:
+        """Get canonicalization statistics"""
+        return {
+            "canonical_names": len(self.canonical_names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "merges": self.merges,
+        }
+
+# Shared index, seeded with the local nutrient table by NutritionService
+ingredient_index = IngredientIndex()
@@ -0,0 +1,206 @@
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Unicode vulgar fractions, rewritten to ASCII before tokenizing ("1½" -> "1 1/2")
+UNICODE_FRACTIONS = {
+    "½": " 1/2", "⅓": " 1/3", "⅔": " 2/3", "¼": " 1/4", "¾": " 3/4",
+    "⅕": " 1/5", "⅖": " 2/5", "⅗": " 3/5", "⅘": " 4/5", "⅙": " 1/6",
+    "⅚": " 5/6", "⅛": " 1/8", "⅜": " 3/8", "⅝": " 5/8", "⅞": " 7/8",
+}
+_FRACTION_TABLE = str.maketrans(UNICODE_FRACTIONS)
+
+# Unit spellings mapped to one canonical unit name
+UNIT_ALIASES = {
+    "cup": "cup", "cups": "cup", "c": "cup",
+    "tablespoon": "tablespoon", "tablespoons": "tablespoon", "tbsp": "tablespoon", "tbs": "tablespoon",
+    "teaspoon": "teaspoon", "teaspoons": "teaspoon", "tsp": "teaspoon",
+    "ounce": "ounce", "ounces": "ounce", "oz": "ounce",
+    "pound": "pound", "pounds": "pound", "lb": "pound", "lbs": "pound",
+    "gram": "gram", "grams": "gram", "g": "gram", "gr": "gram",
+    "kilogram": "kilogram", "kilograms": "kilogram", "kg": "kilogram",
+    "milliliter": "milliliter", "milliliters": "milliliter", "ml": "milliliter",
+    "liter": "liter", "liters": "liter", "l": "liter",
+    "slice": "slice", "slices": "slice",
+    "piece": "piece", "pieces": "piece",
+    "clove": "clove", "cloves": "clove",
+    "pinch": "pinch", "pinches": "pinch", "dash": "dash", "dashes": "dash",
+    "handful": "handful", "handfuls": "handful",
+    "scoop": "scoop", "scoops": "scoop",
+    "medium": "medium", "large": "large", "small": "small",
+    "can": "can", "cans": "can", "jar": "jar", "jars": "jar",
+    "package": "package", "packages": "package", "pack": "package", "packs": "package",
+    "bag": "bag", "bags": "bag", "bottle": "bottle", "bottles": "bottle",
+    "box": "box", "boxes": "box", "carton": "carton", "cartons": "carton",
+    "container": "container", "containers": "container",
+}
+
+# Units that name a container; a parenthetical size like "(14 oz)" gives their weight
+CONTAINER_UNITS = {"can", "jar", "package", "bag", "bottle", "box", "carton", "container"}
+
+# Preparation words that don't change which food it is
+MODIFIER_WORDS = {
+    "fresh", "dried", "cooked", "raw", "grilled", "baked", "steamed", "boiled",
+    "chopped", "diced", "sliced", "minced", "about", "optional", "approximately",
+    "finely", "roughly", "thinly",
+}
+
+_NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|\.\d+"
+
+_TOKEN_RE = re.compile(
+    rf"""
+      ({_NUMBER})\s*(?:-|–|to\b)\s*({_NUMBER})   # range: "2-3", "2 to 3"
+    | ({_NUMBER})                               # number: "2", "1/2", "1 1/2"
+    | (\([^)]*\))                              # parenthetical: "(14 oz)"
+    | ([^\W\d_]+)                              # word
+    """,
+    re.VERBOSE,
+)
+
+_TO_TASTE_RE = re.compile(r"\bto taste\b")
+
+# Token kinds
+NUMBER, RANGE, PAREN, WORD = "number", "range", "paren", "word"
+
+class ParsedIngredient(NamedTuple):
+    food_name: str
+    quantity: Optional[float]
+    unit: Optional[str]
+    package_quantity: Optional[float]
+    package_unit: Optional[str]
+    confidence: float
+
+def parse_number(text: str) -> float:
+    """Parse "2", "0.5", "1/2" or "1 1/2" into a float"""
+    total = 0.0
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += float(numerator) / float(denominator) if float(denominator) else 0.0
+        else:
+            total += float(part)
+    return total
+
+def _tokenize(text: str) -> List[Tuple[str, Any]]:
+    """Split text into (kind, value) tokens; numbers and ranges are already floats"""
+    tokens = []
+    for low, high, number, paren, word in _TOKEN_RE.findall(text):
+        if word:
+            tokens.append((WORD, word))
+        elif number:
+            tokens.append((NUMBER, parse_number(number)))
+        elif low:
+            # Use the midpoint of "2-3 slices"
+            tokens.append((RANGE, (parse_number(low) + parse_number(high)) / 2))
+        else:
+            tokens.append((PAREN, paren))
+    return tokens
+
+def _parse_measure(text: str) -> Optional[Tuple[float, str]]:
+    """Find a "<number> <unit>" measure inside a parenthetical like "(14 oz)" """
+    tokens = _tokenize(text.strip("()"))
+    for (kind, value), (next_kind, next_value) in zip(tokens, tokens[1:]):
+        if kind in (NUMBER, RANGE) and next_kind == WORD and next_value in UNIT_ALIASES:
+            return value, UNIT_ALIASES[next_value]
+    return None
+
+class IngredientParser:
+    """Single-pass parser for ingredient strings such as "1 1/2 cups rice",
+    "½ cup milk", "2-3 slices bread" or "1 (14 oz) can tomatoes".
+
+    The text is tokenized once with a precompiled regex and results are
+    memoized in a bounded LRU cache.
+    """
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = cache_size or int(os.getenv("INGREDIENT_PARSE_CACHE_SIZE", "4096"))
+        self._parse_cached = lru_cache(maxsize=self.cache_size)(self._parse)
+
+    def parse(self, ingredient: str) -> ParsedIngredient:
+        """Parse an ingredient string into name, quantity, unit and confidence"""
+        return self._parse_cached(ingredient)
+
+    def _parse(self, ingredient: str) -> ParsedIngredient:
+        text = ingredient.lower().translate(_FRACTION_TABLE)
+        if "to taste" in text:
+            text = _TO_TASTE_RE.sub(" ", text)
+        tokens = _tokenize(text)
+        count = len(tokens)
+
+        quantity = None
+        unit = None
+        package = None
+        is_range = False
+        name_words = []
+
+        i = 0
+        # Leading quantity, optional "(14 oz)" and unit: "1 (14 oz) can", "2-3 slices", "200g"
+        if count and tokens[0][0] in (NUMBER, RANGE):
+            is_range = tokens[0][0] == RANGE
+            quantity = tokens[0][1]
+            i = 1
+            if i < count and tokens[i][0] == PAREN:
+                package = _parse_measure(tokens[i][1])
+                i += 1
+            if i < count and tokens[i][0] == WORD and tokens[i][1] in UNIT_ALIASES:
+                unit = UNIT_ALIASES[tokens[i][1]]
+                i += 1
+            if package is None and i < count and tokens[i][0] == PAREN:
+                package = _parse_measure(tokens[i][1])
+                i += 1
+            if i < count and tokens[i][1] == "of":
+                i += 1
+
+        while i < count:
+            kind, value = tokens[i]
+            if kind == WORD:
+                if value not in MODIFIER_WORDS:
+                    name_words.append(value)
+            elif kind != PAREN and quantity is None and i + 1 < count:
+                # Trailing quantity, e.g. "chicken breast 200 g"
+                next_kind, next_value = tokens[i + 1]
+                if next_kind == WORD and next_value in UNIT_ALIASES:
+                    is_range = kind == RANGE
+                    quantity = value
+                    unit = UNIT_ALIASES[next_value]
+                    i += 1
+            i += 1
+
+        food_name = " ".join(name_words)
+
+        # Only containers take their weight from a parenthetical size
+        if package is not None and unit is not None and unit not in CONTAINER_UNITS:
+            package = None
+
+        if quantity is None:
+            confidence = 0.3
+        elif package is not None:
+            confidence = 0.9
+        elif unit is not None:
+            confidence = 0.95
+        else:
+            confidence = 0.7  # A bare count such as "2 eggs"
+        if is_range:
+            confidence *= 0.85
+        if not food_name:
+            confidence = 0.0
+
+        return ParsedIngredient(
+            food_name=food_name,
+            quantity=quantity,
+            unit=unit,
+            package_quantity=package[0] if package else None,
+            package_unit=package[1] if package else None,
+            confidence=round(confidence, 3),
+        )
+
+    def cache_info(self):
+        """LRU cache statistics"""
+        return self._parse_cached.cache_info()
+
+# Shared parser used by the nutrition service
+ingredient_parser = IngredientParser()
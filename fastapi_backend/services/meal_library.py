@@ -0,0 +1,317 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from models.mealplan import DayMealPlan, Meal, MealPlanRequest, NutritionInfo
+from services.ingredient_index import singularize
+from utils.database import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEAL_LIBRARY_SEED_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "meal_library.json")
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+
+# Request fields a stored meal was generated under, with their index prefix
+CONSTRAINT_FIELDS = {"dietary_preferences": "diet", "allergies": "allergy", "disliked_foods": "dislike"}
+
+# Meal focus values mapped to the macro profile they require; "balanced" has no requirement
+MEAL_FOCUS_PROFILES = {
+    "balanced": None,
+    "protein-heavy": "high_protein",
+    "high-protein": "high_protein",
+    "high_protein": "high_protein",
+    "low-carb": "low_carb",
+    "low_carb": "low_carb",
+}
+
+DIFFICULTY_RANKS = {"beginner": 0, "intermediate": 1, "advanced": 2}
+
+ACTIVITY_FACTORS = {
+    "sedentary": 1.2, "lightly_active": 1.375, "moderately_active": 1.55,
+    "very_active": 1.725, "extremely_active": 1.9,
+}
+
+GOAL_ADJUSTMENTS = {"weight_loss": -500, "muscle_gain": 300}
+
+# Share of the day's calories each meal is expected to provide
+MEAL_CALORIE_SHARES = {"breakfast": 0.25, "lunch": 0.35, "dinner": 0.40, "snack": 0.10}
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+def _words(text: str) -> List[str]:
+    return [singularize(word) for word in _WORD_RE.findall(text.lower())]
+
+def _normalize_items(values: Optional[Iterable[Any]]) -> FrozenSet[str]:
+    """Lowercased, singular form of a request list field, without "none" """
+    items = (" ".join(_words(str(getattr(value, "value", value)))) for value in values or [])
+    return frozenset(item for item in items if item and item != "none")
+
+def request_constraints(request: MealPlanRequest) -> Dict[str, FrozenSet[str]]:
+    """Dietary preferences, allergies and dislikes of a request"""
+    profile = request.user_profile
+    return {field: _normalize_items(getattr(profile, field)) for field in CONSTRAINT_FIELDS}
+
+class LibraryMeal:
+    """A stored meal with the constraints it was generated under and the attributes it is indexed by"""
+
+    __slots__ = ("key", "meal_type", "meal", "constraints", "cuisine", "words", "prep_time", "difficulty",
+                 "macro_profiles")
+
+    def __init__(self, key: str, meal_type: str, meal: Meal, constraints: Dict[str, FrozenSet[str]],
+                 words: Set[str], macro_profiles: Set[str]):
+        self.key = key
+        self.meal_type = meal_type
+        self.meal = meal
+        self.constraints = constraints
+        self.cuisine = (meal.cuisine_type or "").strip().lower()
+        self.words = words
+        self.prep_time = meal.prep_time
+        self.difficulty = DIFFICULTY_RANKS.get((meal.difficulty or "").lower(), 1)
+        self.macro_profiles = macro_profiles
+
+    @property
+    def calories(self) -> float:
+        return self.meal.nutrition.calories if self.meal.nutrition else 0
+
+    def constraint_items(self) -> Set[str]:
+        """Index entries of the constraints, like ``diet:vegan`` or ``allergy:peanut``"""
+        return {f"{CONSTRAINT_FIELDS[field]}:{item}" for field, items in self.constraints.items() for item in items}
+
+class MealLibrary:
+    """Library of validated meals used to assemble plans without Gemini.
+
+    Every meal that made it into a generated plan is added together with
+    the dietary preferences, allergies and dislikes of the request that
+    produced it; the same dish generated under different constraints is
+    stored separately. A meal is only served to a request whose
+    constraints are a subset of its own, so diet and allergen safety is
+    never guessed from ingredient names. ``find_day`` picks a meal per
+    type that also fits the request's cuisines, prep time, skill, meal
+    focus and a calorie band around the profile's estimated needs, or
+    returns None so the caller falls back to Gemini. Meals are persisted
+    in the ``meal_library`` collection and seeded from a bundled file.
+    """
+
+    def __init__(self, seed_path: Optional[str] = None, max_size: Optional[int] = None,
+                 calorie_tolerance: Optional[float] = None):
+        self.seed_path = seed_path or os.getenv("MEAL_LIBRARY_SEED_PATH", DEFAULT_MEAL_LIBRARY_SEED_PATH)
+        self.max_size = max_size or int(os.getenv("MEAL_LIBRARY_MAX_SIZE", "5000"))
+        self.calorie_tolerance = calorie_tolerance or float(os.getenv("MEAL_LIBRARY_CALORIE_TOLERANCE", "0.25"))
+
+        self.meals: Dict[str, LibraryMeal] = {}
+        self.by_type: Dict[str, Set[str]] = {}
+        self.by_cuisine: Dict[str, Set[str]] = {}
+        self.by_constraint: Dict[str, Set[str]] = {}
+        self.by_macro_profile: Dict[str, Set[str]] = {}
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+        self._load_seed_file()
+
+    def _load_seed_file(self):
+        try:
+            with open(self.seed_path, encoding="utf-8") as f:
+                entries = json.load(f)
+            for entry in entries:
+                self.add(entry["meal_type"], Meal.parse_obj(entry["meal"]), entry.get("constraints"))
+            logger.info(f"Loaded {len(entries)} seed meals into the meal library")
+        except FileNotFoundError:
+            logger.warning(f"Meal library seed file not found at '{self.seed_path}'")
+        except Exception as e:
+            logger.error(f"Error loading meal library seed file '{self.seed_path}': {e}")
+
+    @staticmethod
+    def _key(meal_type: str, meal: Meal, constraints: Dict[str, FrozenSet[str]]) -> str:
+        payload = json.dumps({field: sorted(items) for field, items in constraints.items()}, sort_keys=True)
+        digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=6).hexdigest()
+        return f"{meal_type}:{' '.join(_words(meal.name))}:{digest}"
+
+    def _describe(self, meal_type: str, meal: Meal, constraints: Dict[str, FrozenSet[str]]) -> LibraryMeal:
+        """Work out the indexed attributes of a meal"""
+        nutrition = meal.nutrition or NutritionInfo()
+        macro_profiles = set()
+        if nutrition.calories:
+            if nutrition.protein * 4 / nutrition.calories >= 0.30:
+                macro_profiles.add("high_protein")
+            if nutrition.carbs * 4 / nutrition.calories <= 0.20:
+                macro_profiles.add("low_carb")
+
+        words = set(_words(meal.name))
+        for ingredient in meal.ingredients:
+            words.update(_words(ingredient))
+
+        return LibraryMeal(self._key(meal_type, meal, constraints), meal_type, meal, constraints, words,
+                           macro_profiles)
+
+    def add(self, meal_type: str, meal: Meal,
+            constraints: Optional[Dict[str, Iterable[str]]] = None) -> Optional[LibraryMeal]:
+        """Add a validated meal generated under ``constraints``.
+
+        ``constraints`` holds the request's dietary_preferences, allergies
+        and disliked_foods; a meal added without them is only served to
+        requests that have none. A stored meal with the same type, name and
+        constraints is replaced.
+        """
+        if meal_type not in MEAL_TYPES or meal.nutrition is None or not meal.ingredients:
+            return None
+
+        constraints = {field: _normalize_items((constraints or {}).get(field)) for field in CONSTRAINT_FIELDS}
+        entry = self._describe(meal_type, meal, constraints)
+        if entry.key in self.meals:
+            self._remove(entry.key)
+        elif len(self.meals) >= self.max_size:
+            self._remove(next(iter(self.meals)))
+
+        self.meals[entry.key] = entry
+        self.by_type.setdefault(meal_type, set()).add(entry.key)
+        self.by_cuisine.setdefault(entry.cuisine, set()).add(entry.key)
+        for item in entry.constraint_items():
+            self.by_constraint.setdefault(item, set()).add(entry.key)
+        for profile in entry.macro_profiles:
+            self.by_macro_profile.setdefault(profile, set()).add(entry.key)
+        return entry
+
+    def _remove(self, key: str):
+        entry = self.meals.pop(key, None)
+        if entry is None:
+            return
+        self.by_type.get(entry.meal_type, set()).discard(key)
+        self.by_cuisine.get(entry.cuisine, set()).discard(key)
+        for item in entry.constraint_items():
+            self.by_constraint.get(item, set()).discard(key)
+        for profile in entry.macro_profiles:
+            self.by_macro_profile.get(profile, set()).discard(key)
+
+    async def add_day(self, day_plan: DayMealPlan, request: MealPlanRequest):
+        """Add the meals of a day generated for ``request`` and persist them"""
+        constraints = request_constraints(request)
+        entries = [self.add(meal_type, getattr(day_plan, meal_type), constraints) for meal_type in MEAL_TYPES
+                   if getattr(day_plan, meal_type) is not None]
+        await self._save([entry for entry in entries if entry is not None])
+
+    async def _save(self, entries: Iterable[LibraryMeal]):
+        if db.database is None:
+            return
+        try:
+            for entry in entries:
+                await db.database.meal_library.replace_one(
+                    {"_id": entry.key},
+                    {"meal_type": entry.meal_type, "meal": entry.meal.dict(),
+                     "constraints": {field: sorted(items) for field, items in entry.constraints.items()},
+                     "cuisine": entry.cuisine, "prep_time": entry.prep_time, "updated_at": datetime.utcnow()},
+                    upsert=True
+                )
+        except Exception as e:
+            logger.error(f"Error saving meals to the meal library: {e}")
+
+    async def load(self):
+        """Load the most recently stored meals from Mongo"""
+        if db.database is None:
+            return
+        try:
+            cursor = db.database.meal_library.find({}).sort("updated_at", -1).limit(self.max_size)
+            docs = [doc async for doc in cursor]
+            loaded = 0
+            # Oldest first, so eviction order stays oldest first
+            for doc in reversed(docs):
+                if self.add(doc["meal_type"], Meal.parse_obj(doc["meal"]), doc.get("constraints")) is not None:
+                    loaded += 1
+            logger.info(f"Loaded {loaded} meals from the meal library")
+        except Exception as e:
+            logger.error(f"Error loading the meal library: {e}")
+
+    def estimate_daily_calories(self, request: MealPlanRequest) -> Optional[float]:
+        """Daily calorie needs from the Mifflin-St Jeor equation, or None without body data"""
+        profile = request.user_profile
+        if not (profile.age and profile.weight and profile.height):
+            return None
+        offsets = {"male": 5, "female": -161}
+        bmr = 10 * profile.weight + 6.25 * profile.height - 5 * profile.age + offsets.get(profile.gender or "", -78)
+        calories = bmr * ACTIVITY_FACTORS.get(profile.activity_level or "", 1.375)
+        return calories + GOAL_ADJUSTMENTS.get(str(getattr(profile.fitness_goal, "value", profile.fitness_goal) or ""), 0)
+
+    def find_meals(self, request: MealPlanRequest, meal_type: str) -> Optional[List[LibraryMeal]]:
+        """Library meals of a type that satisfy the request, or None if the request cannot be checked"""
+        profile = request.user_profile
+
+        meal_focus = (request.meal_focus or "balanced").lower()
+        if meal_focus not in MEAL_FOCUS_PROFILES:
+            # A focus the library cannot verify is left to Gemini
+            return None
+        required_profile = MEAL_FOCUS_PROFILES[meal_focus]
+
+        # Only meals generated under at least the request's constraints
+        keys = set(self.by_type.get(meal_type, set()))
+        for field, items in request_constraints(request).items():
+            for item in items:
+                keys &= self.by_constraint.get(f"{CONSTRAINT_FIELDS[field]}:{item}", set())
+        if required_profile:
+            keys &= self.by_macro_profile.get(required_profile, set())
+
+        cuisines = [str(cuisine).lower() for cuisine in profile.preferred_cuisines or []]
+        max_prep_time = request.max_prep_time or 30
+        skill = DIFFICULTY_RANKS.get((request.cooking_skill or "intermediate").lower(), 1)
+
+        target = None
+        daily_calories = self.estimate_daily_calories(request)
+        if daily_calories:
+            target = daily_calories * MEAL_CALORIE_SHARES[meal_type]
+
+        matches = []
+        for key in keys:
+            entry = self.meals[key]
+            if entry.prep_time > max_prep_time or entry.difficulty > skill:
+                continue
+            if cuisines and not any(cuisine in entry.cuisine for cuisine in cuisines):
+                continue
+            if target and abs(entry.calories - target) > target * self.calorie_tolerance:
+                continue
+            matches.append(entry)
+        return matches
+
+    def find_day(self, request: MealPlanRequest) -> Optional[DayMealPlan]:
+        """Assemble breakfast, lunch and dinner from library meals that satisfy the request"""
+        meals = {}
+        for meal_type in ["breakfast", "lunch", "dinner"]:
+            candidates = self.find_meals(request, meal_type)
+            if not candidates:
+                self.misses += 1
+                return None
+            meals[meal_type] = random.choice(candidates).meal
+
+        self.hits += 1
+        return DayMealPlan(**meals)
+
+    def search(self, query: str, top_k: int = 3) -> List[Meal]:
+        """Meals sharing the most words with a free-text query (type, diet, cuisine, name, ingredients)"""
+        query_words = set(_words(query))
+        scored = []
+        for entry in self.meals.values():
+            attributes = entry.words | {entry.meal_type} | set(_words(entry.cuisine))
+            attributes |= {word for item in entry.constraints["dietary_preferences"] for word in _words(item)}
+            attributes |= {word for profile in entry.macro_profiles for word in _words(profile)}
+            score = len(query_words & attributes)
+            if score:
+                scored.append((score, entry.key, entry.meal))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [meal for _, _, meal in scored[:top_k]]
+
+    def __len__(self) -> int:
+        return len(self.meals)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get library statistics"""
+        return {
+            "meals": len(self.meals),
+            "by_type": {meal_type: len(keys) for meal_type, keys in self.by_type.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+        }
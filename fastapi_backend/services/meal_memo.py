@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from services.nutrient_vector import NutrientVector
+
+logger = logging.getLogger(__name__)
+
+class MealMemo:
+    """Memoizes meal nutrition totals by their ingredient multiset.
+
+    The key is a digest of the sorted ``(canonical name, grams)`` pairs
+    plus the serving size, so reordered or respelled ingredient lists of
+    the same meal share one entry. Each entry remembers its ingredients;
+    when an ingredient's cached nutrition is rewritten every meal using it
+    is dropped. Entries are evicted least recently used first.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or int(os.getenv("MEAL_MEMO_SIZE", "2048"))
+        self.entries: "OrderedDict[str, Tuple[NutrientVector, Tuple[str, ...]]]" = OrderedDict()
+        self.meals_by_ingredient: Dict[str, Set[str]] = {}
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(items: Iterable[Tuple[str, float]], serving_size: float = 1) -> str:
+        """Stable key for a meal given its (canonical name, grams) pairs"""
+        canonical = sorted((name, round(float(grams), 3)) for name, grams in items)
+        payload = json.dumps([canonical, serving_size], separators=(",", ":"))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[NutrientVector]:
+        """Get a memoized meal total"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return NutrientVector(entry[0].values)
+
+    def set(self, key: str, total: NutrientVector, ingredient_names: Iterable[str]):
+        """Memoize a meal total computed from the given canonical ingredients"""
+        if key in self.entries:
+            self._remove(key)
+
+        names = tuple(dict.fromkeys(ingredient_names))
+        self.entries[key] = (NutrientVector(total.values), names)
+        for name in names:
+            self.meals_by_ingredient.setdefault(name, set()).add(key)
+
+        while len(self.entries) > self.max_size:
+            self._remove(next(iter(self.entries)))
+
+    def invalidate(self, ingredient_name: str) -> int:
+        """Drop every meal that uses an ingredient, returning how many were dropped"""
+        keys = self.meals_by_ingredient.pop(ingredient_name, set())
+        for key in keys:
+            self._remove(key)
+        if keys:
+            self.invalidations += len(keys)
+            logger.debug(f"Invalidated {len(keys)} memoized meals using '{ingredient_name}'")
+        return len(keys)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for name in entry[1]:
+            keys = self.meals_by_ingredient.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.meals_by_ingredient[name]
+
+    def clear(self):
+        self.entries.clear()
+        self.meals_by_ingredient.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_stats(self) -> dict:
+        """Get memo statistics"""
+        return {
+            "meals": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+# Shared memo, so a cache write by any NutritionService invalidates every instance's meals
+meal_memo = MealMemo()
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from models.mealplan import MealPlanJob, MealPlanJobStatus, MealPlanRequest
+from utils.database import get_collection
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "meal_plan_jobs"
+
+# Generates and stores a plan for (request, user_id), returning the stored plan id
+JobHandler = Callable[[MealPlanRequest, Optional[str]], Awaitable[str]]
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job"""
+    pass
+
+class MealPlanJobQueue:
+    """Runs meal plan generation jobs on an in-process asyncio worker pool.
+
+    ``enqueue`` records the job in the ``meal_plan_jobs`` collection and
+    returns its id right away; ``workers`` tasks take jobs off the queue,
+    run the handler and record the outcome, so the HTTP request never
+    waits on Gemini. A worker claims a job by atomically moving it from
+    queued to running, so a job seen by several workers or processes runs
+    once, and heartbeats while it runs. On ``start``, queued jobs and
+    running jobs whose heartbeat went stale (their process died) are
+    picked up again.
+    """
+
+    def __init__(self, handler: JobHandler, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 stale_after: Optional[float] = None):
+        self.handler = handler
+        self.workers = workers or int(os.getenv("MEAL_PLAN_JOB_WORKERS", "2"))
+        self.max_pending = max_pending or int(os.getenv("MEAL_PLAN_JOB_MAX_PENDING", "100"))
+        # Seconds without a heartbeat before a running job counts as abandoned
+        self.stale_after = stale_after or float(os.getenv("MEAL_PLAN_JOB_STALE_SECONDS", "300"))
+        self.heartbeat_interval = self.stale_after / 3
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Statistics
+        self.completed = 0
+        self.failed = 0
+
+    async def start(self):
+        """Start the worker pool and requeue unfinished jobs"""
+        if self._tasks:
+            return
+        # Created here so the queue belongs to the running event loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        await self._recover()
+        logger.info(f"Meal plan job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Cancel the workers; unfinished jobs stay persisted for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, request: MealPlanRequest, user_id: Optional[str] = None) -> MealPlanJob:
+        """Persist a job and queue it, returning immediately"""
+        if self._queue is None:
+            raise RuntimeError("Meal plan job queue is not running")
+        if self._queue.full():
+            raise QueueFullError("Too many meal plan jobs are pending, please try again later")
+
+        job = MealPlanJob(id=uuid.uuid4().hex, user_id=user_id)
+        doc = job.dict(exclude={"id"})
+        doc["_id"] = job.id
+        doc["request"] = request.dict()
+
+        jobs_collection = await get_collection(JOBS_COLLECTION)
+        await jobs_collection.insert_one(doc)
+        try:
+            self._queue.put_nowait(job.id)
+        except asyncio.QueueFull:
+            # Other jobs filled the queue while this one was being stored
+            await jobs_collection.delete_one({"_id": job.id})
+            raise QueueFullError("Too many meal plan jobs are pending, please try again later")
+        return job
+
+    async def get_job(self, job_id: str, user_id: Optional[str] = None) -> Optional[MealPlanJob]:
+        """Get a job by id, optionally only if it belongs to the user"""
+        query = {"_id": job_id}
+        if user_id is not None:
+            query["user_id"] = user_id
+
+        jobs_collection = await get_collection(JOBS_COLLECTION)
+        doc = await jobs_collection.find_one(query)
+        if not doc:
+            return None
+        doc["id"] = doc.pop("_id")
+        doc.pop("request", None)
+        doc.pop("heartbeat_at", None)
+        return MealPlanJob.parse_obj(doc)
+
+    async def _recover(self):
+        """Requeue jobs that were accepted but never finished"""
+        try:
+            jobs_collection = await get_collection(JOBS_COLLECTION)
+            # Running jobs whose worker stopped heartbeating are queued again
+            stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+            await jobs_collection.update_many(
+                {"status": MealPlanJobStatus.running.value,
+                 "$or": [{"heartbeat_at": {"$lt": stale_before}}, {"heartbeat_at": {"$exists": False}}]},
+                {"$set": {"status": MealPlanJobStatus.queued.value}}
+            )
+            cursor = jobs_collection.find(
+                {"status": MealPlanJobStatus.queued.value}, {"_id": 1}
+            ).sort("created_at", 1).limit(self.max_pending)
+            recovered = 0
+            async for doc in cursor:
+                # Another process may queue the same job too; only one claims it
+                self._queue.put_nowait(doc["_id"])
+                recovered += 1
+            if recovered:
+                logger.info(f"Requeued {recovered} unfinished meal plan jobs")
+        except Exception as e:
+            logger.error(f"Error recovering meal plan jobs: {e}")
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Meal plan job worker {worker_id} failed on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        jobs_collection = await get_collection(JOBS_COLLECTION)
+        now = datetime.utcnow()
+        doc = await jobs_collection.find_one_and_update(
+            {"_id": job_id, "status": MealPlanJobStatus.queued.value},
+            {"$set": {"status": MealPlanJobStatus.running.value, "started_at": now, "heartbeat_at": now}}
+        )
+        if not doc:
+            # Finished, or claimed by another worker or process
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            request = MealPlanRequest.parse_obj(doc["request"])
+            plan_id = await self.handler(request, doc.get("user_id"))
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Meal plan job {job_id} failed: {e}")
+            await self._update(job_id, status=MealPlanJobStatus.failed.value, error=str(e),
+                               finished_at=datetime.utcnow())
+            return
+        finally:
+            heartbeat.cancel()
+
+        self.completed += 1
+        await self._update(job_id, status=MealPlanJobStatus.completed.value, plan_id=plan_id,
+                           finished_at=datetime.utcnow())
+
+    async def _heartbeat(self, job_id: str):
+        """Mark a running job as alive until cancelled"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self._update(job_id, heartbeat_at=datetime.utcnow())
+            except Exception as e:
+                logger.error(f"Error recording heartbeat for meal plan job {job_id}: {e}")
+
+    async def _update(self, job_id: str, **fields):
+        jobs_collection = await get_collection(JOBS_COLLECTION)
+        await jobs_collection.update_one({"_id": job_id}, {"$set": fields})
+
+    async def join(self):
+        """Wait until every queued job has been processed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def get_stats(self) -> dict:
+        """Get queue statistics"""
+        return {
+            "workers": len(self._tasks),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
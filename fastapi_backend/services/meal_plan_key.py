@@ -0,0 +1,72 @@
+import hashlib
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from models.mealplan import MealPlanRequest
+
+# Bumped whenever the prompt or the key layout changes, so old entries are not served
+KEY_VERSION = 1
+
+class MealPlanKeyBuilder:
+    """Builds canonical cache keys for generated meal plans.
+
+    The key covers every request field that shapes the Gemini prompt.
+    Strings are lowercased and trimmed, list fields are deduplicated and
+    sorted, request defaults are applied, and age, weight and height are
+    bucketed into bands so requests differing only by noise (70.0 vs
+    70.2 kg) share a plan. The canonical form is hashed into a short
+    digest.
+    """
+
+    def __init__(self, age_band: Optional[float] = None, weight_band: Optional[float] = None,
+                 height_band: Optional[float] = None):
+        self.age_band = age_band or float(os.getenv("MEAL_PLAN_AGE_BAND", "5"))
+        self.weight_band = weight_band or float(os.getenv("MEAL_PLAN_WEIGHT_BAND", "5"))
+        self.height_band = height_band or float(os.getenv("MEAL_PLAN_HEIGHT_BAND", "5"))
+
+    @staticmethod
+    def _bucket(value: Optional[float], band: float) -> Optional[float]:
+        """Lower edge of the band a value falls in"""
+        if value is None:
+            return None
+        return math.floor(float(value) / band) * band
+
+    @staticmethod
+    def _text(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        # Enum members contribute their value, not their repr
+        value = getattr(value, "value", value)
+        return str(value).strip().lower() or None
+
+    @classmethod
+    def _items(cls, values: Optional[List[Any]]) -> List[str]:
+        return sorted({text for text in (cls._text(value) for value in values or []) if text and text != "none"})
+
+    def canonicalize(self, request: MealPlanRequest) -> Dict[str, Any]:
+        """Canonical form of the prompt-shaping fields of a request"""
+        profile = request.user_profile
+        return {
+            "version": KEY_VERSION,
+            "age": self._bucket(profile.age, self.age_band),
+            "weight": self._bucket(profile.weight, self.weight_band),
+            "height": self._bucket(profile.height, self.height_band),
+            "gender": self._text(profile.gender),
+            "activity_level": self._text(profile.activity_level),
+            "fitness_goal": self._text(profile.fitness_goal),
+            "dietary_preferences": self._items(profile.dietary_preferences),
+            "allergies": self._items(profile.allergies),
+            "disliked_foods": self._items(profile.disliked_foods),
+            "preferred_cuisines": self._items(profile.preferred_cuisines),
+            # Same defaults the prompt falls back to
+            "cooking_skill": self._text(request.cooking_skill or "intermediate"),
+            "meal_focus": self._text(request.meal_focus or "balanced"),
+            "max_prep_time": request.max_prep_time or 30,
+        }
+
+    def key(self, request: MealPlanRequest, prefix: str = "meal_plan") -> str:
+        """Short stable cache key for a request"""
+        payload = json.dumps(self.canonicalize(request), sort_keys=True, separators=(",", ":"))
+        return f"{prefix}_{hashlib.blake2b(payload.encode('utf-8'), digest_size=12).hexdigest()}"
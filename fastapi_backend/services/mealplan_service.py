@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import os
 from datetime import datetime
 import asyncio
@@ -10,10 +10,15 @@ from fastapi import HTTPException
 
 from models.mealplan import (
     UserProfile, MealPlan, DayMealPlan, Meal, MealType, 
-    NutritionInfo, MealPlanRequest
+    NutritionInfo, MealPlanRequest, WeeklyDayPlan, WeeklyMealPlan
 )
 from services.nutrition_service import NutritionService
+from services.nutrient_vector import NutrientVector
+from services.meal_plan_key import MealPlanKeyBuilder
+from services.meal_library import MealLibrary
 from utils.cache import CacheManager
+from utils.json_stream import JSONStreamParser, parse_json
+from utils.llm import llm_executor
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +32,13 @@ except ImportError as e:
     GENAI_AVAILABLE = False
     genai = None
 
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Fields of a generated meal that _build_meal reads
+MEAL_FIELDS = ["name", "description", "ingredients", "instructions", "prep_time", "cuisine_type",
+               "difficulty", "portion_size", "total_nutrition"]
+MEAL_NUTRITION_FIELDS = ["calories", "protein", "carbs", "fat", "fiber", "sugar"]
+
 class MealPlanService:
     def __init__(self):
         # Load environment variables
@@ -43,6 +55,22 @@ class MealPlanService:
         
         # Initialize cache
         self.cache = CacheManager()
+        self.plan_key = MealPlanKeyBuilder()
+        
+        # Validated meals that can answer a request without Gemini
+        self.meal_library = MealLibrary()
+        
+        # Daily calls in flight at once when generating a week
+        self.weekly_concurrency = int(os.getenv("MEAL_PLAN_WEEKLY_CONCURRENCY", "7"))
+    
+    @property
+    def meal_examples(self) -> List[Meal]:
+        """Meals currently in the meal library"""
+        return [entry.meal for entry in self.meal_library.meals.values()]
+    
+    def _get_similar_examples(self, query: str, top_k: int = 3) -> List[Meal]:
+        """Library meals most similar to a free-text query"""
+        return self.meal_library.search(query, top_k)
     
     def _init_gemini(self):
         """Initialize Gemini model for meal planning"""
@@ -108,18 +136,31 @@ class MealPlanService:
         try:
             logger.info("Generating daily meal plan")
             
-            if not self.model:
-                logger.error("Gemini model not available - cannot generate meal plan")
-                raise Exception("AI meal generation service is not available. Please check your connection and try again.")
+            cache_key = self.plan_key.key(request)
             
             # Skip cache if regenerate is true
             if not request.regenerate:
                 # Try to get from cache
-                cache_key = f"meal_plan_{request.user_profile.dict()}"
                 cached_plan = await self.cache.get(cache_key)
                 if cached_plan:
                     logger.info("Returning cached meal plan")
                     return MealPlan.parse_obj(cached_plan)
+                
+                # Assemble from library meals when they satisfy the request
+                day_plan = self.meal_library.find_day(request)
+                if day_plan:
+                    logger.info("Returning meal plan assembled from the meal library")
+                    return MealPlan(
+                        user_id="temp_user_id",
+                        meals=self._with_local_totals(day_plan),
+                        preferences={},
+                        created_at=datetime.utcnow()
+                    )
+            
+            # Cached and library plans don't need Gemini
+            if not self.model:
+                logger.error("Gemini model not available - cannot generate meal plan")
+                raise Exception("AI meal generation service is not available. Please check your connection and try again.")
             
             # Generate AI daily meal plan for today
             response = await self._call_gemini_daily_api(request, "Today")
@@ -127,10 +168,10 @@ class MealPlanService:
             
             # Enrich with nutrition
             enriched_plan = await self._enrich_daily_with_nutrition(daily_data, request.user_profile, "Today")
+            await self.meal_library.add_day(enriched_plan.meals, request)
             
             # Cache the plan if not regenerating
             if not request.regenerate:
-                cache_key = f"meal_plan_{request.user_profile.dict()}"
                 await self.cache.set(cache_key, enriched_plan.dict(), expire=24*60*60)  # Cache for 24 hours
             
             logger.info("Successfully generated daily meal plan")
@@ -155,6 +196,7 @@ class MealPlanService:
             
             # Enrich with nutrition
             enriched_plan = await self._enrich_daily_with_nutrition(daily_data, request.user_profile, target_day)
+            await self.meal_library.add_day(enriched_plan.meals, request)
             
             logger.info(f"Successfully generated daily meal plan for {target_day}")
             return enriched_plan
@@ -163,6 +205,173 @@ class MealPlanService:
             logger.error(f"Error generating daily meal plan: {e}")
             raise Exception(f"Failed to generate daily meal plan: {str(e)}")
 
+    async def generate_weekly_meal_plan(self, request: MealPlanRequest) -> WeeklyMealPlan:
+        """Generate a 7-day meal plan, one concurrent daily prompt per day"""
+        try:
+            logger.info("Generating weekly meal plan")
+            
+            if not self.model:
+                logger.error("Gemini model not available - cannot generate meal plan")
+                raise Exception("AI meal generation service is not available. Please check your connection and try again.")
+            
+            cache_key = self.plan_key.key(request, prefix="weekly_meal_plan")
+            if not request.regenerate:
+                cached_plan = await self.cache.get(cache_key)
+                if cached_plan:
+                    logger.info("Returning cached weekly meal plan")
+                    return WeeklyMealPlan.parse_obj(cached_plan)
+            
+            # Separate daily prompts keep each response short enough not to be truncated
+            semaphore = asyncio.Semaphore(self.weekly_concurrency)
+            
+            async def generate_day(day: str) -> Dict[str, Any]:
+                async with semaphore:
+                    response = await self._call_gemini_daily_api(request, day)
+                    try:
+                        return self._parse_gemini_daily_response(response)
+                    except ValueError:
+                        # Unparseable responses are never cached, so this is a fresh call
+                        logger.warning(f"Regenerating unparseable meal plan for {day}")
+                        response = await self._call_gemini_daily_api(request, day)
+                        return self._parse_gemini_daily_response(response)
+            
+            days_data = await asyncio.gather(*[generate_day(day) for day in WEEK_DAYS])
+            
+            # One nutrition pass over every ingredient of the week
+            ingredients = [
+                ingredient
+                for daily_data in days_data
+                for meal_type in ["breakfast", "lunch", "dinner"]
+                for ingredient in daily_data[meal_type].get("ingredients", [])
+            ]
+            await self.nutrition_service.harvest_ingredient_nutrition(ingredients)
+            
+            days = []
+            for day, daily_data in zip(WEEK_DAYS, days_data):
+                meals = {}
+                for meal_type in ["breakfast", "lunch", "dinner"]:
+                    meals[meal_type] = await self._build_meal(daily_data[meal_type], harvest=False)
+                day_plan = self._assemble_daily_plan(meals, self._get_daily_totals(daily_data, meals))
+                await self.meal_library.add_day(day_plan.meals, request)
+                days.append(WeeklyDayPlan(day=day, meals=day_plan.meals))
+            
+            weekly_plan = WeeklyMealPlan(
+                user_id="temp_user_id",
+                days=days,
+                total_calories=sum(day.meals.total_calories for day in days),
+                total_protein=sum(day.meals.total_protein for day in days),
+                total_carbs=sum(day.meals.total_carbs for day in days),
+                total_fat=sum(day.meals.total_fat for day in days),
+                preferences={},
+                created_at=datetime.utcnow()
+            )
+            
+            if not request.regenerate:
+                await self.cache.set(cache_key, weekly_plan.dict(), expire=24*60*60)  # Cache for 24 hours
+            
+            logger.info("Successfully generated weekly meal plan")
+            return weekly_plan
+            
+        except Exception as e:
+            logger.error(f"Error generating weekly meal plan: {e}")
+            raise Exception(f"Failed to generate weekly meal plan: {str(e)}")
+
+    async def regenerate_meal(self, request: MealPlanRequest, day_plan: DayMealPlan, meal_type: str) -> DayMealPlan:
+        """Regenerate one meal of a day, keeping the other meals"""
+        try:
+            logger.info(f"Regenerating {meal_type}")
+            
+            if not self.model:
+                logger.error("Gemini model not available - cannot regenerate meal")
+                raise Exception("AI meal generation service is not available. Please check your connection and try again.")
+            
+            # The other meals and the replaced meal's nutrition keep the day balanced
+            prompt = self._create_meal_slot_prompt(request, day_plan, meal_type)
+            response = await llm_executor.generate_content(
+                self.model,
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=0.7,
+                    top_p=0.8,
+                    top_k=40,
+                    max_output_tokens=2048,
+                )
+            )
+            meal_data = self._parse_gemini_meal_response(response.text, meal_type)
+            meal = await self._build_meal(meal_data)
+            
+            updated_day = day_plan.copy(update={meal_type: meal})
+            await self.meal_library.add_day(DayMealPlan(**{meal_type: meal}), request)
+            return self._with_local_totals(updated_day)
+            
+        except Exception as e:
+            logger.error(f"Error regenerating {meal_type}: {e}")
+            raise Exception(f"Failed to regenerate {meal_type}: {str(e)}")
+
+    async def stream_meal_plan(self, request: MealPlanRequest, target_day: str = "Today") -> AsyncIterator[Tuple[str, Any]]:
+        """Generate a daily meal plan, yielding each meal as soon as Gemini finishes it"""
+        if not self.model:
+            logger.error("Gemini model not available - cannot generate meal plan")
+            raise Exception("AI meal generation service is not available. Please check your connection and try again.")
+        
+        cache_key = self.plan_key.key(request)
+        if not request.regenerate:
+            cached_plan = await self.cache.get(cache_key)
+            if cached_plan:
+                # Replayed as the same meal, daily_totals and plan events a live stream yields
+                logger.info("Streaming cached meal plan")
+                plan = MealPlan.parse_obj(cached_plan)
+                for meal_type in ["breakfast", "lunch", "dinner"]:
+                    meal = getattr(plan.meals, meal_type)
+                    if meal:
+                        yield "meal", {"meal_type": meal_type, "meal": meal}
+                yield "daily_totals", {
+                    "calories": plan.meals.total_calories,
+                    "protein": plan.meals.total_protein,
+                    "carbs": plan.meals.total_carbs,
+                    "fat": plan.meals.total_fat,
+                }
+                yield "plan", plan
+                return
+        
+        prompt = self._create_daily_meal_plan_prompt(request, target_day)
+        parser = JSONStreamParser(expect="{")
+        meals: Dict[str, Meal] = {}
+        
+        chunks = llm_executor.stream_content(
+            self.model,
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.7,
+                top_p=0.8,
+                top_k=40,
+                max_output_tokens=8192,
+            )
+        )
+        async for chunk in chunks:
+            for key, value in parser.feed(chunk):
+                if key in ("breakfast", "lunch", "dinner"):
+                    self._validate_meal(value, key)
+                    meals[key] = await self._build_meal(value)
+                    yield "meal", {"meal_type": key, "meal": meals[key]}
+        
+        # A response cut off after the meals still yields a plan
+        daily_data = parser.close(keep_partial=False)
+        for meal_type in ["breakfast", "lunch", "dinner"]:
+            if meal_type not in meals:
+                raise ValueError(f"Missing {meal_type} in daily plan")
+        
+        daily_totals = self._get_daily_totals(daily_data, meals)
+        yield "daily_totals", daily_totals
+        
+        plan = self._assemble_daily_plan(meals, daily_totals)
+        await self.meal_library.add_day(plan.meals, request)
+        if not request.regenerate:
+            await self.cache.set(cache_key, plan.dict(), expire=24*60*60)  # Cache for 24 hours
+        
+        logger.info(f"Successfully streamed daily meal plan for {target_day}")
+        yield "plan", plan
+
     async def _generate_with_gemini(self, prompt: str) -> str:
         """Generate content using Gemini AI"""
         if not self.model:
@@ -170,14 +379,17 @@ class MealPlanService:
             raise Exception("AI meal generation service is not available. Please check your connection and try again.")
         
         try:
-            response = self.model.generate_content(
+            response = await llm_executor.generate_content(
+                self.model,
                 prompt,
                 generation_config=genai.types.GenerationConfig(
                     temperature=0.7,
                     top_p=0.8,
                     top_k=40,
                     max_output_tokens=8192,
-                )
+                ),
+                call_type="meal_plan",
+                validate=self._is_valid_response(self._parse_gemini_response),
             )
             return response.text
         except Exception as e:
@@ -186,6 +398,40 @@ class MealPlanService:
 
     async def _call_gemini_daily_api(self, request: MealPlanRequest, target_day: str) -> str:
         """Call Gemini API for daily meal plan generation with nutrition info"""
+        prompt = self._create_daily_meal_plan_prompt(request, target_day)
+        
+        try:
+            response = await llm_executor.generate_content(
+                self.model,
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=0.7,
+                    top_p=0.8,
+                    top_k=40,
+                    max_output_tokens=8192,
+                ),
+                call_type="daily_meal_plan",
+                use_cache=not request.regenerate,
+                validate=self._is_valid_response(self._parse_gemini_daily_response),
+            )
+            return response.text
+        except Exception as e:
+            logger.error(f"Error calling Gemini API for daily plan: {e}")
+            raise Exception(f"Gemini API error: {str(e)}")
+
+    @staticmethod
+    def _is_valid_response(parse):
+        """Response validator for the LLM cache: only responses that parse are cached"""
+        def validate(response_text: str) -> bool:
+            try:
+                parse(response_text)
+                return True
+            except ValueError:
+                return False
+        return validate
+
+    def _create_daily_meal_plan_prompt(self, request: MealPlanRequest, target_day: str) -> str:
+        """Create prompt for daily meal plan generation with nutrition info"""
         user_profile = request.user_profile
         
         # Get preferences from the request fields
@@ -227,7 +473,10 @@ class MealPlanService:
                             "carbs": number,
                             "fat": number,
                             "fiber": number,
-                            "sugar": number
+                            "sugar": number,
+                            "sodium": number in mg,
+                            "cholesterol": number in mg,
+                            "saturated_fat": number
                         }}
                     }}
                 ],
@@ -260,21 +509,74 @@ class MealPlanService:
         Ensure all nutrition values are realistic and based on standard nutritional databases.
         All numerical values should be numbers, not strings.
         '''
+        return prompt
+
+    def _create_meal_slot_prompt(self, request: MealPlanRequest, day_plan: DayMealPlan, meal_type: str) -> str:
+        """Create prompt for regenerating a single meal of a day"""
+        user_profile = request.user_profile
         
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    top_p=0.8,
-                    top_k=40,
-                    max_output_tokens=8192,
-                )
+        other_meals = []
+        for other_type in ["breakfast", "lunch", "dinner", "snack"]:
+            other_meal = getattr(day_plan, other_type)
+            if other_type == meal_type or other_meal is None:
+                continue
+            nutrition = other_meal.nutrition or NutritionInfo()
+            other_meals.append(
+                f"- {other_type.capitalize()}: {other_meal.name} "
+                f"({nutrition.calories:.0f} kcal, {nutrition.protein:.0f}g protein, "
+                f"{nutrition.carbs:.0f}g carbs, {nutrition.fat:.0f}g fat)"
             )
-            return response.text
-        except Exception as e:
-            logger.error(f"Error calling Gemini API for daily plan: {e}")
-            raise Exception(f"Gemini API error: {str(e)}")
+        
+        other_meals_text = "\n        ".join(other_meals) or "- No other meals"
+        
+        # Aim for what the replaced meal contributed so the day stays on target
+        current_meal = getattr(day_plan, meal_type)
+        target = ""
+        if current_meal is not None and current_meal.nutrition is not None:
+            target = (
+                f"Target about {current_meal.nutrition.calories:.0f} kcal, {current_meal.nutrition.protein:.0f}g protein, "
+                f"{current_meal.nutrition.carbs:.0f}g carbs and {current_meal.nutrition.fat:.0f}g fat. "
+                f"It must be a different dish than {current_meal.name}."
+            )
+        
+        prompt = f'''
+        Create a new {meal_type} for a person with these characteristics:
+        - Age: {user_profile.age}, Weight: {user_profile.weight}kg, Height: {user_profile.height}cm
+        - Gender: {user_profile.gender}, Activity: {user_profile.activity_level}
+        - Fitness Goal: {user_profile.fitness_goal}
+        - Dietary Preferences: {", ".join(user_profile.dietary_preferences) if user_profile.dietary_preferences else "None"}
+        - Allergies: {", ".join(user_profile.allergies) if user_profile.allergies else "None"}
+        - Dislikes: {", ".join(user_profile.disliked_foods) if user_profile.disliked_foods else "None"}
+        - Cooking Skill: {request.cooking_skill or "intermediate"}
+        - Maximum prep time: {request.max_prep_time or 30} minutes
+        
+        The rest of the day is fixed:
+        {other_meals_text}
+        
+        {target} Do not repeat the other meals.
+        
+        Return ONLY a JSON object for the {meal_type} with this exact structure:
+        {{
+            "name": "Meal Name",
+            "description": "Brief description of the meal",
+            "ingredients": [
+                {{
+                    "name": "ingredient1",
+                    "amount": "quantity with unit",
+                    "nutrition": {{"calories": number, "protein": number, "carbs": number, "fat": number, "fiber": number, "sugar": number, "sodium": number in mg, "cholesterol": number in mg, "saturated_fat": number}}
+                }}
+            ],
+            "instructions": ["step1", "step2", "step3"],
+            "prep_time": number,
+            "cuisine_type": "international/specific cuisine",
+            "difficulty": "beginner/intermediate/advanced",
+            "portion_size": "1 serving",
+            "total_nutrition": {{"calories": number, "protein": number, "carbs": number, "fat": number, "fiber": number, "sugar": number}}
+        }}
+        
+        All numerical values should be numbers, not strings.
+        '''
+        return prompt
 
     def _create_meal_plan_prompt(self, request: MealPlanRequest) -> str:
         """Create prompt for weekly meal plan generation"""
@@ -309,15 +611,9 @@ class MealPlanService:
     def _parse_gemini_response(self, response: str) -> Dict[str, Any]:
         """Parse Gemini response into meal plan data"""
         try:
-            # Clean the response
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            
-            # Parse JSON
-            meal_plan_data = json.loads(response)
+            # Parse JSON, tolerating fences and surrounding text; a day cut off
+            # by truncation is dropped rather than repaired
+            meal_plan_data = parse_json(response, expect="{", keep_partial=False)
             
             # Validate structure
             if "days" not in meal_plan_data:
@@ -339,21 +635,16 @@ class MealPlanService:
     def _parse_gemini_daily_response(self, response: str) -> Dict[str, Any]:
         """Parse Gemini response for daily meal plan"""
         try:
-            # Clean the response
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            
-            # Parse JSON
-            daily_data = json.loads(response)
+            # Parse JSON, tolerating fences and surrounding text; a meal cut off
+            # by truncation is dropped rather than repaired
+            daily_data = parse_json(response, expect="{", keep_partial=False)
             
             # Validate structure
             required_meals = ["breakfast", "lunch", "dinner"]
             for meal in required_meals:
                 if meal not in daily_data:
                     raise ValueError(f"Missing {meal} in daily plan")
+                self._validate_meal(daily_data[meal], meal)
             
             return daily_data
             
@@ -365,15 +656,46 @@ class MealPlanService:
             logger.error(f"Error parsing daily response: {e}")
             raise ValueError(f"Error parsing AI daily response: {str(e)}")
 
+    @staticmethod
+    def _validate_meal(meal_data: Any, meal_type: str):
+        """Raise ValueError unless a generated meal has every field _build_meal reads"""
+        if not isinstance(meal_data, dict):
+            raise ValueError(f"Invalid {meal_type} in response")
+        for field in MEAL_FIELDS:
+            if field not in meal_data:
+                raise ValueError(f"Missing {field} in {meal_type}")
+        if not isinstance(meal_data["ingredients"], list) or \
+                not all(isinstance(ingredient, dict) and "name" in ingredient for ingredient in meal_data["ingredients"]):
+            raise ValueError(f"Invalid ingredients in {meal_type}")
+        total_nutrition = meal_data["total_nutrition"]
+        if not isinstance(total_nutrition, dict) or not all(field in total_nutrition for field in MEAL_NUTRITION_FIELDS):
+            raise ValueError(f"Incomplete total_nutrition in {meal_type}")
+
+    def _parse_gemini_meal_response(self, response: str, meal_type: str) -> Dict[str, Any]:
+        """Parse Gemini response for a single meal"""
+        try:
+            meal_data = parse_json(response, expect="{", keep_partial=False)
+            
+            # Accept the meal wrapped in its type as well
+            if isinstance(meal_data.get(meal_type), dict):
+                meal_data = meal_data[meal_type]
+            
+            self._validate_meal(meal_data, meal_type)
+            return meal_data
+            
+        except Exception as e:
+            logger.error(f"Error parsing {meal_type} response: {e}")
+            raise ValueError(f"Error parsing AI meal response: {str(e)}")
+
     async def _enrich_with_nutrition(self, meal_plan_data: Dict[str, Any], user_profile: UserProfile) -> MealPlan:
         """Enrich meal plan with nutrition data"""
         try:
             days = []
-            weekly_nutrition = NutritionInfo(calories=0, protein=0, carbs=0, fat=0)
+            daily_totals = []
             
             for day_data in meal_plan_data["days"]:
                 day_meals = []
-                daily_nutrition = NutritionInfo(calories=0, protein=0, carbs=0, fat=0)
+                meal_totals = []
                 
                 for meal_type in ["breakfast", "lunch", "dinner"]:
                     if meal_type in day_data:
@@ -401,10 +723,9 @@ class MealPlanService:
                         
                         # Add to daily totals
                         if meal_nutrition:
-                            daily_nutrition.calories += meal_nutrition.calories
-                            daily_nutrition.protein += meal_nutrition.protein
-                            daily_nutrition.carbs += meal_nutrition.carbs
-                            daily_nutrition.fat += meal_nutrition.fat
+                            meal_totals.append(NutrientVector.from_nutrition(meal_nutrition))
+                
+                daily_nutrition = NutrientVector.sum(meal_totals)
                 
                 # Create day meal plan
                 day_plan = DayMealPlan(
@@ -412,16 +733,15 @@ class MealPlanService:
                     breakfast=day_meals[0] if len(day_meals) > 0 else None,
                     lunch=day_meals[1] if len(day_meals) > 1 else None,
                     dinner=day_meals[2] if len(day_meals) > 2 else None,
-                    daily_nutrition=daily_nutrition
+                    daily_nutrition=daily_nutrition.to_nutrition()
                 )
                 
                 days.append(day_plan)
                 
                 # Add to weekly totals
-                weekly_nutrition.calories += daily_nutrition.calories
-                weekly_nutrition.protein += daily_nutrition.protein
-                weekly_nutrition.carbs += daily_nutrition.carbs
-                weekly_nutrition.fat += daily_nutrition.fat
+                daily_totals.append(daily_nutrition)
+            
+            weekly_nutrition = NutrientVector.sum(daily_totals)
             
             # For the new daily-focused model, just return the first day's plan
             if days:
@@ -448,69 +768,12 @@ class MealPlanService:
         """Enrich daily meal plan with nutrition data from the response"""
         try:
             # Create meals by type
-            breakfast_meal = None
-            lunch_meal = None
-            dinner_meal = None
-            
+            meals = {}
             for meal_type in ["breakfast", "lunch", "dinner"]:
                 if meal_type in daily_data:
-                    meal_data = daily_data[meal_type]
-                    
-                    # Get ingredients with their nutrition info
-                    ingredients = [ingredient["name"] for ingredient in meal_data["ingredients"]]
-                    
-                    # Create meal nutrition info from the total_nutrition in response
-                    meal_nutrition = NutritionInfo(
-                        calories=meal_data["total_nutrition"]["calories"],
-                        protein=meal_data["total_nutrition"]["protein"],
-                        carbs=meal_data["total_nutrition"]["carbs"],
-                        fat=meal_data["total_nutrition"]["fat"],
-                        fiber=meal_data["total_nutrition"]["fiber"],
-                        sugar=meal_data["total_nutrition"]["sugar"],
-                        sodium=0,  # These values aren't in the response
-                        cholesterol=0,
-                        saturated_fat=0
-                    )
-                    
-                    # Create meal object with all required fields
-                    meal = Meal(
-                        name=meal_data["name"],
-                        description=meal_data["description"],
-                        ingredients=ingredients,
-                        instructions=meal_data["instructions"],
-                        prep_time=meal_data["prep_time"],
-                        nutrition=meal_nutrition,
-                        cuisine_type=meal_data["cuisine_type"],
-                        difficulty=meal_data["difficulty"],
-                        portion_size=meal_data["portion_size"]
-                    )
-                    
-                    # Assign meal to correct variable
-                    if meal_type == "breakfast":
-                        breakfast_meal = meal
-                    elif meal_type == "lunch":
-                        lunch_meal = meal
-                    else:
-                        dinner_meal = meal
-            
-            # Create day meal plan using daily totals from response
-            day_plan = DayMealPlan(
-                breakfast=breakfast_meal,
-                lunch=lunch_meal,
-                dinner=dinner_meal,
-                total_calories=daily_data["daily_totals"]["calories"],
-                total_protein=daily_data["daily_totals"]["protein"],
-                total_carbs=daily_data["daily_totals"]["carbs"],
-                total_fat=daily_data["daily_totals"]["fat"]
-            )
+                    meals[meal_type] = await self._build_meal(daily_data[meal_type])
             
-            # Create and return meal plan
-            return MealPlan(
-                user_id="temp_user_id",
-                meals=day_plan,
-                preferences={},
-                created_at=datetime.utcnow()
-            )
+            return self._assemble_daily_plan(meals, self._get_daily_totals(daily_data, meals))
             
         except Exception as e:
             logger.error(f"Error enriching daily plan with nutrition: {e}")
@@ -519,6 +782,84 @@ class MealPlanService:
                 detail=f"Failed to enrich meal plan with nutrition data: {str(e)}"
             )
 
+    async def _build_meal(self, meal_data: Dict[str, Any], harvest: bool = True) -> Meal:
+        """Create a Meal from one meal of a daily response"""
+        # Get ingredients with their nutrition info
+        ingredients = [ingredient["name"] for ingredient in meal_data["ingredients"]]
+        
+        # Reuse the per-ingredient nutrition Gemini already returned
+        if harvest:
+            await self.nutrition_service.harvest_ingredient_nutrition(meal_data["ingredients"])
+        
+        # Create meal nutrition info from the total_nutrition in response
+        meal_nutrition = NutritionInfo(
+            calories=meal_data["total_nutrition"]["calories"],
+            protein=meal_data["total_nutrition"]["protein"],
+            carbs=meal_data["total_nutrition"]["carbs"],
+            fat=meal_data["total_nutrition"]["fat"],
+            fiber=meal_data["total_nutrition"]["fiber"],
+            sugar=meal_data["total_nutrition"]["sugar"],
+            sodium=0,  # These values aren't in the response
+            cholesterol=0,
+            saturated_fat=0
+        )
+        
+        # Create meal object with all required fields
+        return Meal(
+            name=meal_data["name"],
+            description=meal_data["description"],
+            ingredients=ingredients,
+            instructions=meal_data["instructions"],
+            prep_time=meal_data["prep_time"],
+            nutrition=meal_nutrition,
+            cuisine_type=meal_data["cuisine_type"],
+            difficulty=meal_data["difficulty"],
+            portion_size=meal_data["portion_size"]
+        )
+
+    def _get_daily_totals(self, daily_data: Dict[str, Any], meals: Dict[str, Meal]) -> Dict[str, Any]:
+        """Daily totals from the response, or the sum of the meals when missing or truncated"""
+        daily_totals = daily_data.get("daily_totals")
+        if isinstance(daily_totals, dict) and all(field in daily_totals for field in ["calories", "protein", "carbs", "fat"]):
+            return daily_totals
+        return NutrientVector.sum(
+            [NutrientVector.from_nutrition(meal.nutrition) for meal in meals.values()]
+        ).to_dict()
+
+    def _with_local_totals(self, day_plan: DayMealPlan) -> DayMealPlan:
+        """Recompute a day's totals from its meals"""
+        meals = [
+            getattr(day_plan, meal_type)
+            for meal_type in ["breakfast", "lunch", "dinner", "snack"]
+            if getattr(day_plan, meal_type) is not None and getattr(day_plan, meal_type).nutrition is not None
+        ]
+        total = NutrientVector.sum([NutrientVector.from_nutrition(meal.nutrition) for meal in meals])
+        return day_plan.copy(update={
+            "total_calories": total["calories"],
+            "total_protein": total["protein"],
+            "total_carbs": total["carbs"],
+            "total_fat": total["fat"],
+        })
+
+    def _assemble_daily_plan(self, meals: Dict[str, Meal], daily_totals: Dict[str, Any]) -> MealPlan:
+        """Create a meal plan from built meals and the response's daily totals"""
+        day_plan = DayMealPlan(
+            breakfast=meals.get("breakfast"),
+            lunch=meals.get("lunch"),
+            dinner=meals.get("dinner"),
+            total_calories=daily_totals["calories"],
+            total_protein=daily_totals["protein"],
+            total_carbs=daily_totals["carbs"],
+            total_fat=daily_totals["fat"]
+        )
+        
+        return MealPlan(
+            user_id="temp_user_id",
+            meals=day_plan,
+            preferences={},
+            created_at=datetime.utcnow()
+        )
+
     def _create_basic_meal_plan(self, meal_plan_data: Dict[str, Any], user_profile: UserProfile) -> MealPlan:
         """Create meal plan without nutrition enrichment"""
         days = []
@@ -0,0 +1,132 @@
+import csv
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.mealplan import NutritionInfo
+
+logger = logging.getLogger(__name__)
+
+# Column order of the nutrient table, matching the NutritionInfo fields
+NUTRIENT_FIELDS = [
+    "calories", "protein", "carbs", "fat", "fiber",
+    "sugar", "sodium", "cholesterol", "saturated_fat"
+]
+
+DEFAULT_NUTRIENT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "nutrients.csv")
+
+class NutrientDatabase:
+    """Local per-100g nutrient table backed by a NumPy array.
+
+    ``values`` is a float64 matrix with one row per food id and one column
+    per nutrient (``columns`` exposes each nutrient as a view), and
+    ``name_to_id`` maps normalized ingredient names to food ids. The table
+    is loaded from a bundled CSV on first use.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("NUTRIENT_DB_PATH", DEFAULT_NUTRIENT_DB_PATH)
+        self.names: List[str] = []
+        self.name_to_id: Dict[str, int] = {}
+        self.values = np.zeros((0, len(NUTRIENT_FIELDS)), dtype=np.float64)
+        self.columns: Dict[str, np.ndarray] = {}
+        self._loaded = False
+
+        # Lookup statistics
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Load the nutrient table from disk"""
+        names = []
+        rows = []
+        seen = set()
+
+        try:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    name = row["name"].strip().lower()
+                    if not name or name in seen:
+                        continue
+                    seen.add(name)
+                    names.append(name)
+                    rows.append([float(row.get(field) or 0) for field in NUTRIENT_FIELDS])
+        except FileNotFoundError:
+            logger.warning(f"Nutrient database not found at '{self.path}', local lookups disabled")
+        except Exception as e:
+            logger.error(f"Error loading nutrient database from '{self.path}': {e}")
+            names = []
+            rows = []
+
+        self.names = names
+        self.name_to_id = {name: food_id for food_id, name in enumerate(names)}
+        self.values = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(NUTRIENT_FIELDS))
+        self.columns = {field: self.values[:, i] for i, field in enumerate(NUTRIENT_FIELDS)}
+        self._loaded = True
+
+        logger.info(f"Loaded {len(self.names)} foods into the local nutrient database "
+                    f"({self.memory_bytes() / 1024:.1f} KiB)")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def food_id(self, name: str) -> Optional[int]:
+        """Get the food id for a normalized ingredient name"""
+        self._ensure_loaded()
+        food_id = self.name_to_id.get(name)
+        if food_id is None:
+            # Accept simple plurals, e.g. "tomatoes" or "almond"
+            if name.endswith("es"):
+                food_id = self.name_to_id.get(name[:-2])
+            if food_id is None and name.endswith("s"):
+                food_id = self.name_to_id.get(name[:-1])
+            if food_id is None:
+                food_id = self.name_to_id.get(name + "s")
+        return food_id
+
+    def get_values(self, food_id: int) -> List[float]:
+        """Get the per-100g nutrient values of a food in NUTRIENT_FIELDS order"""
+        return self.values[food_id].tolist()
+
+    def get_row(self, name: str) -> Optional[np.ndarray]:
+        """Get the per-100g nutrient row of a normalized ingredient name (a read-only view)"""
+        food_id = self.food_id(name)
+        if food_id is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return self.values[food_id]
+
+    def get(self, name: str) -> Optional[NutritionInfo]:
+        """Get per-100g nutrition for a normalized ingredient name"""
+        row = self.get_row(name)
+        if row is None:
+            return None
+        return NutritionInfo(**dict(zip(NUTRIENT_FIELDS, row.tolist())))
+
+    def __contains__(self, name: str) -> bool:
+        return self.food_id(name) is not None
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self.names)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory used by the nutrient values"""
+        return self.values.nbytes
+
+    def get_stats(self) -> dict:
+        """Get lookup statistics"""
+        return {
+            "foods": len(self.names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+# Shared table, loaded lazily on first lookup
+nutrient_db = NutrientDatabase()
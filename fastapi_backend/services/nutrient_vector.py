@@ -0,0 +1,83 @@
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+from models.mealplan import NutritionInfo
+from services.nutrient_db import NUTRIENT_FIELDS
+
+class NutrientVector:
+    """Fixed-length nutrient amounts backed by a NumPy array.
+
+    Values follow the NUTRIENT_FIELDS order. Sums and scaling are plain
+    array operations, so meals and days are aggregated without building a
+    NutritionInfo per step; convert with ``to_nutrition`` at the API
+    boundary.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Optional[Iterable[float]] = None):
+        if values is None:
+            self.values = np.zeros(len(NUTRIENT_FIELDS), dtype=np.float64)
+        else:
+            self.values = np.array(values, dtype=np.float64).reshape(len(NUTRIENT_FIELDS))
+
+    @classmethod
+    def from_nutrition(cls, nutrition: NutritionInfo) -> "NutrientVector":
+        return cls([getattr(nutrition, field) for field in NUTRIENT_FIELDS])
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NutrientVector":
+        """Build a vector from a nutrition dict such as a cache entry; missing fields are zero"""
+        return cls([float(data.get(field) or 0) for field in NUTRIENT_FIELDS])
+
+    def to_nutrition(self) -> NutritionInfo:
+        return NutritionInfo(**dict(zip(NUTRIENT_FIELDS, self.values.tolist())))
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(zip(NUTRIENT_FIELDS, self.values.tolist()))
+
+    def __getitem__(self, field: str) -> float:
+        return float(self.values[NUTRIENT_FIELDS.index(field)])
+
+    def __add__(self, other: "NutrientVector") -> "NutrientVector":
+        return NutrientVector(self.values + other.values)
+
+    def __iadd__(self, other: "NutrientVector") -> "NutrientVector":
+        self.values += other.values
+        return self
+
+    def __mul__(self, factor: float) -> "NutrientVector":
+        return NutrientVector(self.values * factor)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, NutrientVector) and np.allclose(self.values, other.values)
+
+    def __repr__(self) -> str:
+        return f"NutrientVector({self.to_dict()})"
+
+    @staticmethod
+    def stack(vectors: Sequence["NutrientVector"]) -> np.ndarray:
+        """Stack vectors into an (n, len(NUTRIENT_FIELDS)) matrix"""
+        if not vectors:
+            return np.zeros((0, len(NUTRIENT_FIELDS)), dtype=np.float64)
+        return np.vstack([vector.values for vector in vectors])
+
+    @classmethod
+    def sum(cls, vectors: Sequence["NutrientVector"]) -> "NutrientVector":
+        """Total of several vectors in one reduction"""
+        return cls(cls.stack(vectors).sum(axis=0))
+
+    @classmethod
+    def aggregate(cls, vectors: Sequence["NutrientVector"], weights: Sequence[float]) -> "NutrientVector":
+        """Weighted total of several vectors, e.g. per-100g values times portions / 100"""
+        if not vectors:
+            return cls()
+        return cls(np.asarray(weights, dtype=np.float64) @ cls.stack(vectors))
+
+    @classmethod
+    def scale_each(cls, vectors: Sequence["NutrientVector"], weights: Sequence[float]) -> np.ndarray:
+        """Scale each vector by its own weight, returning the scaled rows as a matrix"""
+        return cls.stack(vectors) * np.asarray(weights, dtype=np.float64).reshape(-1, 1)
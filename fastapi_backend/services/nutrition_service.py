@@ -1,12 +1,23 @@
 import logging
 import os
-import json
-from typing import List, Dict, Optional, Any
-import re
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator, AsyncIterable, AsyncIterator, Union
 import asyncio
+import time
+from collections import Counter
+import numpy as np
 from dotenv import load_dotenv
 from models.mealplan import NutritionInfo
+from services.food_classifier import food_classifier
+from services.meal_memo import meal_memo
+from services.nutrient_db import NUTRIENT_FIELDS, nutrient_db
+from services.nutrient_vector import NutrientVector
+from services.unit_converter import unit_converter
+from services.ingredient_index import ingredient_index
+from services.ingredient_parser import ParsedIngredient, ingredient_parser
 from utils.cache import CacheManager
+from utils.json_stream import parse_json
+from utils.llm import llm_executor
+from utils.singleflight import SingleFlight
 
 # Load environment variables
 load_dotenv()
@@ -24,6 +35,40 @@ except ImportError as e:
     GENAI_AVAILABLE = False
     genai = None
 
+# Plausible per-100g ranges for nutrition harvested from generated meal plans
+HARVEST_BOUNDS = {
+    "calories": (0, 900),
+    "protein": (0, 100),
+    "carbs": (0, 100),
+    "fat": (0, 100),
+    "fiber": (0, 100),
+    "sugar": (0, 100),
+}
+
+# Harvested only when present; an entry missing any of them is cached as incomplete
+HARVEST_EXTRA_BOUNDS = {
+    "sodium": (0, 40000),
+    "cholesterol": (0, 3000),
+    "saturated_fat": (0, 100),
+}
+
+# Shape of the per-food nutrition object requested from Gemini
+NUTRIENT_JSON_FORMAT = """{
+                "calories": <number>,
+                "protein": <number in grams>,
+                "carbs": <number in grams>,
+                "fat": <number in grams>,
+                "fiber": <number in grams>,
+                "sugar": <number in grams>,
+                "sodium": <number in mg>,
+                "cholesterol": <number in mg>,
+                "saturated_fat": <number in grams>
+            }"""
+
+async def _aiter_sync(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
 class NutritionService:
     def __init__(self):
         self.cache = CacheManager()
@@ -40,76 +85,87 @@ class NutritionService:
         self.gemini_model = None
         self._init_gemini()
         
-        # Common portion size mappings
-        self.portion_mappings = {
-            "cup": 240,
-            "cups": 240,
-            "tablespoon": 15,
-            "tablespoons": 15,
-            "tbsp": 15,
-            "teaspoon": 5,
-            "teaspoons": 5,
-            "tsp": 5,
-            "ounce": 28,
-            "ounces": 28,
-            "oz": 28,
-            "pound": 454,
-            "pounds": 454,
-            "lb": 454,
-            "lbs": 454,
-            "gram": 1,
-            "grams": 1,
-            "g": 1,
-            "kilogram": 1000,
-            "kilograms": 1000,
-            "kg": 1000,
-            "slice": 25,
-            "slices": 25,
-            "piece": 100,
-            "pieces": 100,
-            "medium": 150,
-            "large": 200,
-            "small": 100,
+        # Food-specific unit conversions (cup of flour vs cup of milk)
+        self.unit_converter = unit_converter
+        
+        # Compiled, memoized ingredient parser
+        self.parser = ingredient_parser
+        
+        # Maximum number of foods sent to Gemini in one batch prompt
+        self.batch_size = int(os.getenv("NUTRITION_BATCH_SIZE", "10"))
+        
+        # Maximum number of concurrent Gemini lookups per request
+        self.max_concurrency = int(os.getenv("NUTRITION_MAX_CONCURRENCY", "4"))
+        
+        # Coalesces identical in-flight Gemini lookups
+        self.inflight = SingleFlight()
+        
+        # Offline category estimates, precomputed per category
+        self.classifier = food_classifier
+        self.estimate_vectors = {
+            category: NutrientVector.from_dict(self.classifier.get_estimate(category))
+            for category in self.classifier.categories
         }
+        self.default_estimate = NutrientVector.from_dict(self.classifier.get_estimate(None))
+        
+        # Negative caching of failed Gemini lookups with exponential backoff
+        self.failure_ttl = int(os.getenv("NUTRITION_FAILURE_TTL_SECONDS", "60"))
+        self.failure_max_ttl = int(os.getenv("NUTRITION_FAILURE_MAX_TTL_SECONDS", "3600"))
+        self.lookup_failures = 0
+        self.backoff_skips = 0
+        self.failure_counts: Counter = Counter()
+        
+        # Meal totals memoized by ingredient multiset
+        self.meal_memo = meal_memo
+        
+        # Per-goal nutrient masks applied at read time
+        self.goal_masks: Dict[str, np.ndarray] = {}
+        
+        # Meal plan harvesting statistics
+        self.harvested_count = 0
+        self.harvest_rejected_count = 0
+        
+        # Local nutrient table consulted before Gemini
+        self.nutrient_db = nutrient_db
+        
+        # Canonical ingredient keys, seeded with the nutrient table's foods
+        self.ingredient_index = ingredient_index
+        if not len(self.ingredient_index):
+            self.ingredient_index.add_many(self.nutrient_db.names if len(self.nutrient_db) else [])
     
     async def analyze_meal(self, ingredients: List[str], serving_size: int = 1) -> Optional[NutritionInfo]:
         """Analyze nutrition for a complete meal"""
+        total_nutrition = await self.analyze_meal_vector(ingredients, serving_size)
+        return total_nutrition.to_nutrition() if total_nutrition is not None else None
+    
+    async def analyze_meal_vector(self, ingredients: List[str], serving_size: int = 1) -> Optional[NutrientVector]:
+        """Analyze nutrition for a complete meal as a NutrientVector.
+
+        Totals are memoized by the meal's canonical ingredient multiset and
+        serving size; meals that needed an estimate are not memoized.
+        """
         try:
-            total_nutrition = NutritionInfo(
-                calories=0, protein=0, carbs=0, fat=0,
-                fiber=0, sugar=0, sodium=0,
-                cholesterol=0, saturated_fat=0
+            parsed, normalized_names = self._prepare_ingredients(ingredients)
+            memo_key = self.meal_memo.key(
+                zip(normalized_names, (quantity_grams for _, quantity_grams in parsed)), serving_size
             )
+            total_nutrition = self.meal_memo.get(memo_key)
+            if total_nutrition is not None:
+                return total_nutrition
+            
+            # Resolve every ingredient at once so cache misses share one Gemini call
+            base_vectors, quantities, estimated = await self._get_base_vectors(parsed, normalized_names)
+            
+            # One weighted reduction over the per-100g rows, adjusted for serving size
+            weights = [quantity_grams / 100.0 * serving_size for quantity_grams in quantities]
+            total_nutrition = NutrientVector.aggregate(base_vectors, weights)
             
-            for ingredient in ingredients:
-                ingredient_nutrition = await self.get_ingredient_nutrition(ingredient)
-                if ingredient_nutrition:
-                    # Add all nutritional values
-                    total_nutrition.calories += ingredient_nutrition.calories
-                    total_nutrition.protein += ingredient_nutrition.protein
-                    total_nutrition.carbs += ingredient_nutrition.carbs
-                    total_nutrition.fat += ingredient_nutrition.fat
-                    total_nutrition.fiber += ingredient_nutrition.fiber
-                    total_nutrition.sugar += ingredient_nutrition.sugar
-                    total_nutrition.sodium += ingredient_nutrition.sodium
-                    total_nutrition.cholesterol += ingredient_nutrition.cholesterol
-                    total_nutrition.saturated_fat += ingredient_nutrition.saturated_fat
-            
-            # Adjust for serving size
-            if serving_size != 1:
-                total_nutrition.calories *= serving_size
-                total_nutrition.protein *= serving_size
-                total_nutrition.carbs *= serving_size
-                total_nutrition.fat *= serving_size
-                total_nutrition.fiber *= serving_size
-                total_nutrition.sugar *= serving_size
-                total_nutrition.sodium *= serving_size
-                total_nutrition.cholesterol *= serving_size
-                total_nutrition.saturated_fat *= serving_size
-            
-            logger.info(f"Meal nutrition analysis complete: {total_nutrition.calories:.1f} kcal, "
-                       f"{total_nutrition.protein:.1f}g protein, {total_nutrition.carbs:.1f}g carbs, "
-                       f"{total_nutrition.fat:.1f}g fat")
+            if not estimated:
+                self.meal_memo.set(memo_key, total_nutrition, normalized_names)
+            
+            logger.info(f"Meal nutrition analysis complete: {total_nutrition['calories']:.1f} kcal, "
+                       f"{total_nutrition['protein']:.1f}g protein, {total_nutrition['carbs']:.1f}g carbs, "
+                       f"{total_nutrition['fat']:.1f}g fat")
             
             return total_nutrition
             
@@ -117,19 +173,111 @@ class NutritionService:
             logger.error(f"Error analyzing meal nutrition: {e}")
             return None
     
-    def _normalize_ingredient_name(self, ingredient: str) -> str:
-        """Normalize ingredient name for better cache hits"""
-        # Remove quantities and units
-        cleaned = re.sub(r'\d+\.?\d*\s*(cup|cups|tablespoon|tablespoons|tbsp|teaspoon|teaspoons|tsp|ounce|ounces|oz|pound|pounds|lb|lbs|gram|grams|g|kilogram|kilograms|kg|slice|slices|piece|pieces|medium|large|small)', '', ingredient.lower())
+    def get_stats(self) -> Dict[str, Any]:
+        """Get lookup statistics for monitoring"""
+        return {
+            "singleflight": self.inflight.get_stats(),
+            "nutrient_db": self.nutrient_db.get_stats(),
+            "canonicalization": self.ingredient_index.get_stats(),
+            "unit_conversion": self.unit_converter.get_stats(),
+            "meal_memo": self.meal_memo.get_stats(),
+            "failures": {
+                "lookup_failures": self.lookup_failures,
+                "backoff_skips": self.backoff_skips,
+                "top_failing": dict(self.failure_counts.most_common(10)),
+            },
+            "harvest": {
+                "harvested": self.harvested_count,
+                "rejected": self.harvest_rejected_count,
+            },
+        }
+    
+    async def harvest_ingredient_nutrition(self, ingredients: List[Dict[str, Any]]) -> int:
+        """Cache per-100g nutrition from the ``{"name", "amount", "nutrition"}`` entries of a meal plan"""
+        harvested = 0
+        for ingredient in ingredients:
+            try:
+                if not isinstance(ingredient, dict) or not isinstance(ingredient.get("nutrition"), dict):
+                    continue
+                
+                parsed = self.parser.parse(f"{ingredient.get('amount', '')} {ingredient.get('name', '')}")
+                if parsed.quantity is None or parsed.confidence < 0.5:
+                    continue
+                
+                quantity_grams = self._get_quantity_grams(parsed)
+                # Tiny amounts (a pinch, a teaspoon) magnify rounding errors too much
+                if quantity_grams < 5:
+                    continue
+                
+                normalized_name = self._get_canonical_name(parsed.food_name)
+                if not normalized_name or self._get_builtin_nutrition(normalized_name) is not None:
+                    continue
+                
+                if await self._get_cached_vector(normalized_name) is not None:
+                    continue
+                
+                base_nutrition = self._to_base_nutrition(ingredient["nutrition"], quantity_grams)
+                if base_nutrition is None:
+                    self.harvest_rejected_count += 1
+                    logger.debug(f"Rejected harvested nutrition for '{normalized_name}': {ingredient['nutrition']}")
+                    continue
+                
+                # Without sodium, cholesterol or saturated fat the entry stays incomplete,
+                # so a full lookup still replaces it
+                complete = all(ingredient["nutrition"].get(nutrient) is not None for nutrient in HARVEST_EXTRA_BOUNDS)
+                await self._cache_nutrition(normalized_name, base_nutrition, complete=complete)
+                harvested += 1
+                
+            except Exception as e:
+                logger.error(f"Error harvesting nutrition from ingredient {ingredient}: {e}")
         
-        # Remove common modifiers
-        cleaned = re.sub(r'\b(fresh|dried|cooked|raw|grilled|baked|steamed|boiled|chopped|diced|sliced|minced|about|optional|to taste)\b', '', cleaned)
+        self.harvested_count += harvested
+        if harvested:
+            logger.info(f"Harvested nutrition for {harvested} ingredients from a generated meal plan")
+        return harvested
+    
+    def _to_base_nutrition(self, nutrition: Dict[str, Any], quantity_grams: float) -> Optional[NutritionInfo]:
+        """Scale harvested nutrition to 100g, returning None if the values are implausible"""
+        scale_factor = 100.0 / quantity_grams
+        values = {}
+        for nutrient, (low, high) in HARVEST_BOUNDS.items():
+            value = float(nutrition.get(nutrient) or 0) * scale_factor
+            if not low <= value <= high:
+                return None
+            values[nutrient] = value
+        for nutrient, (low, high) in HARVEST_EXTRA_BOUNDS.items():
+            if nutrition.get(nutrient) is None:
+                continue
+            value = float(nutrition[nutrient]) * scale_factor
+            if not low <= value <= high:
+                return None
+            values[nutrient] = value
         
-        # Remove special characters and extra spaces
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = ' '.join(cleaned.split())
+        # Macros can't weigh more than the food itself
+        if values["protein"] + values["carbs"] + values["fat"] > 105:
+            return None
+        
+        # Calories should roughly match the macros (4/4/9 kcal per gram)
+        macro_calories = 4 * values["protein"] + 4 * values["carbs"] + 9 * values["fat"]
+        if max(values["calories"], macro_calories) > 20 and \
+                abs(values["calories"] - macro_calories) > 0.35 * max(values["calories"], macro_calories):
+            return None
+        
+        if values["sugar"] > values["carbs"] + 1 or values["fiber"] > values["carbs"] + 1:
+            return None
+        if values.get("saturated_fat", 0) > values["fat"] + 1:
+            return None
         
-        return cleaned.strip()
+        return NutritionInfo(**values)
+    
+    def _get_canonical_name(self, food_name: str) -> str:
+        """Normalize an ingredient name and map spelling variants onto one canonical cache key"""
+        return self.ingredient_index.canonicalize(self._normalize_ingredient_name(food_name))
+    
+    def _normalize_ingredient_name(self, ingredient: str) -> str:
+        """Normalize ingredient name for better cache hits"""
+        # Quantities, units, modifiers and punctuation are dropped by the parser
+        return self.parser.parse(ingredient).food_name
 
     async def get_ingredient_nutrition(self, ingredient: str, fitness_goal: str = None) -> Optional[NutritionInfo]:
         """Get nutrition data for a single ingredient using Gemini AI"""
@@ -138,44 +286,26 @@ class NutritionService:
             food_name, quantity_grams = self._parse_ingredient(ingredient)
             
             # Normalize the ingredient name for caching
-            normalized_name = self._normalize_ingredient_name(food_name)
+            normalized_name = self._get_canonical_name(food_name)
             
             # Check cache first with normalized name
-            cache_key = f"nutrition_{normalized_name}"
-            cached_data = await self.cache.get(cache_key)
-            
-            base_nutrition = None
-            if cached_data:
-                base_nutrition = NutritionInfo.parse_obj(cached_data)
-            else:
-                # These ingredients don't need Gemini API calls
-                if normalized_name in ['salt', 'pepper', 'water', 'ice']:
-                    base_nutrition = NutritionInfo()  # Zero nutrition
-                elif any(word in normalized_name for word in ['seasoning', 'spice', 'herb', 'herbs']):
-                    base_nutrition = NutritionInfo(calories=5, protein=0.1, carbs=1, fat=0.1)
-                else:
-                    # Get nutrition from Gemini AI for 100g portion
-                    logger.info(f"Analyzing nutrition for '{normalized_name}' using Gemini AI")
-                    base_nutrition = await self._get_nutrition_from_gemini(normalized_name, 100.0, fitness_goal)
-                    
+            base_vector = await self._get_cached_vector(normalized_name)
+            if base_vector is None:
+                # Some ingredients don't need Gemini API calls
+                base_vector = self._get_builtin_vector(normalized_name)
+                if base_vector is None and not await self._in_failure_backoff(normalized_name):
+                    # Concurrent lookups for the same ingredient share one Gemini call
+                    base_nutrition = await self.inflight.do(
+                        f"nutrition_{normalized_name}",
+                        lambda: self._fetch_ingredient_nutrition(normalized_name)
+                    )
                     if base_nutrition:
-                        # Cache the 100g base values
-                        await self.cache.set(cache_key, base_nutrition.dict(), expire=7*24*60*60)  # Cache for 7 days
+                        base_vector = NutrientVector.from_nutrition(base_nutrition)
             
-            if base_nutrition:
-                # Scale nutrition based on actual quantity
-                scale_factor = quantity_grams / 100.0
-                return NutritionInfo(
-                    calories=base_nutrition.calories * scale_factor,
-                    protein=base_nutrition.protein * scale_factor,
-                    carbs=base_nutrition.carbs * scale_factor,
-                    fat=base_nutrition.fat * scale_factor,
-                    fiber=base_nutrition.fiber * scale_factor,
-                    sugar=base_nutrition.sugar * scale_factor,
-                    sodium=base_nutrition.sodium * scale_factor,
-                    cholesterol=base_nutrition.cholesterol * scale_factor,
-                    saturated_fat=base_nutrition.saturated_fat * scale_factor
-                )
+            if base_vector is not None:
+                # Scale nutrition based on actual quantity and keep the goal's nutrients
+                scaled = base_vector * (quantity_grams / 100.0)
+                return self._project_for_goal(scaled, fitness_goal).to_nutrition()
             
             # Fallback to estimated nutrition
             logger.warning(f"Using estimated nutrition for '{food_name}'")
@@ -186,6 +316,311 @@ class NutritionService:
             food_name, quantity_grams = self._parse_ingredient(ingredient)
             return self._get_estimated_nutrition(food_name, quantity_grams)
     
+    async def _fetch_ingredient_nutrition(self, normalized_name: str) -> Optional[NutritionInfo]:
+        """Fetch per-100g nutrition for one ingredient from Gemini and cache it"""
+        # Get nutrition from Gemini AI for 100g portion
+        logger.info(f"Analyzing nutrition for '{normalized_name}' using Gemini AI")
+        base_nutrition = await self._get_nutrition_from_gemini(normalized_name, 100.0)
+        
+        if base_nutrition:
+            # Cache the 100g base values
+            await self._cache_nutrition(normalized_name, base_nutrition)
+        elif self.gemini_model:
+            await self._record_lookup_failure(normalized_name)
+        
+        return base_nutrition
+    
+    async def _get_cached_vector(self, normalized_name: str) -> Optional[NutrientVector]:
+        """Get the cached per-100g nutrient vector of an ingredient.
+
+        Entries written before every nutrient was fetched may hold only one
+        goal's nutrients, so anything not marked complete is a cache miss.
+        """
+        cached_data = await self.cache.get(f"nutrition_{normalized_name}")
+        if not cached_data or not cached_data.get("complete"):
+            return None
+        return NutrientVector.from_dict(cached_data)
+    
+    async def _cache_nutrition(self, normalized_name: str, base_nutrition: NutritionInfo, complete: bool = True):
+        """Cache the per-100g nutrition of an ingredient for 7 days"""
+        await self.cache.set(f"nutrition_{normalized_name}", {**base_nutrition.dict(), "complete": complete},
+                             expire=7*24*60*60)
+        if not complete:
+            # Incomplete entries are never served, so nothing built on the old value changes
+            return
+        # Later spellings of this food now merge into it
+        self.ingredient_index.add(normalized_name)
+        # Memoized meals built from the previous value are stale now
+        self.meal_memo.invalidate(normalized_name)
+        # A successful lookup ends any failure streak
+        await self.cache.delete(f"nutrition_failure:{normalized_name}")
+    
+    def _project_for_goal(self, nutrition: NutrientVector, fitness_goal: str = None) -> NutrientVector:
+        """Keep only the nutrients relevant to a fitness goal; without a goal everything is kept"""
+        if not fitness_goal:
+            return nutrition
+        
+        mask = self.goal_masks.get(fitness_goal.lower())
+        if mask is None:
+            required_nutrients = self._get_required_nutrients(fitness_goal)
+            mask = np.array([field in required_nutrients for field in NUTRIENT_FIELDS], dtype=np.float64)
+            self.goal_masks[fitness_goal.lower()] = mask
+        return NutrientVector(nutrition.values * mask)
+    
+    async def get_ingredients_nutrition(self, ingredients: List[str], fitness_goal: str = None) -> List[NutritionInfo]:
+        """Get nutrition data for several ingredients, sending all cache misses to Gemini in one batch.
+
+        Results are returned in the same order as ``ingredients``; anything
+        Gemini cannot resolve falls back to estimated nutrition.
+        """
+        base_vectors, quantities = await self.get_ingredients_base_vectors(ingredients, fitness_goal)
+        scaled = NutrientVector.scale_each(base_vectors, [quantity_grams / 100.0 for quantity_grams in quantities])
+        return [NutritionInfo(**dict(zip(NUTRIENT_FIELDS, row))) for row in scaled.tolist()]
+    
+    async def iter_ingredients_nutrition(self, ingredients: Union[Iterable[str], AsyncIterable[str]],
+                                         fitness_goal: str = None) -> AsyncIterator[Tuple[int, NutritionInfo]]:
+        """Resolve a stream of ingredients, yielding ``(index, nutrition)`` in completion order"""
+        # Ingredients are read lazily in chunks of batch_size, with at most
+        # max_concurrency chunks in flight, so memory stays bounded
+        pending = set()
+        
+        async def resolve(start: int, chunk: List[str]) -> Tuple[int, List[NutritionInfo]]:
+            return start, await self.get_ingredients_nutrition(chunk, fitness_goal)
+        
+        def finished(tasks) -> Iterator[Tuple[int, NutritionInfo]]:
+            for task in tasks:
+                start, infos = task.result()
+                for offset, info in enumerate(infos):
+                    yield start + offset, info
+        
+        if not hasattr(ingredients, "__aiter__"):
+            ingredients = _aiter_sync(ingredients)
+        
+        try:
+            index = 0
+            chunk: List[str] = []
+            async for ingredient in ingredients:
+                chunk.append(ingredient)
+                if len(chunk) < self.batch_size:
+                    continue
+                
+                pending.add(asyncio.ensure_future(resolve(index, chunk)))
+                index += len(chunk)
+                chunk = []
+                
+                # Hand back whatever is ready, waiting only when too many chunks are in flight
+                done = {task for task in pending if task.done()}
+                if len(pending) - len(done) >= self.max_concurrency:
+                    more_done, _ = await asyncio.wait(pending - done, return_when=asyncio.FIRST_COMPLETED)
+                    done |= more_done
+                pending -= done
+                for result in finished(done):
+                    yield result
+            
+            if chunk:
+                pending.add(asyncio.ensure_future(resolve(index, chunk)))
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for result in finished(done):
+                    yield result
+        finally:
+            # The consumer went away (e.g. client disconnect); stop outstanding lookups
+            for task in pending:
+                task.cancel()
+    
+    async def get_ingredients_base_vectors(self, ingredients: List[str],
+                                           fitness_goal: str = None) -> Tuple[List[NutrientVector], List[float]]:
+        """Get the per-100g nutrient vector and the quantity in grams of each ingredient.
+
+        Results are in the same order as ``ingredients``; anything Gemini
+        cannot resolve falls back to the estimate for its food category.
+        Lookups always resolve every nutrient; with a ``fitness_goal`` the
+        vectors are projected onto that goal's nutrients afterwards.
+        """
+        parsed, normalized_names = self._prepare_ingredients(ingredients)
+        base_vectors, quantities, _ = await self._get_base_vectors(parsed, normalized_names, fitness_goal)
+        return base_vectors, quantities
+    
+    def _prepare_ingredients(self, ingredients: List[str]) -> Tuple[List[Tuple[str, float]], List[str]]:
+        """Parse ingredients into (food name, grams) pairs and their canonical names"""
+        parsed = [self._parse_ingredient(ingredient) for ingredient in ingredients]
+        normalized_names = [self._get_canonical_name(food_name) for food_name, _ in parsed]
+        return parsed, normalized_names
+    
+    async def _get_base_vectors(self, parsed: List[Tuple[str, float]], normalized_names: List[str],
+                                fitness_goal: str = None) -> Tuple[List[NutrientVector], List[float], int]:
+        """Resolve per-100g vectors for prepared ingredients, also returning how many were estimated"""
+        base_by_name: Dict[str, NutrientVector] = {}
+        missing_names = []
+        
+        # Check the cache once per distinct ingredient
+        for normalized_name in dict.fromkeys(normalized_names):
+            cached_vector = await self._get_cached_vector(normalized_name)
+            if cached_vector is not None:
+                base_by_name[normalized_name] = cached_vector
+                continue
+            
+            builtin_vector = self._get_builtin_vector(normalized_name)
+            if builtin_vector is not None:
+                base_by_name[normalized_name] = builtin_vector
+            else:
+                missing_names.append(normalized_name)
+        
+        if missing_names and self.gemini_model:
+            # Foods that recently failed keep their estimate until the backoff expires
+            missing_names = [name for name in missing_names if not await self._in_failure_backoff(name)]
+        
+        if missing_names and self.gemini_model:
+            resolved = await self._resolve_missing_nutrition(missing_names)
+            for normalized_name, base_nutrition in resolved.items():
+                base_by_name[normalized_name] = NutrientVector.from_nutrition(base_nutrition)
+        
+        # Anything still unresolved falls back to its category estimate
+        unresolved = [food_name for (food_name, _), normalized_name in zip(parsed, normalized_names)
+                      if normalized_name not in base_by_name]
+        if unresolved:
+            logger.warning(f"Using estimated nutrition for {unresolved}")
+        estimates = iter(self._get_estimated_vectors(unresolved))
+        
+        base_vectors = []
+        quantities = []
+        for (food_name, quantity_grams), normalized_name in zip(parsed, normalized_names):
+            base_vector = base_by_name.get(normalized_name)
+            if base_vector is None:
+                base_vector = next(estimates)
+            base_vectors.append(self._project_for_goal(base_vector, fitness_goal))
+            quantities.append(quantity_grams)
+        
+        return base_vectors, quantities, len(unresolved)
+    
+    async def _resolve_missing_nutrition(self, missing_names: List[str]) -> Dict[str, NutritionInfo]:
+        """Resolve uncached ingredients, joining lookups other requests already have in flight"""
+        leader_names = []
+        futures = {}
+        for normalized_name in missing_names:
+            future, leader = self.inflight.join(f"nutrition_{normalized_name}")
+            futures[normalized_name] = future
+            if leader:
+                leader_names.append(normalized_name)
+        
+        async def fetch() -> Dict[str, Optional[NutritionInfo]]:
+            fetched = await self._fetch_missing_nutrition(leader_names)
+            return {f"nutrition_{name}": nutrition for name, nutrition in fetched.items()}
+        
+        if leader_names:
+            # The fetch belongs to the flight, so cancelling this request
+            # does not cut off the other requests waiting on it
+            self.inflight.lead([f"nutrition_{name}" for name in leader_names], fetch)
+        
+        results = {}
+        for normalized_name, future in futures.items():
+            try:
+                base_nutrition = await self.inflight.wait(future)
+            except Exception as e:
+                logger.error(f"Shared nutrition lookup for '{normalized_name}' failed: {e}")
+                base_nutrition = None
+            if base_nutrition:
+                results[normalized_name] = base_nutrition
+        
+        return results
+    
+    async def _fetch_missing_nutrition(self, missing_names: List[str]) -> Dict[str, NutritionInfo]:
+        """Resolve uncached ingredients from Gemini, running batches concurrently.
+
+        Batches run at most ``max_concurrency`` at a time. If a batch response
+        leaves some foods out, those are looked up one by one (also bounded)
+        so a single odd name does not cost the rest of its batch.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch_single(normalized_name: str) -> Optional[NutritionInfo]:
+            async with semaphore:
+                return await self._get_nutrition_from_gemini(normalized_name, 100.0)
+        
+        async def fetch_batch(batch: List[str]) -> Dict[str, NutritionInfo]:
+            async with semaphore:
+                logger.info(f"Analyzing nutrition for {len(batch)} ingredients in one Gemini call")
+                fetched = await self._get_batch_nutrition_from_gemini(batch)
+            
+            # Only retry individually when the batch call itself worked
+            leftovers = [name for name in batch if name not in fetched] if fetched else []
+            if leftovers:
+                singles = await asyncio.gather(*[fetch_single(name) for name in leftovers])
+                for name, nutrition in zip(leftovers, singles):
+                    if nutrition:
+                        fetched[name] = nutrition
+            return fetched
+        
+        batches = [missing_names[start:start + self.batch_size]
+                   for start in range(0, len(missing_names), self.batch_size)]
+        batch_results = await asyncio.gather(*[fetch_batch(batch) for batch in batches], return_exceptions=True)
+        
+        results = {}
+        for batch, fetched in zip(batches, batch_results):
+            if isinstance(fetched, Exception):
+                logger.error(f"Error resolving nutrition batch {batch}: {fetched}")
+                continue
+            
+            # Fan the 100g base values back into the cache
+            for normalized_name, base_nutrition in fetched.items():
+                results[normalized_name] = base_nutrition
+                await self._cache_nutrition(normalized_name, base_nutrition)
+        
+        for normalized_name in missing_names:
+            if normalized_name not in results:
+                await self._record_lookup_failure(normalized_name)
+        
+        return results
+    
+    async def _in_failure_backoff(self, normalized_name: str) -> bool:
+        """Whether a recent Gemini failure for this food means it should not be retried yet"""
+        failure = await self.cache.get(f"nutrition_failure:{normalized_name}")
+        if failure and failure.get("retry_at", 0) > time.time():
+            self.backoff_skips += 1
+            return True
+        return False
+    
+    async def _record_lookup_failure(self, normalized_name: str):
+        """Negatively cache a failed lookup, doubling the retry delay on each consecutive failure"""
+        cache_key = f"nutrition_failure:{normalized_name}"
+        previous = await self.cache.get(cache_key)
+        failures = (previous or {}).get("failures", 0) + 1
+        delay = min(self.failure_ttl * 2 ** (failures - 1), self.failure_max_ttl)
+        
+        # Keep the entry past the retry time so the next failure still counts as consecutive
+        await self.cache.set(cache_key, {"failures": failures, "retry_at": time.time() + delay},
+                             expire=int(delay + self.failure_max_ttl))
+        
+        self.lookup_failures += 1
+        self.failure_counts[normalized_name] += 1
+        logger.warning(f"Nutrition lookup for '{normalized_name}' failed {failures} time(s) in a row, "
+                       f"retrying in {delay:.0f}s")
+    
+    def _get_builtin_nutrition(self, normalized_name: str) -> Optional[NutritionInfo]:
+        """Get per-100g nutrition for ingredients that don't need a Gemini lookup"""
+        builtin_vector = self._get_builtin_vector(normalized_name)
+        return builtin_vector.to_nutrition() if builtin_vector is not None else None
+    
+    def _get_builtin_vector(self, normalized_name: str) -> Optional[NutrientVector]:
+        """Get the per-100g nutrient vector for ingredients that don't need a Gemini lookup"""
+        if normalized_name in ['salt', 'pepper', 'water', 'ice']:
+            return NutrientVector()  # Zero nutrition
+        
+        # Common foods come from the bundled nutrient table
+        local_row = self.nutrient_db.get_row(normalized_name)
+        if local_row is not None:
+            return NutrientVector(local_row)
+        
+        # "basil pesto" or "cinnamon roll" only mention a seasoning, so they still need a lookup
+        if self.classifier.is_only(normalized_name, "seasoning"):
+            return self.estimate_vectors["seasoning"]
+        return None
+    
+    def _scale_nutrition(self, base_nutrition: NutritionInfo, quantity_grams: float) -> NutritionInfo:
+        """Scale per-100g nutrition to the given quantity"""
+        return (NutrientVector.from_nutrition(base_nutrition) * (quantity_grams / 100.0)).to_nutrition()
+    
     def _init_gemini(self):
         """Initialize Gemini model for nutrition analysis"""
         if not GENAI_AVAILABLE:
@@ -272,58 +707,51 @@ class NutritionService:
         
         return goal_specific_nutrients.get(fitness_goal.lower(), base_nutrients)
 
-    async def _get_nutrition_from_gemini(self, food_name: str, quantity_grams: float, fitness_goal: str = None) -> Optional[NutritionInfo]:
-        """Get nutrition data using Gemini AI"""
+    async def _get_nutrition_from_gemini(self, food_name: str, quantity_grams: float) -> Optional[NutritionInfo]:
+        """Get nutrition data using Gemini AI.
+
+        Every nutrient is requested regardless of fitness goal so the cached
+        entry serves all goals; goal projection happens at read time.
+        """
         try:
-            # Get required nutrients based on fitness goal
-            required_nutrients = self._get_required_nutrients(fitness_goal)
-            nutrients_str = ", ".join(required_nutrients)
-            
             prompt = f"""
             Analyze the nutritional content of {quantity_grams}g of {food_name}.
             
-            Please provide accurate nutritional information for the following nutrients only: {nutrients_str}.
+            Please provide accurate nutritional information for all of the following nutrients.
             Return the data in this exact JSON format:
-            {{
-                "calories": <number>,
-                "protein": <number in grams>,
-                "carbs": <number in grams>,
-                "fat": <number in grams>
-            }}
+            {NUTRIENT_JSON_FORMAT}
             
-            Only include the requested nutrients. Provide realistic values based on standard nutritional databases.
+            Provide realistic values based on standard nutritional databases.
             """
             
-            # Generate content asynchronously
-            response = await asyncio.to_thread(
-                self.gemini_model.generate_content,
+            # Generate content without blocking the event loop
+            response = await llm_executor.generate_content(
+                self.gemini_model,
                 prompt,
                 generation_config=genai.types.GenerationConfig(
                     temperature=0.7,
                     top_p=0.8,
                     top_k=40,
                     max_output_tokens=8192,
-                )
+                ),
+                call_type="nutrition",
+                validate=lambda text: self._parse_json_response(text, "{") is not None,
             )
             
             if not response or not response.text:
                 logger.error(f"No response from Gemini for '{food_name}'")
                 return None
                 
-            # Extract JSON from response
-            json_str = self._extract_json_from_response(response.text)
-            if not json_str:
+            # Parse nutrition data
+            nutrition_data = self._parse_json_response(response.text, "{")
+            if nutrition_data is None:
                 logger.error(f"Could not extract JSON from Gemini response for '{food_name}'")
                 return None
-                
-            # Parse nutrition data
-            nutrition_data = json.loads(json_str)
             
             # Create NutritionInfo with default values
             nutrition_info = NutritionInfo()
             
-            # Update only the required nutrients
-            for nutrient in required_nutrients:
+            for nutrient in NUTRIENT_FIELDS:
                 if nutrient in nutrition_data:
                     setattr(nutrition_info, nutrient, float(nutrition_data[nutrient]))
             
@@ -333,114 +761,123 @@ class NutritionService:
             logger.error(f"Error getting nutrition from Gemini for '{food_name}': {e}")
             return None
     
-    def _extract_json_from_response(self, response_text: str) -> Optional[str]:
-        """Extract JSON from Gemini response"""
-        # Remove markdown code blocks if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        
-        response_text = response_text.strip()
-        
-        return response_text
-    
-    def _parse_ingredient(self, ingredient: str) -> tuple[str, float]:
-        """Parse ingredient string to extract food name and quantity"""
+    async def _get_batch_nutrition_from_gemini(self, food_names: List[str]) -> Dict[str, NutritionInfo]:
+        """Get per-100g nutrition for several foods with a single Gemini call"""
         try:
-            # Remove cooking methods and adjectives
-            cleaned = re.sub(r'\b(fresh|dried|cooked|raw|grilled|baked|steamed|boiled|chopped|diced|sliced|minced)\b', '', ingredient.lower())
+            foods_str = "\n".join(f"{i + 1}. {name}" for i, name in enumerate(food_names))
             
-            # Look for quantity patterns
-            quantity_pattern = r'(\d+\.?\d*)\s*(cup|cups|tablespoon|tablespoons|tbsp|teaspoon|teaspoons|tsp|ounce|ounces|oz|pound|pounds|lb|lbs|gram|grams|g|kilogram|kilograms|kg|slice|slices|piece|pieces|medium|large|small)'
+            prompt = f"""
+            Analyze the nutritional content of 100g of each of the following foods:
+            {foods_str}
             
-            match = re.search(quantity_pattern, cleaned)
-            if match:
-                quantity = float(match.group(1))
-                unit = match.group(2).lower()
-                food_name = re.sub(quantity_pattern, '', cleaned).strip()
-                
-                # Convert to grams
-                quantity_grams = quantity * self.portion_mappings.get(unit, 100)
-            else:
-                # Default quantity
-                food_name = cleaned.strip()
-                quantity_grams = 100  # Default to 100g
+            Please provide accurate nutritional information for all of the following nutrients.
+            Return ONLY a JSON array with one object per food, in the same order, where each object
+            has a "name" field with the food name exactly as given plus the fields of this format:
+            {NUTRIENT_JSON_FORMAT}
+            
+            Provide realistic values based on standard nutritional databases.
+            """
+            
+            response = await llm_executor.generate_content(
+                self.gemini_model,
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=0.7,
+                    top_p=0.8,
+                    top_k=40,
+                    max_output_tokens=8192,
+                ),
+                call_type="nutrition",
+                validate=lambda text: self._parse_json_response(text, "[") is not None,
+            )
+            
+            if not response or not response.text:
+                logger.error(f"No response from Gemini for batch of {len(food_names)} foods")
+                return {}
+            
+            # A truncated array still yields the foods that were completed
+            nutrition_list = self._parse_json_response(response.text, "[")
+            if nutrition_list is None:
+                logger.error("Could not extract a JSON array from Gemini batch response")
+                return {}
+            
+            # Match by the echoed name, canonicalized like the requested names
+            matched = {}
+            unmatched = []
+            for i, nutrition_data in enumerate(nutrition_list):
+                if not isinstance(nutrition_data, dict):
+                    continue
+                name = self._get_canonical_name(str(nutrition_data.get("name", "")))
+                if name in food_names and name not in matched:
+                    matched[name] = nutrition_data
+                else:
+                    unmatched.append((i, nutrition_data))
+            
+            # Position is only trusted when nothing was dropped; otherwise
+            # unmatched foods are left to the per-food retry
+            if len(nutrition_list) == len(food_names):
+                for i, nutrition_data in unmatched:
+                    if food_names[i] not in matched:
+                        matched[food_names[i]] = nutrition_data
             
-            # Clean up food name
-            food_name = re.sub(r'\s+', ' ', food_name).strip()
-            food_name = re.sub(r'[^\w\s]', '', food_name)
+            results = {}
+            for name, nutrition_data in matched.items():
+                nutrition_info = NutritionInfo()
+                for nutrient in NUTRIENT_FIELDS:
+                    if nutrient in nutrition_data:
+                        setattr(nutrition_info, nutrient, float(nutrition_data[nutrient]))
+                results[name] = nutrition_info
             
-            return food_name, quantity_grams
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error getting batch nutrition from Gemini for {len(food_names)} foods: {e}")
+            return {}
+    
+    def _parse_json_response(self, response_text: str, expect: str) -> Optional[Any]:
+        """Parse the JSON object ("{") or array ("[") in a Gemini response, or None.
+
+        A truncated array keeps its completed entries and drops the
+        unfinished one; a truncated object is rejected rather than cached
+        with missing nutrients.
+        """
+        try:
+            return parse_json(response_text, expect=expect, repair=expect == "[", keep_partial=False)
+        except ValueError:
+            return None
+    
+    def _parse_ingredient(self, ingredient: str) -> tuple[str, float]:
+        """Parse ingredient string to extract food name and quantity"""
+        try:
+            parsed = self.parser.parse(ingredient)
+            if parsed.confidence < 0.5:
+                logger.debug(f"Low-confidence parse for '{ingredient}': {parsed}")
+            return parsed.food_name, self._get_quantity_grams(parsed)
             
         except Exception as e:
             logger.error(f"Error parsing ingredient '{ingredient}': {e}")
             return ingredient.lower(), 100
     
+    def _get_quantity_grams(self, parsed: ParsedIngredient) -> float:
+        """Convert a parsed quantity and unit to grams using the food's density and piece weight"""
+        if parsed.quantity is None:
+            return 100  # Default to 100g
+        
+        food_name = self._get_canonical_name(parsed.food_name) if parsed.food_name else ""
+        
+        if parsed.package_quantity is not None:
+            # "1 (14 oz) can" weighs one package size per container
+            package_grams = self.unit_converter.to_grams(parsed.package_quantity, parsed.package_unit, food_name)
+            return parsed.quantity * package_grams
+        
+        # A bare count like "2 apples" is treated as pieces
+        return self.unit_converter.to_grams(parsed.quantity, parsed.unit, food_name)
+    
     def _get_estimated_nutrition(self, food_name: str, quantity_grams: float) -> NutritionInfo:
         """Get estimated nutrition when Gemini is not available"""
-        food_name_lower = food_name.lower()
-        
-        # Protein sources
-        if any(word in food_name_lower for word in ['chicken', 'beef', 'pork', 'fish', 'salmon', 'tuna', 'egg', 'tofu']):
-            calories_per_100g = 150
-            protein_per_100g = 20
-            carbs_per_100g = 0
-            fat_per_100g = 8
-        
-        # Grains and starches
-        elif any(word in food_name_lower for word in ['rice', 'pasta', 'bread', 'oats', 'quinoa', 'potato']):
-            calories_per_100g = 120
-            protein_per_100g = 4
-            carbs_per_100g = 25
-            fat_per_100g = 1
-        
-        # Vegetables
-        elif any(word in food_name_lower for word in ['broccoli', 'spinach', 'carrot', 'tomato', 'pepper', 'onion', 'lettuce']):
-            calories_per_100g = 25
-            protein_per_100g = 2
-            carbs_per_100g = 5
-            fat_per_100g = 0
-        
-        # Fruits
-        elif any(word in food_name_lower for word in ['apple', 'banana', 'orange', 'berry', 'grape', 'pear']):
-            calories_per_100g = 50
-            protein_per_100g = 1
-            carbs_per_100g = 12
-            fat_per_100g = 0
-        
-        # Dairy
-        elif any(word in food_name_lower for word in ['milk', 'cheese', 'yogurt', 'butter']):
-            calories_per_100g = 100
-            protein_per_100g = 8
-            carbs_per_100g = 5
-            fat_per_100g = 6
-        
-        # Oils and fats
-        elif any(word in food_name_lower for word in ['oil', 'butter', 'avocado', 'nuts', 'seeds']):
-            calories_per_100g = 500
-            protein_per_100g = 5
-            carbs_per_100g = 5
-            fat_per_100g = 50
-        
-        # Default
-        else:
-            calories_per_100g = 100
-            protein_per_100g = 3
-            carbs_per_100g = 15
-            fat_per_100g = 3
-        
-        # Calculate for actual quantity
-        multiplier = quantity_grams / 100
-        
-        return NutritionInfo(
-            calories=calories_per_100g * multiplier,
-            protein=protein_per_100g * multiplier,
-            carbs=carbs_per_100g * multiplier,
-            fat=fat_per_100g * multiplier,
-            fiber=2 * multiplier,  # Basic estimate
-            sugar=5 * multiplier,  # Basic estimate
-            sodium=100 * multiplier,  # Basic estimate in mg
-            cholesterol=0,
-            saturated_fat=fat_per_100g * 0.3 * multiplier  # Estimate 30% of fat as saturated
-        )
\ No newline at end of file
+        return (self._get_estimated_vectors([food_name])[0] * (quantity_grams / 100.0)).to_nutrition()
+    
+    def _get_estimated_vectors(self, food_names: List[str]) -> List[NutrientVector]:
+        """Get per-100g category estimates for several foods, classified in one pass"""
+        return [self.estimate_vectors.get(category, self.default_estimate)
+                for category in self.classifier.classify_many(food_names)]
\ No newline at end of file
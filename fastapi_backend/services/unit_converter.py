@@ -0,0 +1,151 @@
+import csv
+import logging
+import os
+from typing import Dict, Optional
+
+from services.food_classifier import food_classifier
+from services.ingredient_index import ingredient_index
+
+logger = logging.getLogger(__name__)
+
+# Units with a fixed mass in grams, whatever the food
+MASS_UNITS = {"gram": 1, "kilogram": 1000, "ounce": 28.35, "pound": 453.6}
+
+# Volume units in milliliters, converted to grams with the food's density
+VOLUME_UNITS = {"milliliter": 1, "liter": 1000, "cup": 240, "tablespoon": 15, "teaspoon": 5}
+
+# Loose measures and containers without a stated size, in grams
+FIXED_UNITS = {
+    "pinch": 0.5, "dash": 0.5, "handful": 30, "scoop": 30,
+    "can": 400, "jar": 400, "package": 400, "bag": 400, "box": 400, "container": 400,
+    "bottle": 500, "carton": 1000,
+}
+
+# Size words relative to the food's piece weight
+SIZE_FACTORS = {"small": 0.7, "medium": 1.0, "large": 1.3}
+
+# Per-food fields of the unit table: density in g/ml and piece, slice and clove weights in grams
+UNIT_FIELDS = ["density", "piece", "slice", "clove"]
+
+# Fallbacks per food category when a food has no row of its own
+CATEGORY_UNITS = {
+    "protein": {"density": 1.0, "piece": 120, "slice": 28, "clove": 5},
+    "dairy": {"density": 1.03, "piece": 30, "slice": 21, "clove": 5},
+    "grain": {"density": 0.6, "piece": 60, "slice": 30, "clove": 5},
+    "fat": {"density": 0.92, "piece": 15, "slice": 10, "clove": 5},
+    "fruit": {"density": 0.6, "piece": 120, "slice": 15, "clove": 5},
+    "vegetable": {"density": 0.4, "piece": 100, "slice": 15, "clove": 5},
+    "seasoning": {"density": 0.5, "piece": 2, "slice": 2, "clove": 2},
+}
+
+# Used when neither the food nor its category is known
+DEFAULT_UNITS = {"density": 1.0, "piece": 100, "slice": 25, "clove": 5}
+
+DEFAULT_FOOD_UNITS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "food_units.csv")
+
+class UnitConverter:
+    """Converts ingredient quantities to grams using per-food weights.
+
+    Each food in the bundled table (and each category default) is expanded
+    once into a ``unit -> grams per unit`` map, so "1 cup flour" and "1 cup
+    milk" weigh 127g and 247g instead of a flat 240g. Foods are keyed by
+    their ingredient signature, so plurals and word order resolve to the
+    same row; unknown foods use their category's defaults.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memo_size: int = 10000):
+        self.path = path or os.getenv("FOOD_UNITS_PATH", DEFAULT_FOOD_UNITS_PATH)
+        self.max_memo_size = max_memo_size
+        self.food_grams: Dict[str, Dict[str, float]] = {}
+        self.category_grams = {category: self._expand(units) for category, units in CATEGORY_UNITS.items()}
+        self.default_grams = self._expand(DEFAULT_UNITS)
+        self.memo: Dict[str, Dict[str, float]] = {}
+        self._loaded = False
+
+        # Lookup statistics
+        self.food_hits = 0
+        self.category_hits = 0
+        self.default_hits = 0
+
+    @staticmethod
+    def _expand(units: Dict[str, float]) -> Dict[str, float]:
+        """Precompute grams per unit for every supported unit"""
+        grams = dict(FIXED_UNITS)
+        grams.update(MASS_UNITS)
+        for unit, milliliters in VOLUME_UNITS.items():
+            grams[unit] = milliliters * units["density"]
+        for size, factor in SIZE_FACTORS.items():
+            grams[size] = units["piece"] * factor
+        grams["piece"] = units["piece"]
+        grams["slice"] = units["slice"]
+        grams["clove"] = units["clove"]
+        return grams
+
+    def load(self):
+        """Load the per-food unit table from disk"""
+        food_grams = {}
+        try:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    name = row["name"].strip().lower()
+                    if not name:
+                        continue
+                    # Unset fields come from the food's category
+                    units = dict(CATEGORY_UNITS.get(food_classifier.classify(name), DEFAULT_UNITS))
+                    for field in UNIT_FIELDS:
+                        if row.get(field):
+                            units[field] = float(row[field])
+                    food_grams.setdefault(ingredient_index.signature(name), self._expand(units))
+        except FileNotFoundError:
+            logger.warning(f"Food unit table not found at '{self.path}', using category defaults")
+        except Exception as e:
+            logger.error(f"Error loading food unit table from '{self.path}': {e}")
+            food_grams = {}
+
+        self.food_grams = food_grams
+        self.memo.clear()
+        self._loaded = True
+        logger.info(f"Loaded unit conversions for {len(self.food_grams)} foods")
+
+    def grams_per_unit(self, food_name: str) -> Dict[str, float]:
+        """Get the ``unit -> grams`` map for a normalized food name"""
+        grams = self.memo.get(food_name)
+        if grams is not None:
+            return grams
+
+        if not self._loaded:
+            self.load()
+
+        grams = self.food_grams.get(ingredient_index.signature(food_name))
+        if grams is not None:
+            self.food_hits += 1
+        else:
+            category = food_classifier.classify(food_name)
+            grams = self.category_grams.get(category)
+            if grams is not None:
+                self.category_hits += 1
+            else:
+                self.default_hits += 1
+                grams = self.default_grams
+
+        if len(self.memo) >= self.max_memo_size:
+            self.memo.clear()
+        self.memo[food_name] = grams
+        return grams
+
+    def to_grams(self, quantity: float, unit: Optional[str], food_name: str) -> float:
+        """Convert a quantity of a food to grams; a missing unit counts pieces"""
+        grams = self.grams_per_unit(food_name)
+        return quantity * grams.get(unit or "piece", grams["piece"])
+
+    def get_stats(self) -> dict:
+        """Get lookup statistics"""
+        return {
+            "foods": len(self.food_grams),
+            "food_hits": self.food_hits,
+            "category_hits": self.category_hits,
+            "default_hits": self.default_hits,
+        }
+
+# Shared converter, loaded lazily on first conversion
+unit_converter = UnitConverter()
@@ -0,0 +1,64 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from utils.cache import CacheManager, SQLiteCache
+
+@pytest.fixture
+def cache_env(tmp_path):
+    with patch.dict('os.environ', {'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3"),
+                                   'PERSISTENT_CACHE_PREFIXES': 'nutrition_'}):
+        yield
+
+class TestPersistentCache:
+
+    @pytest.mark.asyncio
+    async def test_nutrition_keys_survive_a_new_process(self, cache_env):
+        """A fresh CacheManager (another worker or a restart) sees persisted nutrition keys"""
+        first = CacheManager()
+        await first.set("nutrition_rice", {"calories": 130}, expire=60)
+        await first.set("meal_plan_x", {"plan": 1}, expire=60)
+
+        second = CacheManager()
+        assert await second.get("nutrition_rice") == {"calories": 130}
+        assert await second.get("meal_plan_x") is None
+
+        # The value is now served from the in-process L1
+        assert "nutrition_rice" in second.memory_cache
+
+    @pytest.mark.asyncio
+    async def test_expired_and_deleted_keys(self, cache_env):
+        """Expired or deleted entries are not returned from disk"""
+        first = CacheManager()
+        await first.set("nutrition_old", {"calories": 1}, expire=-1)
+        await first.set("nutrition_gone", {"calories": 2}, expire=60)
+        await first.delete("nutrition_gone")
+
+        second = CacheManager()
+        assert await second.get("nutrition_old") is None
+        assert await second.get("nutrition_gone") is None
+
+    @pytest.mark.asyncio
+    async def test_slow_disk_reads_do_not_block_the_event_loop(self, cache_env):
+        """A read waiting on a locked database leaves other requests running"""
+        cache = CacheManager()
+        original_get = SQLiteCache.get
+
+        def slow_get(store, key):
+            time.sleep(0.2)
+            return original_get(store, key)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        with patch.object(SQLiteCache, "get", slow_get):
+            assert await cache.get("nutrition_missing") is None
+        task.cancel()
+
+        assert ticks >= 5
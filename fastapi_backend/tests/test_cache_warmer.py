@@ -0,0 +1,43 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models.mealplan import NutritionInfo
+from services.cache_warmer import CacheWarmer
+from services.nutrition_service import NutritionService
+
+class TestCacheWarmer:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': '',
+                                       'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3"),
+                                       'NUTRITION_WARMUP_FROM_MEAL_PLANS': 'false'}):
+            self.service = NutritionService()
+            seed_path = tmp_path / "seeds.txt"
+            seed_path.write_text("# comment\njackfruit\nteff\nchicken breast\nkohlrabi\nTeff\n")
+            self.warmer = CacheWarmer(self.service, seed_path=str(seed_path), concurrency=1)
+        self.service.gemini_model = MagicMock()
+
+    @pytest.mark.asyncio
+    async def test_warms_uncached_seeds_in_background(self):
+        """Seeds are deduplicated, local foods skipped and the rest resolved"""
+        async def fake_batch(names):
+            return {name: NutritionInfo(calories=100) for name in names if name != "kohlrabi"}
+
+        with patch.object(self.service, '_get_batch_nutrition_from_gemini', side_effect=fake_batch), \
+             patch.object(self.service, '_get_nutrition_from_gemini', new=AsyncMock(return_value=None)):
+            task = self.warmer.start()
+            assert self.warmer.get_status()["ready"] is False
+            await task
+
+        status = self.warmer.get_status()
+        assert status["state"] == "done"
+        assert (status["total"], status["warmed"], status["skipped"], status["failed"]) == (4, 2, 1, 1)
+        assert status["progress"] == 1.0
+        assert await self.service._get_cached_vector("jackfruit") is not None
+
+    def test_disabled_without_gemini(self):
+        self.service.gemini_model = None
+        assert self.warmer.start() is None
+        assert self.warmer.get_status()["state"] == "disabled"
+        assert self.warmer.get_status()["ready"] is True
@@ -0,0 +1,82 @@
+import json
+import pytest
+
+from utils.json_stream import JSONStreamParser, parse_json
+
+DAILY_RESPONSE = json.dumps({
+    "day": "Today",
+    "breakfast": {"name": "Oats", "ingredients": [{"name": "oats", "amount": "1 cup"}]},
+    "lunch": {"name": 'Salad {with} "quotes"', "ingredients": []},
+    "daily_totals": {"calories": 1800, "protein": 120},
+})
+
+def feed_in_chunks(parser, text, size):
+    members = []
+    for start in range(0, len(text), size):
+        members.extend(parser.feed(text[start:start + size]))
+    return members
+
+class TestJSONStreamParser:
+
+    @pytest.mark.parametrize("size", [1, 7, 1000])
+    def test_members_complete_across_chunks(self, size):
+        """Root members are returned once, whatever the chunk boundaries"""
+        parser = JSONStreamParser()
+        members = feed_in_chunks(parser, "```json\n" + DAILY_RESPONSE + "\n```", size)
+
+        assert [key for key, _ in members] == ["day", "breakfast", "lunch", "daily_totals"]
+        assert parser.close() == json.loads(DAILY_RESPONSE)
+
+    def test_object_member_emitted_when_it_closes(self):
+        """A meal is available before the text after it arrives"""
+        parser = JSONStreamParser()
+        assert parser.feed('{"breakfast": {"name": "Oats"') == []
+        assert parser.feed('}') == [("breakfast", {"name": "Oats"})]
+        assert parser.feed(', "lunch": ') == []
+
+    def test_array_root(self):
+        parser = JSONStreamParser()
+        members = parser.feed('Here you go: [{"a": 1}, 2, "x"] hope that helps')
+        assert members == [(0, {"a": 1}), (1, 2), (2, "x")]
+        assert parser.close() == [{"a": 1}, 2, "x"]
+
+    def test_close_before_root_ends(self):
+        parser = JSONStreamParser()
+        parser.feed('{"breakfast": {"name": "Oats"}')
+        with pytest.raises(ValueError):
+            parser.close(repair=False)
+
+    def test_expected_root_skips_brackets_in_prose(self):
+        text = 'Sure [as requested], here is the plan:\n```json\n{"day": "Today"}\n```\nEnjoy {your} meals!'
+        assert parse_json(text, expect="{") == {"day": "Today"}
+
+    @pytest.mark.parametrize("size", [1, 1000])
+    def test_braces_in_leading_prose_are_skipped(self, size):
+        """An opener whose first member is not JSON is prose, not the root"""
+        parser = JSONStreamParser(expect="{")
+        members = feed_in_chunks(parser, 'Note {this}, and {a, b}: {"a": 1, "b": [2]}', size)
+        assert members == [("a", 1), ("b", [2])]
+        assert parser.close() == {"a": 1, "b": [2]}
+        assert parse_json('Note {this}: {"a":1}', expect="{") == {"a": 1}
+
+    def test_trailing_commas(self):
+        assert parse_json('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+    def test_truncated_object_is_repaired(self):
+        """A response cut off mid-value keeps everything that can be recovered"""
+        text = '{"breakfast": {"name": "Oats"}, "lunch": {"name": "Salad", "instructions": ["chop", "mi'
+        assert parse_json(text) == {
+            "breakfast": {"name": "Oats"},
+            "lunch": {"name": "Salad", "instructions": ["chop", "mi"]},
+        }
+        # Dangling keys are dropped
+        assert parse_json('{"a": 1, "b": {"c": 2, "d":') == {"a": 1, "b": {"c": 2}}
+
+    def test_truncated_array_drops_partial_item(self):
+        text = '[{"name": "oats", "calories": 389}, {"name": "teff", "calor'
+        assert parse_json(text, keep_partial=False) == [{"name": "oats", "calories": 389}]
+        assert parse_json(text) == [{"name": "oats", "calories": 389}, {"name": "teff"}]
+
+    def test_no_json(self):
+        with pytest.raises(ValueError):
+            parse_json("I cannot help with that.", expect="{")
@@ -0,0 +1,131 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+from utils.llm import LLMExecutor, LLMTimeoutError
+
+def slow_model(delay: float, text: str = "ok"):
+    model = MagicMock()
+
+    def generate_content(prompt, **kwargs):
+        time.sleep(delay)
+        return MagicMock(text=text)
+
+    model.generate_content.side_effect = generate_content
+    return model
+
+class TestLLMExecutor:
+
+    @pytest.mark.asyncio
+    async def test_calls_run_concurrently(self):
+        """Blocking SDK calls should overlap instead of serializing"""
+        executor = LLMExecutor(max_workers=4, default_timeout=5)
+        model = slow_model(0.2)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            executor.generate_content(model, f"prompt {i}") for i in range(4)
+        ])
+        elapsed = time.perf_counter() - start
+
+        assert [r.text for r in results] == ["ok"] * 4
+        assert elapsed < 0.6
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """The event loop keeps ticking while a Gemini call is running"""
+        executor = LLMExecutor(max_workers=1, default_timeout=5)
+        model = slow_model(0.3)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await executor.generate_content(model, "prompt")
+        task.cancel()
+
+        assert ticks > 5
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Calls exceeding the timeout raise LLMTimeoutError"""
+        executor = LLMExecutor(max_workers=1, default_timeout=5)
+        model = slow_model(0.5)
+
+        with pytest.raises(LLMTimeoutError):
+            await executor.generate_content(model, "prompt", timeout=0.05)
+
+        assert executor.get_stats()["timeouts"] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_response_cache(self):
+        """Identical prompts of a cached call type hit the cache; fresh calls bypass it"""
+        executor = LLMExecutor(max_workers=2, default_timeout=5)
+        executor.cache_ttls = {"nutrition": 60, "chat": 0}
+        model = slow_model(0, text='{"calories": 1}')
+
+        first = await executor.generate_content(model, "prompt", call_type="nutrition")
+        second = await executor.generate_content(model, "prompt", call_type="nutrition")
+        assert first.text == second.text == '{"calories": 1}'
+        assert model.generate_content.call_count == 1
+
+        # Different config, opt-out and uncached call types all reach the model
+        await executor.generate_content(model, "prompt", generation_config={"temperature": 0}, call_type="nutrition")
+        await executor.generate_content(model, "prompt", call_type="nutrition", use_cache=False)
+        await executor.generate_content(model, "prompt", call_type="chat")
+        await executor.generate_content(model, "prompt", call_type="chat")
+        assert model.generate_content.call_count == 5
+
+        stats = executor.get_stats()["cache"]["nutrition"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 3
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_invalid_responses_not_cached(self):
+        """Responses rejected by the validator are fetched again next time"""
+        executor = LLMExecutor(max_workers=2, default_timeout=5)
+        executor.cache_ttls = {"recipes": 60}
+        model = slow_model(0, text="not json")
+
+        for _ in range(2):
+            await executor.generate_content(model, "prompt", call_type="recipes", validate=lambda text: text.startswith("["))
+
+        assert model.generate_content.call_count == 2
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_identical_calls_share_one_request(self):
+        """Concurrent identical cached calls are coalesced into one model call"""
+        executor = LLMExecutor(max_workers=4, default_timeout=5)
+        executor.cache_ttls = {"nutrition": 60}
+        model = slow_model(0.1)
+
+        results = await asyncio.gather(*[
+            executor.generate_content(model, "prompt", call_type="nutrition") for _ in range(3)
+        ])
+
+        assert [r.text for r in results] == ["ok"] * 3
+        assert model.generate_content.call_count == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stream_content(self):
+        """Streamed chunks are yielded as the SDK iterator produces them"""
+        executor = LLMExecutor(max_workers=2, default_timeout=5)
+        model = MagicMock()
+        model.generate_content.return_value = iter([MagicMock(text="{\"a\":"), MagicMock(text=""), MagicMock(text=" 1}")])
+
+        chunks = [chunk async for chunk in executor.stream_content(model, "prompt")]
+
+        assert chunks == ["{\"a\":", " 1}"]
+        assert model.generate_content.call_args.kwargs["stream"] is True
+        executor.shutdown()
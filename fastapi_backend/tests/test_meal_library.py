@@ -0,0 +1,188 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models.mealplan import DayMealPlan, Meal, MealPlanRequest, NutritionInfo, UserProfile
+from services.meal_library import MealLibrary, request_constraints
+from services.mealplan_service import MealPlanService
+
+def make_meal(name, ingredients, calories, protein=30, carbs=60, fat=15, prep_time=15,
+              cuisine="international", difficulty="beginner"):
+    return Meal(
+        name=name,
+        description=f"{name} description",
+        ingredients=ingredients,
+        instructions=["cook"],
+        prep_time=prep_time,
+        nutrition=NutritionInfo(calories=calories, protein=protein, carbs=carbs, fat=fat),
+        cuisine_type=cuisine,
+        difficulty=difficulty,
+    )
+
+def make_request(**overrides):
+    profile = dict(age=30, weight=70, height=175, gender="male", activity_level="moderately_active",
+                   fitness_goal="maintenance")
+    profile.update(overrides.pop("profile", {}))
+    return MealPlanRequest(user_profile=UserProfile(**profile), **overrides)
+
+def constraints(diets=(), allergies=(), dislikes=()):
+    return {"dietary_preferences": list(diets), "allergies": list(allergies), "disliked_foods": list(dislikes)}
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction == -1)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __aiter__(self):
+        async def iterate():
+            for doc in self.docs:
+                yield doc
+        return iterate()
+
+class TestMealLibrary:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        self.library = MealLibrary(seed_path=str(tmp_path / "missing.json"))
+        # Calories sized for the default profile (about 2550 kcal a day)
+        self.library.add("breakfast", make_meal("Cheese Omelette", ["eggs", "cheddar cheese"], 640),
+                         constraints(diets=["vegetarian"]))
+        self.library.add("breakfast", make_meal("Tofu Scramble", ["firm tofu", "spinach"], 620),
+                         constraints(diets=["vegan", "vegetarian"], allergies=["peanuts", "eggs"]))
+        self.library.add("lunch", make_meal("Lentil Soup", ["red lentils", "carrots"], 880),
+                         constraints(diets=["vegan", "vegetarian"], allergies=["peanuts", "eggs"]))
+        self.library.add("lunch", make_meal("Chicken Rice Bowl", ["chicken breast", "brown rice"], 900))
+        self.library.add("dinner", make_meal("Chickpea Curry", ["chickpeas", "coconut milk"], 980),
+                         constraints(diets=["vegan", "vegetarian"], allergies=["peanuts", "eggs"],
+                                     dislikes=["mushrooms"]))
+        self.library.add("dinner", make_meal("Bean Chili", ["kidney beans", "tomatoes"], 1020, prep_time=45),
+                         constraints(diets=["vegan", "vegetarian"]))
+
+    def names(self, request, meal_type):
+        return {entry.meal.name for entry in self.library.find_meals(request, meal_type)}
+
+    def test_meals_need_the_request_constraints(self):
+        """A meal is served only to requests whose constraints it was generated under"""
+        assert self.names(make_request(profile={"dietary_preferences": ["vegan"]}), "breakfast") == {"Tofu Scramble"}
+        assert self.names(make_request(profile={"dietary_preferences": ["vegetarian"]}), "breakfast") == \
+            {"Cheese Omelette", "Tofu Scramble"}
+        assert self.names(make_request(profile={"allergies": ["Eggs"]}), "lunch") == {"Lentil Soup"}
+        assert self.names(make_request(profile={"allergies": ["shellfish"]}), "lunch") == set()
+        assert self.names(make_request(profile={"disliked_foods": ["mushroom"]}), "dinner") == {"Chickpea Curry"}
+        # Unconstrained requests can have any meal
+        assert self.names(make_request(), "lunch") == {"Lentil Soup", "Chicken Rice Bowl"}
+
+    def test_ingredient_names_are_not_trusted(self):
+        """A meal generated without a diet is never served to one, whatever its ingredients"""
+        self.library.add("dinner", make_meal("Pasta Carbonara", ["spaghetti", "pancetta", "eggs"], 1000))
+        request = make_request(profile={"dietary_preferences": ["vegetarian"]})
+        assert "Pasta Carbonara" not in self.names(request, "dinner")
+
+    def test_same_dish_under_other_constraints_is_stored_separately(self):
+        self.library.add("lunch", make_meal("Lentil Soup", ["red lentils", "carrots"], 880))
+        assert len(self.library.by_type["lunch"]) == 3
+        assert self.names(make_request(profile={"allergies": ["eggs"]}), "lunch") == {"Lentil Soup"}
+
+    def test_filters_prep_time_and_calorie_band(self):
+        request = make_request(profile={"dietary_preferences": ["vegan"]})
+        # Bean Chili takes longer than the default 30 minutes
+        assert self.names(request, "dinner") == {"Chickpea Curry"}
+
+        request = make_request(profile={"weight": 50, "height": 155, "gender": "female",
+                                        "activity_level": "sedentary"})
+        assert self.names(request, "lunch") == set()
+
+    def test_find_day_assembles_plan(self):
+        day = self.library.find_day(make_request(profile={"dietary_preferences": ["vegan"], "allergies": ["peanut"]}))
+
+        assert day.breakfast.name == "Tofu Scramble"
+        assert day.lunch.name == "Lentil Soup"
+        assert day.dinner.name == "Chickpea Curry"
+        assert self.library.hits == 1
+
+    def test_find_day_returns_none_when_a_meal_is_missing(self):
+        assert self.library.find_day(make_request(profile={"allergies": ["soy"]})) is None
+        assert self.library.misses == 1
+
+    def test_unknown_meal_focus_is_left_to_gemini(self):
+        assert self.library.find_day(make_request(meal_focus="anti-inflammatory")) is None
+
+    @pytest.mark.asyncio
+    async def test_add_day_stores_request_constraints(self):
+        request = make_request(profile={"dietary_preferences": ["keto"], "allergies": ["dairy"]})
+        await self.library.add_day(DayMealPlan(lunch=make_meal("Miso Glazed Cod", ["cod", "miso"], 900)), request)
+
+        assert self.names(request, "lunch") == {"Miso Glazed Cod"}
+        assert request_constraints(request)["allergies"] == {"dairy"}
+
+    @pytest.mark.asyncio
+    async def test_load_keeps_the_newest_meals(self):
+        now = datetime.utcnow()
+        docs = [
+            {"meal_type": "lunch", "meal": make_meal(f"{name} Soup", ["water"], 800).dict(),
+             "constraints": constraints(), "updated_at": now - timedelta(days=age)}
+            for age, name in enumerate(["Tomato", "Onion", "Pea", "Corn"])
+        ]
+        library = MealLibrary(seed_path="missing.json", max_size=2)
+        fake_db = MagicMock()
+        fake_db.database.meal_library.find.return_value = FakeCursor(docs)
+        with patch('services.meal_library.db', fake_db):
+            await library.load()
+
+        assert {entry.meal.name for entry in library.meals.values()} == {"Tomato Soup", "Onion Soup"}
+        # The oldest loaded meal is evicted first
+        library.add("lunch", make_meal("Leek Soup", ["water"], 800))
+        assert {entry.meal.name for entry in library.meals.values()} == {"Tomato Soup", "Leek Soup"}
+
+    def test_search(self):
+        results = self.library.search("vegan curry dinner", top_k=1)
+        assert [meal.name for meal in results] == ["Chickpea Curry"]
+
+class TestMealPlanServiceLibrary:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': '',
+                                       'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3")}):
+            self.service = MealPlanService()
+        self.service.model = MagicMock()
+
+    def test_seed_meals_loaded(self):
+        assert len(self.service.meal_examples) > 0
+        assert self.service._get_similar_examples("vegan dinner", top_k=2)
+
+    @pytest.mark.asyncio
+    async def test_generate_meal_plan_uses_library(self):
+        self.service._call_gemini_daily_api = AsyncMock()
+        plan = await self.service.generate_meal_plan(make_request())
+
+        self.service._call_gemini_daily_api.assert_not_called()
+        assert plan.meals.breakfast and plan.meals.lunch and plan.meals.dinner
+        assert plan.meals.total_calories == sum(
+            meal.nutrition.calories for meal in (plan.meals.breakfast, plan.meals.lunch, plan.meals.dinner)
+        )
+
+    @pytest.mark.asyncio
+    async def test_library_serves_plans_without_gemini(self):
+        self.service.model = None
+        plan = await self.service.generate_meal_plan(make_request())
+        assert plan.meals.dinner is not None
+
+        with pytest.raises(Exception, match="not available"):
+            await self.service.generate_meal_plan(make_request(profile={"allergies": ["sesame"]}))
+
+    @pytest.mark.asyncio
+    async def test_regenerate_skips_library(self):
+        self.service.meal_library.find_day = MagicMock()
+        self.service._call_gemini_daily_api = AsyncMock(side_effect=ValueError("no response"))
+
+        with pytest.raises(Exception):
+            await self.service.generate_meal_plan(make_request(regenerate=True))
+        self.service.meal_library.find_day.assert_not_called()
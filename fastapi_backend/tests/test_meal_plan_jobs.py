@@ -0,0 +1,214 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from models.mealplan import MealPlanJobStatus, MealPlanRequest, UserProfile
+from services.meal_plan_jobs import MealPlanJobQueue, QueueFullError
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __aiter__(self):
+        async def iterate():
+            for doc in self.docs:
+                yield doc
+        return iterate()
+
+class FakeCollection:
+    """Just enough of a Motor collection for the job queue"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def _matches(self, doc, query):
+        for field, value in query.items():
+            if field == "$or":
+                if not any(self._matches(doc, clause) for clause in value):
+                    return False
+            elif isinstance(value, dict) and "$in" in value:
+                if doc.get(field) not in value["$in"]:
+                    return False
+            elif isinstance(value, dict) and "$lt" in value:
+                if field not in doc or not doc[field] < value["$lt"]:
+                    return False
+            elif isinstance(value, dict) and "$exists" in value:
+                if (field in doc) != value["$exists"]:
+                    return False
+            elif doc.get(field) != value:
+                return False
+        return True
+
+    async def insert_one(self, doc):
+        self.docs[doc["_id"]] = dict(doc)
+
+    async def delete_one(self, query):
+        doc = await self.find_one(query)
+        if doc:
+            del self.docs[doc["_id"]]
+
+    async def find_one_and_update(self, query, update):
+        doc = await self.find_one(query)
+        if doc:
+            self.docs[doc["_id"]].update(update["$set"])
+        return doc
+
+    async def update_many(self, query, update):
+        for doc in self.docs.values():
+            if self._matches(doc, query):
+                doc.update(update["$set"])
+
+    async def find_one(self, query):
+        for doc in self.docs.values():
+            if self._matches(doc, query):
+                return dict(doc)
+        return None
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(doc) for doc in self.docs.values() if self._matches(doc, query)])
+
+    async def update_one(self, query, update):
+        doc = await self.find_one(query)
+        if doc:
+            self.docs[doc["_id"]].update(update["$set"])
+
+def make_request():
+    return MealPlanRequest(user_profile=UserProfile(age=30, weight=70, height=175))
+
+class TestMealPlanJobQueue:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.collection = FakeCollection()
+        with patch('services.meal_plan_jobs.get_collection', new=AsyncMock(return_value=self.collection)):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_enqueue_returns_before_generation(self):
+        """Jobs are accepted immediately and completed by the workers"""
+        release = asyncio.Event()
+
+        async def handler(request, user_id):
+            await release.wait()
+            return "plan-1"
+
+        queue = MealPlanJobQueue(handler, workers=2)
+        await queue.start()
+        job = await queue.enqueue(make_request(), "user-1")
+        assert job.status == MealPlanJobStatus.queued
+
+        await asyncio.sleep(0.01)
+        assert (await queue.get_job(job.id)).status == MealPlanJobStatus.running
+
+        release.set()
+        await queue.join()
+        finished = await queue.get_job(job.id, "user-1")
+        assert finished.status == MealPlanJobStatus.completed
+        assert finished.plan_id == "plan-1"
+        assert finished.finished_at is not None
+        # Other users cannot see the job
+        assert await queue.get_job(job.id, "user-2") is None
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_jobs_record_the_error(self):
+        """Handler errors mark the job failed instead of killing the worker"""
+        handler = AsyncMock(side_effect=[Exception("Gemini API error"), "plan-2"])
+        queue = MealPlanJobQueue(handler, workers=1)
+        await queue.start()
+
+        failed = await queue.enqueue(make_request(), "user-1")
+        completed = await queue.enqueue(make_request(), "user-1")
+        await queue.join()
+
+        assert (await queue.get_job(failed.id)).status == MealPlanJobStatus.failed
+        assert (await queue.get_job(failed.id)).error == "Gemini API error"
+        assert (await queue.get_job(completed.id)).status == MealPlanJobStatus.completed
+        assert queue.get_stats()["failed"] == 1
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_unfinished_jobs_are_recovered(self):
+        """Jobs persisted by a previous process run on the next start"""
+        request = make_request()
+        await self.collection.insert_one({"_id": "old-job", "user_id": "user-1", "status": "running",
+                                          "request": request.dict()})
+        handler = AsyncMock(return_value="plan-3")
+        queue = MealPlanJobQueue(handler, workers=1)
+        await queue.start()
+        await queue.join()
+
+        assert (await queue.get_job("old-job")).status == MealPlanJobStatus.completed
+        handler.assert_awaited_once()
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_jobs(self):
+        queue = MealPlanJobQueue(AsyncMock(return_value="plan"), workers=1, max_pending=1)
+        await queue.start()
+        # Without running workers nothing drains the queue
+        await queue.stop()
+
+        await queue.enqueue(make_request())
+        with pytest.raises(QueueFullError):
+            await queue.enqueue(make_request())
+
+    @pytest.mark.asyncio
+    async def test_queue_filling_during_insert_drops_the_job(self):
+        """A job that loses the last slot while being stored is removed, not orphaned"""
+        queue = MealPlanJobQueue(AsyncMock(return_value="plan"), workers=1, max_pending=1)
+        await queue.start()
+        await queue.stop()
+
+        insert_one = self.collection.insert_one
+
+        async def slow_insert(doc):
+            await asyncio.sleep(0)
+            await insert_one(doc)
+
+        self.collection.insert_one = slow_insert
+        results = await asyncio.gather(queue.enqueue(make_request()), queue.enqueue(make_request()),
+                                       return_exceptions=True)
+
+        assert sum(isinstance(result, QueueFullError) for result in results) == 1
+        assert len(self.collection.docs) == 1
+
+    @pytest.mark.asyncio
+    async def test_job_seen_by_two_processes_runs_once(self):
+        """Both queues recover the job, only one claims it"""
+        await self.collection.insert_one({"_id": "shared-job", "user_id": "user-1", "status": "queued",
+                                          "request": make_request().dict()})
+        handler = AsyncMock(return_value="plan-4")
+        first = MealPlanJobQueue(handler, workers=1)
+        second = MealPlanJobQueue(handler, workers=1)
+        await asyncio.gather(first.start(), second.start())
+        await asyncio.gather(first.join(), second.join())
+
+        handler.assert_awaited_once()
+        assert (await first.get_job("shared-job")).status == MealPlanJobStatus.completed
+        await asyncio.gather(first.stop(), second.stop())
+
+    @pytest.mark.asyncio
+    async def test_only_stale_running_jobs_are_recovered(self):
+        """A running job with a fresh heartbeat belongs to a live process"""
+        now = datetime.utcnow()
+        for job_id, heartbeat_at in [("live-job", now), ("dead-job", now - timedelta(minutes=10))]:
+            await self.collection.insert_one({"_id": job_id, "status": "running", "heartbeat_at": heartbeat_at,
+                                              "request": make_request().dict()})
+        handler = AsyncMock(return_value="plan-5")
+        queue = MealPlanJobQueue(handler, workers=1, stale_after=300)
+        await queue.start()
+        await queue.join()
+
+        assert (await queue.get_job("dead-job")).status == MealPlanJobStatus.completed
+        assert (await queue.get_job("live-job")).status == MealPlanJobStatus.running
+        handler.assert_awaited_once()
+        await queue.stop()
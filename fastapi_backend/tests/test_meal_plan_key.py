@@ -0,0 +1,49 @@
+from models.mealplan import MealPlanRequest, UserProfile
+from services.meal_plan_key import MealPlanKeyBuilder
+
+def make_request(**overrides):
+    profile = dict(
+        age=30, weight=70.0, height=175.0, gender="male", activity_level="moderately_active",
+        fitness_goal="maintenance", dietary_preferences=["vegetarian", "gluten_free"],
+        allergies=["peanuts"], disliked_foods=[], preferred_cuisines=["italian", "mexican"],
+    )
+    request = {}
+    for field, value in overrides.items():
+        if field in profile:
+            profile[field] = value
+        else:
+            request[field] = value
+    return MealPlanRequest(user_profile=UserProfile(**profile), **request)
+
+class TestMealPlanKeyBuilder:
+
+    def setup_method(self):
+        self.builder = MealPlanKeyBuilder(age_band=5, weight_band=5, height_band=5)
+
+    def test_equivalent_requests_share_a_key(self):
+        """List order, case and values within one band do not change the key"""
+        key = self.builder.key(make_request())
+        assert key.startswith("meal_plan_")
+        assert len(key) < 40
+        assert self.builder.key(make_request(
+            weight=72.4, age=32, height=177.0,
+            dietary_preferences=["Gluten_Free", "vegetarian"],
+            preferred_cuisines=["mexican", "italian", "Italian"],
+        )) == key
+        # Unset fields match their prompt defaults
+        assert self.builder.key(make_request(meal_focus=None, max_prep_time=None)) == key
+
+    def test_prompt_fields_change_the_key(self):
+        """Requests built for different constraints never share a key"""
+        key = self.builder.key(make_request())
+        variants = [
+            make_request(weight=76.0),
+            make_request(allergies=["peanuts", "shellfish"]),
+            make_request(meal_focus="protein-heavy"),
+            make_request(max_prep_time=15),
+            make_request(cooking_skill="beginner"),
+            make_request(fitness_goal="weight_loss"),
+        ]
+        keys = {self.builder.key(request) for request in variants}
+        assert key not in keys
+        assert len(keys) == len(variants)
@@ -0,0 +1,73 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models.mealplan import MealPlanRequest, UserProfile
+from services.mealplan_service import MealPlanService
+from tests.test_meal_plan_stream import DAILY_RESPONSE, make_meal
+
+# Cut off inside the dinner's ingredients
+TRUNCATED_RESPONSE = DAILY_RESPONSE[:DAILY_RESPONSE.index('"Salmon Bowl"') + 120]
+
+class TestMealPlanResponseParsing:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': '',
+                                       'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3")}):
+            self.service = MealPlanService()
+        self.service.model = MagicMock()
+        self.service.meal_library.find_day = MagicMock(return_value=None)
+        self.request = MealPlanRequest(user_profile=UserProfile(age=30, weight=70, height=175))
+
+    def test_truncated_meal_is_rejected(self):
+        with pytest.raises(ValueError, match="dinner"):
+            self.service._parse_gemini_daily_response(TRUNCATED_RESPONSE)
+
+    def test_truncated_daily_totals_are_dropped(self):
+        """Complete meals are kept when only the totals were cut off"""
+        response = DAILY_RESPONSE[:DAILY_RESPONSE.index('"daily_totals"') + 30]
+        daily_data = self.service._parse_gemini_daily_response(response)
+        assert daily_data["dinner"]["name"] == "Salmon Bowl"
+        assert "daily_totals" not in daily_data
+
+    def test_meal_missing_fields_is_rejected(self):
+        meal = make_meal("Oatmeal")
+        del meal["portion_size"]
+        with pytest.raises(ValueError, match="portion_size"):
+            self.service._parse_gemini_meal_response(json.dumps(meal), "breakfast")
+
+    @pytest.mark.asyncio
+    async def test_truncated_response_is_not_cached(self):
+        """Each retry calls Gemini again instead of replaying the truncated text"""
+        self.service.model.generate_content.return_value = MagicMock(text=TRUNCATED_RESPONSE)
+
+        for _ in range(3):
+            with pytest.raises(Exception, match="Missing"):
+                await self.service.generate_meal_plan(self.request)
+        assert self.service.model.generate_content.call_count == 3
+
+        self.service.model.generate_content.return_value = MagicMock(text=DAILY_RESPONSE)
+        with patch.object(self.service.nutrition_service, 'harvest_ingredient_nutrition',
+                          new=AsyncMock(return_value=0)):
+            plan = await self.service.generate_meal_plan(self.request)
+        assert plan.meals.dinner.name == "Salmon Bowl"
+        assert self.service.model.generate_content.call_count == 4
+
+    @pytest.mark.asyncio
+    async def test_weekly_regenerates_truncated_day(self):
+        responses = {}
+
+        async def fake_daily(request, day):
+            responses[day] = responses.get(day, 0) + 1
+            if day == "Friday" and responses[day] == 1:
+                return TRUNCATED_RESPONSE
+            return DAILY_RESPONSE
+
+        with patch.object(self.service, '_call_gemini_daily_api', side_effect=fake_daily), \
+             patch.object(self.service.nutrition_service, 'harvest_ingredient_nutrition',
+                          new=AsyncMock(return_value=0)):
+            plan = await self.service.generate_weekly_meal_plan(self.request)
+
+        assert responses["Friday"] == 2
+        assert plan.days[4].meals.dinner.name == "Salmon Bowl"
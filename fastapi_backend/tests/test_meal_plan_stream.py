@@ -0,0 +1,82 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+from models.mealplan import MealPlanRequest, UserProfile
+from services.mealplan_service import MealPlanService
+
+def make_meal(name):
+    return {
+        "name": name,
+        "description": f"{name} description",
+        "ingredients": [{"name": "oats", "amount": "50g",
+                         "nutrition": {"calories": 190, "protein": 7, "carbs": 33, "fat": 3, "fiber": 5, "sugar": 1}}],
+        "instructions": ["cook"],
+        "prep_time": 10,
+        "cuisine_type": "international",
+        "difficulty": "beginner",
+        "portion_size": "1 serving",
+        "total_nutrition": {"calories": 500, "protein": 30, "carbs": 60, "fat": 15, "fiber": 8, "sugar": 10},
+    }
+
+DAILY_RESPONSE = "```json\n" + json.dumps({
+    "day": "Today",
+    "breakfast": make_meal("Oatmeal"),
+    "lunch": make_meal("Chicken Salad"),
+    "dinner": make_meal("Salmon Bowl"),
+    "daily_totals": {"calories": 1500, "protein": 90, "carbs": 180, "fat": 45, "fiber": 24, "sugar": 30},
+}) + "\n```"
+
+class TestMealPlanStreaming:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': '',
+                                       'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3")}):
+            self.service = MealPlanService()
+        self.service.model = MagicMock()
+        self.request = MealPlanRequest(user_profile=UserProfile(age=30, weight=70, height=175))
+
+    @pytest.mark.asyncio
+    async def test_meals_stream_before_the_response_ends(self):
+        """Each meal is emitted while later chunks are still pending"""
+        received = []
+
+        async def fake_stream(model, prompt, generation_config=None, timeout=None):
+            for start in range(0, len(DAILY_RESPONSE), 64):
+                received.append(start)
+                yield DAILY_RESPONSE[start:start + 64]
+
+        events = []
+        with patch('services.mealplan_service.llm_executor.stream_content', new=fake_stream):
+            async for event, payload in self.service.stream_meal_plan(self.request):
+                events.append((event, payload, len(received)))
+
+        assert [event for event, _, _ in events] == ["meal", "meal", "meal", "daily_totals", "plan"]
+        assert events[0][1]["meal_type"] == "breakfast"
+        assert events[0][1]["meal"].name == "Oatmeal"
+        # Breakfast arrived well before the last chunk was read
+        assert events[0][2] < len(received) // 2
+        assert events[3][1]["calories"] == 1500
+
+        plan = events[-1][1]
+        assert plan.meals.dinner.name == "Salmon Bowl"
+        assert plan.meals.total_calories == 1500
+
+        # The finished plan is cached and replayed without Gemini
+        with patch('services.mealplan_service.llm_executor.stream_content') as stream_content:
+            replayed = [event async for event, _ in self.service.stream_meal_plan(self.request)]
+        stream_content.assert_not_called()
+        assert replayed == ["meal", "meal", "meal", "daily_totals", "plan"]
+
+    @pytest.mark.asyncio
+    async def test_truncated_response_fails(self):
+        async def fake_stream(model, prompt, generation_config=None, timeout=None):
+            yield DAILY_RESPONSE[:len(DAILY_RESPONSE) // 2]
+
+        events = []
+        with patch('services.mealplan_service.llm_executor.stream_content', new=fake_stream):
+            with pytest.raises(ValueError):
+                async for event, _ in self.service.stream_meal_plan(self.request):
+                    events.append(event)
+        assert events == ["meal"]
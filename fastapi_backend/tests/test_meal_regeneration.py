@@ -0,0 +1,45 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models.mealplan import MealPlanRequest, UserProfile
+from services.mealplan_service import MealPlanService
+from tests.test_meal_plan_stream import make_meal
+
+class TestMealRegeneration:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': '',
+                                       'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3")}):
+            self.service = MealPlanService()
+        self.service.model = MagicMock()
+        self.request = MealPlanRequest(user_profile=UserProfile(age=30, weight=70, height=175))
+
+    @pytest.mark.asyncio
+    async def test_only_the_slot_changes(self):
+        """The other meals are sent as constraints and totals are recomputed locally"""
+        day = self.service._assemble_daily_plan(
+            {meal_type: await self.service._build_meal(make_meal(name), harvest=False)
+             for meal_type, name in [("breakfast", "Oatmeal"), ("lunch", "Chicken Salad"), ("dinner", "Salmon Bowl")]},
+            {"calories": 1500, "protein": 90, "carbs": 180, "fat": 45},
+        ).meals
+
+        new_lunch = make_meal("Lentil Soup")
+        new_lunch["total_nutrition"]["calories"] = 650
+        response = MagicMock(text="```json\n" + json.dumps({"lunch": new_lunch}) + "\n```")
+
+        with patch('services.mealplan_service.llm_executor.generate_content',
+                   new=AsyncMock(return_value=response)) as generate:
+            updated = await self.service.regenerate_meal(self.request, day, "lunch")
+
+        prompt = generate.await_args.args[1]
+        assert "Oatmeal" in prompt and "Salmon Bowl" in prompt
+        assert "different dish than Chicken Salad" in prompt
+        assert generate.await_args.kwargs["generation_config"].max_output_tokens < 8192
+
+        assert updated.lunch.name == "Lentil Soup"
+        assert updated.breakfast == day.breakfast
+        assert updated.total_calories == pytest.approx(500 + 650 + 500)
+        # The original day is untouched
+        assert day.lunch.name == "Chicken Salad"
@@ -0,0 +1,503 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from services.nutrition_service import NutritionService
+from services.nutrient_vector import NutrientVector
+from services.food_classifier import FoodClassifier
+from services.unit_converter import UnitConverter
+from services.meal_memo import MealMemo
+from services.ingredient_index import IngredientIndex
+from services.ingredient_parser import IngredientParser
+from models.mealplan import NutritionInfo
+
+def gemini_response(payload):
+    return MagicMock(text=json.dumps(payload))
+
+class TestNutritionService:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': '',
+                                       'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3")}):
+            self.service = NutritionService()
+        self.service.gemini_model = MagicMock()
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_uses_one_gemini_call(self):
+        """All cache misses of a meal are resolved with a single prompt"""
+        payload = [
+            {"name": "jackfruit", "calories": 95, "protein": 1.7, "carbs": 23, "fat": 0.6},
+            {"name": "teff", "calories": 101, "protein": 3.9, "carbs": 20, "fat": 0.7},
+            {"name": "kohlrabi", "calories": 27, "protein": 1.7, "carbs": 6.2, "fat": 0.1},
+        ]
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock(return_value=gemini_response(payload))) as generate:
+            results = await self.service.get_ingredients_nutrition(
+                ["200g jackfruit", "100g teff", "50g kohlrabi", "salt"]
+            )
+
+        assert generate.await_count == 1
+        assert len(results) == 4
+        assert results[0].calories == pytest.approx(190)
+        assert results[1].carbs == pytest.approx(20)
+        assert results[2].protein == pytest.approx(0.85)
+        assert results[3].calories == 0
+
+        # Results are fanned back into the cache
+        cached = await self.service.cache.get("nutrition_teff")
+        assert cached["calories"] == 101
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_skips_cached_ingredients(self):
+        """Cached ingredients never reach Gemini"""
+        await self.service._cache_nutrition("teff", NutritionInfo(calories=101))
+
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock()) as generate:
+            results = await self.service.get_ingredients_nutrition(["100g teff"])
+
+        generate.assert_not_awaited()
+        assert results[0].calories == pytest.approx(101)
+
+    @pytest.mark.asyncio
+    async def test_one_cached_entry_serves_every_goal(self):
+        """The full nutrient vector is fetched once and projected per fitness goal"""
+        payload = [{"name": "teff", "calories": 101, "protein": 3.9, "carbs": 20, "fat": 0.7, "fiber": 2.8}]
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock(return_value=gemini_response(payload))) as generate:
+            weight_loss = await self.service.get_ingredients_nutrition(["100g teff"], fitness_goal="weight_loss")
+            muscle_gain = await self.service.get_ingredients_nutrition(["100g teff"], fitness_goal="muscle_gain")
+            everything = await self.service.get_ingredients_nutrition(["100g teff"])
+
+        assert generate.await_count == 1
+        assert "fiber" in generate.await_args.args[1]
+        assert (weight_loss[0].carbs, weight_loss[0].fat) == (0, pytest.approx(0.7))
+        assert (muscle_gain[0].carbs, muscle_gain[0].fat) == (pytest.approx(20), 0)
+        assert everything[0].fiber == pytest.approx(2.8)
+
+    @pytest.mark.asyncio
+    async def test_partial_legacy_entries_are_refetched(self):
+        """Entries cached before full-vector lookups are treated as misses"""
+        await self.service.cache.set("nutrition_teff", NutritionInfo(calories=101, carbs=0).dict())
+        assert await self.service._get_cached_vector("teff") is None
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_falls_back_to_estimate(self):
+        """Unparseable batch responses fall back to estimated nutrition"""
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock(return_value=MagicMock(text="not json"))):
+            results = await self.service.get_ingredients_nutrition(["100g ostrich"])
+
+        assert results[0].calories == pytest.approx(100)
+
+    @pytest.mark.asyncio
+    async def test_truncated_batch_keeps_completed_foods(self):
+        """A batch response cut off mid-array still resolves the foods before the cut"""
+        text = ('Here is the data:\n```json\n[{"name": "teff", "calories": 101, "protein": 3.9, "carbs": 20, "fat": 0.7},\n'
+                '{"name": "kohlrabi", "calories": 27, "prot')
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock(return_value=MagicMock(text=text))):
+            results = await self.service._get_batch_nutrition_from_gemini(["teff", "kohlrabi"])
+
+        assert set(results) == {"teff"}
+        assert results["teff"].calories == pytest.approx(101)
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_echoed_names_not_positions(self):
+        """Reordered entries go to the food they name; a skipped food is left unmatched"""
+        payload = [
+            {"name": "Kohlrabi", "calories": 27, "protein": 1.7, "carbs": 6.2, "fat": 0.1},
+            {"name": "mystery root", "calories": 500, "protein": 1, "carbs": 1, "fat": 55},
+        ]
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock(return_value=gemini_response(payload))):
+            results = await self.service._get_batch_nutrition_from_gemini(["teff", "kohlrabi", "jackfruit"])
+
+        assert set(results) == {"kohlrabi"}
+        assert results["kohlrabi"].calories == pytest.approx(27)
+
+    @pytest.mark.asyncio
+    async def test_batch_falls_back_to_position_only_for_full_arrays(self):
+        payload = [
+            {"name": "ethiopian teff grain", "calories": 101, "protein": 3.9, "carbs": 20, "fat": 0.7},
+            {"name": "kohlrabi", "calories": 27, "protein": 1.7, "carbs": 6.2, "fat": 0.1},
+        ]
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock(return_value=gemini_response(payload))):
+            results = await self.service._get_batch_nutrition_from_gemini(["teff", "kohlrabi"])
+
+        assert results["teff"].calories == pytest.approx(101)
+        assert results["kohlrabi"].calories == pytest.approx(27)
+
+    @pytest.mark.asyncio
+    async def test_iter_ingredients_streams_every_item(self):
+        """Long inputs are resolved in concurrent chunks and every index is yielded once"""
+        self.service.batch_size = 3
+        self.service.gemini_model = None
+        foods = ["200g chicken breast", "100g ostrich", "1 cup milk", "2 eggs"] * 5
+
+        async def stream():
+            for food in foods:
+                yield food
+
+        results = [result async for result in self.service.iter_ingredients_nutrition(stream())]
+
+        assert sorted(index for index, _ in results) == list(range(len(foods)))
+        by_index = dict(results)
+        assert by_index[0] == by_index[4]
+        assert by_index[1].calories == pytest.approx(100)
+
+    @pytest.mark.asyncio
+    async def test_failed_lookups_back_off_exponentially(self):
+        """Failed foods are served the estimate without Gemini until their backoff expires"""
+        bad_response = AsyncMock(return_value=MagicMock(text="not json"))
+        with patch('services.nutrition_service.llm_executor.generate_content', new=bad_response):
+            await self.service.get_ingredients_nutrition(["100g ostrich"])
+            results = await self.service.get_ingredients_nutrition(["100g ostrich"])
+        assert bad_response.await_count == 1
+        assert results[0].calories == pytest.approx(100)
+
+        first = await self.service.cache.get("nutrition_failure:ostrich")
+        assert first["failures"] == 1
+
+        # Once the backoff has passed the next failure doubles the delay
+        with patch('services.nutrition_service.time.time', return_value=first["retry_at"] + 1), \
+             patch('services.nutrition_service.llm_executor.generate_content', new=bad_response):
+            await self.service.get_ingredients_nutrition(["100g ostrich"])
+            second = await self.service.cache.get("nutrition_failure:ostrich")
+        assert bad_response.await_count == 2
+        assert second["failures"] == 2
+        assert second["retry_at"] - (first["retry_at"] + 1) == pytest.approx(2 * self.service.failure_ttl)
+
+        stats = self.service.get_stats()["failures"]
+        assert stats["top_failing"] == {"ostrich": 2}
+        assert stats["backoff_skips"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batches_resolve_concurrently_in_order(self):
+        """Large requests are split into concurrent batches without reordering results"""
+        self.service.batch_size = 2
+        foods = ["amaranth", "sorghum", "millet", "spelt", "farro", "freekeh"]
+        in_flight = 0
+        peak = 0
+
+        async def fake_batch(names):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            # Leave the last food out to force an individual lookup
+            return {name: NutritionInfo(calories=float(foods.index(name))) for name in names if name != foods[-1]}
+
+        with patch.object(self.service, '_get_batch_nutrition_from_gemini', side_effect=fake_batch), \
+             patch.object(self.service, '_get_nutrition_from_gemini',
+                          new=AsyncMock(return_value=NutritionInfo(calories=5))) as single:
+            results = await self.service.get_ingredients_nutrition([f"100g {food}" for food in foods])
+
+        assert [r.calories for r in results] == [0, 1, 2, 3, 4, 5]
+        assert peak > 1
+        single.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_one_call(self):
+        """Identical concurrent lookups are coalesced into one Gemini request"""
+        async def slow_lookup(name, quantity):
+            await asyncio.sleep(0.01)
+            return NutritionInfo(calories=165)
+
+        with patch.object(self.service, '_get_nutrition_from_gemini', side_effect=slow_lookup) as lookup:
+            results = await asyncio.gather(*[
+                self.service.get_ingredient_nutrition("100g jackfruit") for _ in range(5)
+            ])
+
+        assert lookup.await_count == 1
+        assert all(r.calories == pytest.approx(165) for r in results)
+        assert self.service.get_stats()["singleflight"]["deduplicated"] == 4
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cut_off_followers(self):
+        """A request that disconnects mid-lookup leaves the shared lookup running"""
+        release = asyncio.Event()
+
+        async def slow_batch(names):
+            await release.wait()
+            return {"jackfruit": NutritionInfo(calories=123)}
+
+        with patch.object(self.service, '_get_batch_nutrition_from_gemini', side_effect=slow_batch) as lookup:
+            leader = asyncio.create_task(self.service.get_ingredients_nutrition(["100g jackfruit"]))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(self.service.get_ingredients_nutrition(["100g jackfruit"]))
+            await asyncio.sleep(0.01)
+
+            leader.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            results = await follower
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert lookup.await_count == 1
+        assert results[0].calories == pytest.approx(123)
+        assert (await self.service.cache.get("nutrition_jackfruit"))["calories"] == 123
+
+    @pytest.mark.asyncio
+    async def test_local_nutrient_table_skips_gemini(self):
+        """Common foods are served from the bundled nutrient table"""
+        with patch('services.nutrition_service.llm_executor.generate_content',
+                   new=AsyncMock()) as generate:
+            results = await self.service.get_ingredients_nutrition(["200g chicken breast", "100g tomatoes"])
+
+        generate.assert_not_awaited()
+        assert results[0].calories == pytest.approx(330)
+        assert results[0].protein == pytest.approx(62)
+        assert results[1].calories == pytest.approx(18)
+
+    @pytest.mark.asyncio
+    async def test_dishes_named_after_a_seasoning_are_looked_up(self):
+        """Only pure seasonings get the built-in estimate"""
+        self.service._get_batch_nutrition_from_gemini = AsyncMock(return_value={
+            "basil pesto": NutritionInfo(calories=420), "cinnamon roll": NutritionInfo(calories=380),
+        })
+        results = await self.service.get_ingredients_nutrition(["100g basil pesto", "100g cinnamon roll",
+                                                                "1 tsp black pepper"])
+
+        self.service._get_batch_nutrition_from_gemini.assert_awaited_once_with(["basil pesto", "cinnamon roll"])
+        assert results[0].calories == pytest.approx(420)
+        assert results[1].calories == pytest.approx(380)
+        assert self.service._get_builtin_nutrition("basil pesto") is None
+        assert self.service._get_builtin_nutrition("oregano") is not None
+
+    @pytest.mark.asyncio
+    async def test_harvest_meal_plan_ingredients(self):
+        """Plausible per-ingredient nutrition from a plan is cached per 100g"""
+        harvested = await self.service.harvest_ingredient_nutrition([
+            {"name": "jackfruit", "amount": "200g",
+             "nutrition": {"calories": 190, "protein": 3.4, "carbs": 46, "fat": 1.3, "fiber": 3, "sugar": 38,
+                           "sodium": 4, "cholesterol": 0, "saturated_fat": 0.4}},
+            # Implausible: 50g of food with 60g of protein
+            {"name": "teff", "amount": "50g",
+             "nutrition": {"calories": 240, "protein": 60, "carbs": 0, "fat": 0, "fiber": 0, "sugar": 0}},
+            {"name": "kohlrabi", "amount": "a little", "nutrition": {"calories": 10}},
+        ])
+
+        assert harvested == 1
+        cached = await self.service.cache.get("nutrition_jackfruit")
+        assert cached["calories"] == pytest.approx(95)
+        assert cached["carbs"] == pytest.approx(23)
+        assert cached["sodium"] == pytest.approx(2)
+        assert cached["complete"] is True
+        assert await self.service.cache.get("nutrition_teff") is None
+        assert self.service.get_stats()["harvest"] == {"harvested": 1, "rejected": 1}
+
+        # The harvested entry is served without calling Gemini
+        self.service._get_batch_nutrition_from_gemini = AsyncMock()
+        results = await self.service.get_ingredients_nutrition(["100g jackfruit"])
+        self.service._get_batch_nutrition_from_gemini.assert_not_called()
+        assert results[0].calories == pytest.approx(95)
+
+    @pytest.mark.asyncio
+    async def test_harvest_without_every_nutrient_is_incomplete(self):
+        """Harvested entries missing sodium, cholesterol or saturated fat still get a full lookup"""
+        await self.service.harvest_ingredient_nutrition([
+            {"name": "jackfruit", "amount": "200g",
+             "nutrition": {"calories": 190, "protein": 3.4, "carbs": 46, "fat": 1.3, "fiber": 3, "sugar": 38}},
+        ])
+        cached = await self.service.cache.get("nutrition_jackfruit")
+        assert cached["complete"] is False
+
+        self.service._get_batch_nutrition_from_gemini = AsyncMock(return_value={
+            "jackfruit": NutritionInfo(calories=95, protein=1.7, carbs=23, fat=0.6, sodium=2),
+        })
+        results = await self.service.get_ingredients_nutrition(["100g jackfruit"])
+        self.service._get_batch_nutrition_from_gemini.assert_called_once()
+        assert results[0].sodium == pytest.approx(2)
+
+    @pytest.mark.asyncio
+    async def test_analyze_meal_single_reduction(self):
+        """Meal totals are one weighted sum of the per-100g rows times serving size"""
+        total = await self.service.analyze_meal(["200g chicken breast", "100g tomatoes", "salt"], serving_size=2)
+
+        chicken = self.service.nutrient_db.get("chicken breast")
+        tomatoes = self.service.nutrient_db.get("tomatoes")
+        assert total.calories == pytest.approx((2 * chicken.calories + tomatoes.calories) * 2)
+        assert total.protein == pytest.approx((2 * chicken.protein + tomatoes.protein) * 2)
+
+    @pytest.mark.asyncio
+    async def test_meal_memo_hits_and_invalidation(self):
+        """Repeat meals skip lookups until one of their ingredients is re-cached"""
+        self.service.meal_memo = MealMemo(max_size=8)
+        await self.service._cache_nutrition("teff", NutritionInfo(calories=101))
+
+        first = await self.service.analyze_meal(["100g teff", "200g chicken breast"])
+        with patch.object(self.service, '_get_base_vectors', new=AsyncMock()) as lookup:
+            again = await self.service.analyze_meal(["200g chicken breasts", "100g teff"])
+        lookup.assert_not_awaited()
+        assert again == first
+
+        await self.service._cache_nutrition("teff", NutritionInfo(calories=201))
+        updated = await self.service.analyze_meal(["100g teff", "200g chicken breast"])
+        assert updated.calories == pytest.approx(first.calories + 100)
+        assert self.service.meal_memo.get_stats()["invalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_meals_with_estimates_are_not_memoized(self):
+        self.service.meal_memo = MealMemo(max_size=8)
+        self.service.gemini_model = None
+        await self.service.analyze_meal(["100g ostrich"])
+        assert len(self.service.meal_memo) == 0
+
+class TestNutrientVector:
+
+    def test_sum_scale_and_aggregate(self):
+        a = NutrientVector.from_dict({"calories": 100, "protein": 10})
+        b = NutrientVector.from_nutrition(NutritionInfo(calories=50, fat=2))
+
+        assert (a + b).to_nutrition() == NutritionInfo(calories=150, protein=10, fat=2)
+        assert (a * 0.5)["calories"] == pytest.approx(50)
+        assert NutrientVector.sum([a, b, b])["calories"] == pytest.approx(200)
+        assert NutrientVector.aggregate([a, b], [2.0, 1.0]).to_dict()["calories"] == pytest.approx(250)
+        assert NutrientVector.sum([]) == NutrientVector()
+
+    def test_vectors_do_not_alias_their_source(self):
+        row = NutrientVector.stack([NutrientVector.from_dict({"calories": 10})])[0]
+        vector = NutrientVector(row)
+        vector += NutrientVector.from_dict({"calories": 5})
+        assert row[0] == 10
+
+class TestFoodClassifier:
+
+    def setup_method(self):
+        self.classifier = FoodClassifier()
+
+    @pytest.mark.parametrize("name,category", [
+        ("butter", "fat"),
+        ("peanut butter", "fat"),
+        ("buttermilk", "dairy"),
+        ("peppercorns", "seasoning"),
+        ("black pepper", "seasoning"),
+        ("red bell peppers", "vegetable"),
+        ("eggplant", "vegetable"),
+        ("eggs", "protein"),
+        ("herb crusted salmon", "protein"),
+        ("blueberries", "fruit"),
+        ("jackfruit", None),
+    ])
+    def test_word_boundaries_and_priorities(self, name, category):
+        assert self.classifier.classify(name) == category
+
+    def test_batch_matches_single(self):
+        """A batch is classified in one pass with the same results as one at a time"""
+        names = ["rolled oats", "almond milk", "dried oregano", "teff", "chicken thighs"]
+        assert self.classifier.classify_many(names) == [self.classifier.classify(name) for name in names]
+        assert self.classifier.classify_many(names) == ["grain", "dairy", "seasoning", None, "protein"]
+
+    @pytest.mark.parametrize("name,only", [
+        ("basil", True),
+        ("black pepper", True),
+        ("bay leaves", True),
+        ("basil pesto", False),
+        ("cinnamon roll", False),
+        ("mint chocolate", False),
+        ("", False),
+    ])
+    def test_is_only_needs_every_word_covered(self, name, only):
+        assert self.classifier.is_only(name, "seasoning") is only
+
+class TestUnitConverter:
+
+    def setup_method(self):
+        self.converter = UnitConverter()
+
+    def test_volume_uses_food_density(self):
+        """A cup of flour weighs about half a cup of milk"""
+        assert self.converter.to_grams(1, "cup", "flour") == pytest.approx(127.2)
+        assert self.converter.to_grams(1, "cup", "milk") == pytest.approx(247.2)
+        assert self.converter.to_grams(100, "gram", "flour") == 100
+
+    def test_piece_weights_and_sizes(self):
+        assert self.converter.to_grams(2, None, "eggs") == pytest.approx(100)
+        assert self.converter.to_grams(2, "clove", "garlic") == pytest.approx(6)
+        assert self.converter.to_grams(1, "large", "banana") > self.converter.to_grams(1, "small", "banana")
+
+    def test_unknown_foods_use_category_defaults(self):
+        assert self.converter.to_grams(1, "cup", "baby bok choy greens") == pytest.approx(240 * 0.4)
+        assert self.converter.to_grams(1, "cup", "jackfruit") == 240
+        assert self.converter.get_stats()["category_hits"] == 1
+
+class TestIngredientIndex:
+
+    def setup_method(self):
+        self.index = IngredientIndex(threshold=0.82)
+        self.index.add_many(["chicken breast", "broccoli", "chicken thigh"])
+
+    def test_word_order_and_plurals_share_a_key(self):
+        """Reordered, plural and filler-word variants map to one canonical key"""
+        for name in ["chicken breasts", "boneless chicken breast", "breast of chicken"]:
+            assert self.index.canonicalize(name) == "chicken breast"
+        assert self.index.get_stats()["hits"] == 3
+
+    def test_misspellings_are_merged(self):
+        """Close spellings are merged by trigram similarity"""
+        assert self.index.canonicalize("brocoli") == "broccoli"
+        assert self.index.get_stats()["merges"] == 1
+
+    def test_distinct_foods_stay_separate(self):
+        """Dissimilar names become new canonical keys"""
+        assert self.index.canonicalize("chicken thighs") == "chicken thigh"
+        assert self.index.canonicalize("jackfruit") == "jackfruit"
+        assert self.index.get_stats()["misses"] == 1
+
+    def test_misses_do_not_grow_the_index(self):
+        """Unknown names are memoized but only registered names become canonical"""
+        for i in range(100):
+            self.index.canonicalize(f"mystery food {'x' * i}")
+        assert len(self.index) == 3
+        assert self.index.canonicalize("jackfruits") == "jackfruits"
+
+        self.index.add("jackfruit")
+        self.index.memo.clear()
+        assert self.index.canonicalize("jackfruits") == "jackfruit"
+
+    def test_canonical_names_are_capped(self):
+        index = IngredientIndex(threshold=0.82, max_names=2)
+        index.add_many(["chicken breast", "broccoli", "chicken thigh"])
+        assert len(index) == 2
+        assert index.add("chicken thigh") == "chicken thigh"
+
+class TestIngredientParser:
+
+    def setup_method(self):
+        self.parser = IngredientParser(cache_size=128)
+
+    @pytest.mark.parametrize("text,name,quantity,unit", [
+        ("1/2 cup milk", "milk", 0.5, "cup"),
+        ("½ cup milk", "milk", 0.5, "cup"),
+        ("1½ cups rice", "rice", 1.5, "cup"),
+        ("2-3 slices whole wheat bread", "whole wheat bread", 2.5, "slice"),
+        ("200g chicken breast", "chicken breast", 200, "gram"),
+        ("chicken breast 200 g", "chicken breast", 200, "gram"),
+        ("2 cups of cooked brown rice", "brown rice", 2, "cup"),
+        ("salt to taste", "salt", None, None),
+        ("200g jalapeño", "jalapeño", 200, "gram"),
+        ("1 cup crème fraîche", "crème fraîche", 1, "cup"),
+    ])
+    def test_quantities(self, text, name, quantity, unit):
+        parsed = self.parser.parse(text)
+        assert parsed.food_name == name
+        assert parsed.quantity == (pytest.approx(quantity) if quantity is not None else None)
+        assert parsed.unit == unit
+
+    def test_container_with_package_size(self):
+        """ "1 (14 oz) can" takes its weight from the parenthetical size"""
+        parsed = self.parser.parse("1 (14 oz) can diced tomatoes")
+        assert parsed.food_name == "tomatoes"
+        assert (parsed.quantity, parsed.unit) == (1, "can")
+        assert (parsed.package_quantity, parsed.package_unit) == (14, "ounce")
+
+    def test_confidence_and_memoization(self):
+        """Results carry a confidence value and repeat parses hit the LRU"""
+        assert self.parser.parse("2 tbsp olive oil").confidence > self.parser.parse("olive oil").confidence
+        self.parser.parse("2 tbsp olive oil")
+        assert self.parser.cache_info().hits == 1
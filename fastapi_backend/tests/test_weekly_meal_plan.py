@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models.mealplan import MealPlanRequest, UserProfile
+from services.mealplan_service import WEEK_DAYS, MealPlanService
+from tests.test_meal_plan_stream import DAILY_RESPONSE
+
+class TestWeeklyMealPlan:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        with patch.dict('os.environ', {'GEMINI_API_KEY': '',
+                                       'PERSISTENT_CACHE_PATH': str(tmp_path / "cache.sqlite3")}):
+            self.service = MealPlanService()
+        self.service.model = MagicMock()
+        self.request = MealPlanRequest(user_profile=UserProfile(age=30, weight=70, height=175))
+
+    @pytest.mark.asyncio
+    async def test_days_generate_concurrently(self):
+        """Seven daily calls overlap and are assembled in weekday order"""
+        in_flight = 0
+        peak = 0
+        calls = []
+
+        async def fake_daily(request, day):
+            nonlocal in_flight, peak
+            calls.append(day)
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            # Tuesday's first response is unusable
+            if day == "Tuesday" and calls.count("Tuesday") == 1:
+                return "Sorry, I cannot do that"
+            return DAILY_RESPONSE
+
+        self.service.weekly_concurrency = 4
+        with patch.object(self.service, '_call_gemini_daily_api', side_effect=fake_daily), \
+             patch.object(self.service.nutrition_service, 'harvest_ingredient_nutrition',
+                          new=AsyncMock(return_value=0)) as harvest:
+            plan = await self.service.generate_weekly_meal_plan(self.request)
+
+        assert [day.day for day in plan.days] == WEEK_DAYS
+        assert peak == 4
+        assert calls.count("Tuesday") == 2
+        assert plan.days[0].meals.breakfast.name == "Oatmeal"
+        assert plan.total_calories == pytest.approx(7 * 1500)
+        # One harvest over all 21 meals
+        assert harvest.await_count == 1
+        assert len(harvest.await_args.args[0]) == 21
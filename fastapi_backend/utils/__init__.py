@@ -1,3 +1,6 @@
 from .auth import *
 from .cache import *
-from .database import *
\ No newline at end of file
+from .database import *
+from .json_stream import *
+from .llm import *
+from .singleflight import *
\ No newline at end of file
@@ -1,11 +1,112 @@
+import asyncio
 import json
 import logging
-from typing import Any, Optional
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
 import os
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PERSISTENT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cache.sqlite3")
+
+class SQLiteCache:
+    """On-disk key/value store shared by every worker process.
+
+    Uses SQLite in WAL mode so many processes can read while one writes.
+    The database is opened lazily on first use. Calls block (up to the
+    busy timeout under write contention), so async code runs them in a
+    worker thread; the connection is shared behind a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _get_connection(self) -> Optional[sqlite3.Connection]:
+        with self._lock:
+            return self._open()
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None or self._disabled:
+            return self._conn
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # Drop expired rows left over from earlier runs
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            self._conn = conn
+            logger.info(f"Persistent cache opened at '{self.path}'")
+        except Exception as e:
+            logger.error(f"Error opening persistent cache at '{self.path}', using memory only: {e}")
+            self._disabled = True
+
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get a value and its expiry timestamp, or None if missing or expired"""
+        conn = self._get_connection()
+        if conn is None:
+            return None
+
+        with self._lock:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expire: int):
+        """Store a JSON-serializable value"""
+        conn = self._get_connection()
+        if conn is None:
+            return
+
+        payload = json.dumps(value, default=str)
+        with self._lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + expire)
+            )
+
+    def delete(self, key: str):
+        """Delete a key"""
+        conn = self._get_connection()
+        if conn is not None:
+            with self._lock:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self, prefixes: Tuple[str, ...]):
+        """Delete every key starting with one of ``prefixes``"""
+        conn = self._get_connection()
+        if conn is None:
+            return
+        with self._lock:
+            for prefix in prefixes:
+                conn.execute("DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff"))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
 class CacheManager:
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
@@ -13,8 +114,21 @@ class CacheManager:
         self.memory_cache = {}  # In-memory cache
         self.memory_cache_ttl = {}
         self.max_memory_cache_size = 1000
+        
+        # Keys with these prefixes are also kept on disk, shared across workers and restarts
+        self.persistent_prefixes = tuple(
+            prefix.strip() for prefix in os.getenv("PERSISTENT_CACHE_PREFIXES", "nutrition_").split(",")
+            if prefix.strip()
+        )
+        self.persistent_cache = None
+        if self.persistent_prefixes:
+            self.persistent_cache = SQLiteCache(os.getenv("PERSISTENT_CACHE_PATH", DEFAULT_PERSISTENT_CACHE_PATH))
+        
         logger.info("CacheManager initialized with in-memory cache")
     
+    def _is_persistent(self, key: str) -> bool:
+        return self.persistent_cache is not None and key.startswith(self.persistent_prefixes)
+    
     async def _get_redis_client(self):
         """Redis is disabled for now due to compatibility issues"""
         return None
@@ -33,6 +147,16 @@ class CacheManager:
                         return None
                 return self.memory_cache[key]
             
+            # Fall back to the persistent store and keep the value warm in memory
+            if self._is_persistent(key):
+                entry = await asyncio.to_thread(self.persistent_cache.get, key)
+                if entry is not None:
+                    value, expires_at = entry
+                    self._cleanup_memory_cache()
+                    self.memory_cache[key] = value
+                    self.memory_cache_ttl[key] = datetime.utcnow() + timedelta(seconds=max(expires_at - time.time(), 0))
+                    return value
+            
             return None
             
         except Exception as e:
@@ -46,6 +170,9 @@ class CacheManager:
             self._cleanup_memory_cache()
             self.memory_cache[key] = value
             self.memory_cache_ttl[key] = datetime.utcnow() + timedelta(seconds=expire)
+            
+            if self._is_persistent(key):
+                await asyncio.to_thread(self.persistent_cache.set, key, value, expire)
             return True
             
         except Exception as e:
@@ -61,6 +188,9 @@ class CacheManager:
             if key in self.memory_cache_ttl:
                 del self.memory_cache_ttl[key]
             
+            if self._is_persistent(key):
+                await asyncio.to_thread(self.persistent_cache.delete, key)
+            
             return True
             
         except Exception as e:
@@ -74,6 +204,9 @@ class CacheManager:
             self.memory_cache.clear()
             self.memory_cache_ttl.clear()
             
+            if self.persistent_cache is not None:
+                await asyncio.to_thread(self.persistent_cache.clear, self.persistent_prefixes)
+            
             return True
             
         except Exception as e:
@@ -106,4 +239,5 @@ class CacheManager:
     async def close(self):
         """Close cache connections"""
         # No Redis connection to close
-        pass
\ No newline at end of file
+        if self.persistent_cache is not None:
+            await asyncio.to_thread(self.persistent_cache.close)
\ No newline at end of file
@@ -49,6 +49,16 @@ async def create_indexes():
         await db.database.meal_plans.create_index("user_id")
         await db.database.meal_plans.create_index("created_at")
         
+        # Weekly meal plan collection indexes
+        await db.database.weekly_meal_plans.create_index("user_id")
+        
+        # Meal plan job collection indexes
+        await db.database.meal_plan_jobs.create_index("user_id")
+        await db.database.meal_plan_jobs.create_index("status")
+        
+        # Meal library collection indexes
+        await db.database.meal_library.create_index("meal_type")
+        
         logger.info("Database indexes created successfully")
         
     except Exception as e:
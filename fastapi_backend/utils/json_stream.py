@@ -0,0 +1,219 @@
+import json
+import logging
+import re
+from typing import Any, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Trailing commas before a closing brace or bracket, outside strings
+_TRAILING_COMMA_RE = re.compile(r'("(?:[^"\\]|\\.)*")|,\s*([}\]])')
+
+# Candidate cut points tried when repairing a truncated value
+_MAX_REPAIR_ATTEMPTS = 64
+
+def _loads(text: str) -> Any:
+    """json.loads that also accepts trailing commas"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        cleaned = _TRAILING_COMMA_RE.sub(lambda m: m.group(1) or m.group(2), text)
+        if cleaned == text:
+            raise
+        return json.loads(cleaned)
+
+def _close_fragment(fragment: str) -> str:
+    """Close the open string and containers of a truncated fragment"""
+    stack = []
+    in_string = False
+    escape = False
+    for ch in fragment:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(ch)
+        elif ch in "}]" and stack:
+            stack.pop()
+
+    if escape:
+        fragment = fragment[:-1]
+    if in_string:
+        fragment += '"'
+    return fragment + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+def _repair(fragment: str) -> Any:
+    """Parse a truncated value, dropping its unfinished tail if closing it is not enough"""
+    # Cut after each comma outside strings, latest first
+    cuts = [len(fragment)]
+    in_string = False
+    escape = False
+    for i, ch in enumerate(fragment):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            cuts.append(i)
+    cuts = [cuts[0]] + sorted(cuts[1:], reverse=True)
+
+    for cut in cuts[:_MAX_REPAIR_ATTEMPTS]:
+        candidate = fragment[:cut].rstrip().rstrip(",:").rstrip()
+        try:
+            return _loads(_close_fragment(candidate))
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Could not repair truncated JSON")
+
+class JSONStreamParser:
+    """Incremental, tolerant parser for a JSON object or array arriving in chunks.
+
+    Text before the opening brace or bracket (prose, a code fence) and
+    anything after the root closes are ignored; ``expect`` restricts the
+    root to ``"{"`` or ``"["`` so brackets in leading prose are skipped. An
+    opener whose first member is not JSON (``Note {this}:``) is taken for
+    prose too, and scanning resumes after it.
+    Each ``feed`` scans only the new text and returns the members of the
+    root container that completed in it: ``(key, value)`` pairs for an
+    object, ``(index, value)`` for an array. A member whose value is an
+    object or array is returned as soon as its closing brace arrives.
+    Trailing commas are accepted, and ``close(repair=True)`` recovers
+    what it can from a response cut off mid-value.
+    """
+
+    def __init__(self, expect: Optional[str] = None):
+        self.expect = expect
+        self.text = ""
+        self.done = False
+        self.repaired = False
+        self.root: Optional[Union[dict, list]] = None
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._root_start = 0
+        self._member_start: Optional[int] = None
+        self._member_emitted = False
+
+    def feed(self, chunk: str) -> List[Tuple[Union[str, int], Any]]:
+        """Add a chunk of text and return the root members it completed"""
+        self.text += chunk
+        text = self.text
+        members = []
+
+        i = self._pos
+        while i < len(text) and not self.done:
+            try:
+                self._step(text, i, members)
+            except json.JSONDecodeError:
+                if self.root:
+                    raise
+                # The opener belonged to prose, not to the JSON: look for the next one
+                i = self._root_start
+                self.root = None
+                self._in_string = self._escape = False
+            i += 1
+
+        self._pos = i
+        return members
+
+    def _step(self, text: str, i: int, members: list):
+        """Advance the scan over the character at ``i``"""
+        ch = text[i]
+        if self.root is None:
+            if ch in (self.expect or "{["):
+                self.root = {} if ch == "{" else []
+                self._stack = [ch]
+                self._root_start = i
+                self._member_start = i + 1
+                self._member_emitted = False
+        elif self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+        elif ch == '"':
+            self._in_string = True
+        elif ch in _CLOSERS:
+            self._stack.append(ch)
+        elif ch in "}]":
+            self._stack.pop()
+            if len(self._stack) == 1:
+                # A container value of a root member just closed
+                self._emit(text[self._member_start:i + 1], members)
+            elif not self._stack:
+                if not self._member_emitted:
+                    self._emit(text[self._member_start:i], members)
+                self.done = True
+        elif ch == "," and len(self._stack) == 1:
+            if not self._member_emitted:
+                self._emit(text[self._member_start:i], members)
+            self._member_start = i + 1
+            self._member_emitted = False
+
+    def _emit(self, segment: str, members: list):
+        self._member_emitted = True
+        if not segment.strip():
+            return
+        if isinstance(self.root, dict):
+            self._add(_loads("{" + segment + "}"), members)
+        else:
+            self._add([_loads(segment)], members)
+
+    def _add(self, parsed: Union[dict, list], members: list):
+        if isinstance(self.root, dict):
+            for key, value in parsed.items():
+                self.root[key] = value
+                members.append((key, value))
+        else:
+            for value in parsed:
+                members.append((len(self.root), value))
+                self.root.append(value)
+
+    def close(self, repair: bool = True, keep_partial: bool = True) -> Union[dict, list]:
+        """Get the root value.
+
+        If the text ended before the root closed, the completed members
+        are kept and the unfinished one is completed by closing its open
+        strings and containers (dropping its last partial entries when
+        needed). ``keep_partial=False`` leaves the unfinished member out
+        instead, and ``repair=False`` fails.
+        """
+        if self.root is None:
+            raise ValueError("No JSON found in response")
+        if self.done:
+            return self.root
+        if not repair:
+            raise ValueError("Incomplete JSON: the response ended before the root value closed")
+
+        tail = self.text[self._member_start:] if not self._member_emitted else ""
+        if tail.strip() and keep_partial:
+            opener = "{" if isinstance(self.root, dict) else "["
+            try:
+                self._add(_repair(opener + tail), [])
+            except ValueError:
+                logger.warning("Dropped an unfinished member of a truncated JSON response")
+        self.repaired = True
+        self.done = True
+        return self.root
+
+def parse_json(text: str, expect: Optional[str] = None, repair: bool = True,
+               keep_partial: bool = True) -> Union[dict, list]:
+    """Parse the JSON object or array in a complete response text"""
+    parser = JSONStreamParser(expect)
+    parser.feed(text)
+    return parser.close(repair=repair, keep_partial=keep_partial)
@@ -0,0 +1,237 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from utils.cache import CacheManager
+from utils.singleflight import SingleFlight
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+class LLMTimeoutError(Exception):
+    """Raised when a Gemini call does not finish within its timeout"""
+    pass
+
+# Default response cache TTLs in seconds per call type; 0 disables caching
+DEFAULT_LLM_CACHE_TTLS = {
+    "meal_plan": 60 * 60,
+    "daily_meal_plan": 60 * 60,
+    "nutrition": 24 * 60 * 60,
+    "recipes": 24 * 60 * 60,
+    "chat": 0,
+}
+
+def _parse_cache_ttls(value: str) -> Dict[str, int]:
+    """Parse "call_type=seconds,..." overrides on top of the defaults"""
+    ttls = dict(DEFAULT_LLM_CACHE_TTLS)
+    for item in value.split(","):
+        if "=" in item:
+            call_type, seconds = item.split("=", 1)
+            try:
+                ttls[call_type.strip()] = int(seconds)
+            except ValueError:
+                logger.warning(f"Ignoring invalid LLM cache TTL '{item}'")
+    return ttls
+
+class CachedResponse:
+    """Stand-in for a Gemini response served from the response cache"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+class LLMExecutor:
+    """Runs blocking Gemini SDK calls off the event loop on a bounded thread pool"""
+
+    def __init__(self, max_workers: Optional[int] = None, default_timeout: Optional[float] = None):
+        self.max_workers = max_workers or int(os.getenv("GEMINI_MAX_WORKERS", "8"))
+        self.default_timeout = default_timeout or float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+        self._executor = None
+
+        # Response cache shared by every service, keyed by (model, config, prompt)
+        self.cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.cache_ttls = _parse_cache_ttls(os.getenv("LLM_CACHE_TTLS", ""))
+        self._cache: Optional[CacheManager] = None
+        self.inflight = SingleFlight()
+
+        # Call statistics
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.cache_hits: Dict[str, int] = defaultdict(int)
+        self.cache_misses: Dict[str, int] = defaultdict(int)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the thread pool lazily so importing the module stays cheap"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="gemini"
+            )
+        return self._executor
+
+    async def run(self, func, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking callable on the pool with a timeout.
+
+        Cancelling the awaiting task (or hitting the timeout) drops the call
+        from the queue if it has not started yet; a call that is already
+        running finishes in its thread but its result is discarded.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.default_timeout
+
+        self.calls += 1
+        self.in_flight += 1
+        future = loop.run_in_executor(self._get_executor(), lambda: func(*args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.error(f"Gemini call timed out after {timeout}s")
+            raise LLMTimeoutError(f"Gemini call timed out after {timeout}s")
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def generate_content(self, model, prompt: str, generation_config: Any = None,
+                               timeout: Optional[float] = None, call_type: Optional[str] = None,
+                               use_cache: bool = True, validate: Optional[Callable[[str], bool]] = None) -> Any:
+        """Call ``model.generate_content`` without blocking the event loop.
+
+        Calls with a ``call_type`` whose TTL is positive go through the
+        shared response cache: identical (model, config, prompt) triples
+        are answered from the cache, and identical calls already in flight
+        are shared. ``use_cache=False`` forces a fresh call (the fresh
+        response still refreshes the cache). Only responses with text that
+        passes ``validate`` are stored. Cache hits return a
+        ``CachedResponse`` with just ``text``.
+        """
+        ttl = self.cache_ttls.get(call_type, 0) if call_type else 0
+        if not self.cache_enabled or ttl <= 0:
+            return await self._generate(model, prompt, generation_config, timeout)
+
+        cache_key = self._cache_key(model, prompt, generation_config)
+        cache = self._get_cache()
+        if use_cache:
+            cached_text = await cache.get(cache_key)
+            if cached_text is not None:
+                self.cache_hits[call_type] += 1
+                return CachedResponse(cached_text)
+        self.cache_misses[call_type] += 1
+
+        async def generate_and_store():
+            response = await self._generate(model, prompt, generation_config, timeout)
+            try:
+                text = response.text if response is not None else None
+            except Exception:
+                # Blocked or empty candidates have no text to cache
+                text = None
+            if text and (validate is None or validate(text)):
+                await cache.set(cache_key, text, expire=ttl)
+            return response
+
+        if not use_cache:
+            return await generate_and_store()
+        return await self.inflight.do(cache_key, generate_and_store)
+
+    async def stream_content(self, model, prompt: str, generation_config: Any = None,
+                             timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Stream the text chunks of ``model.generate_content(..., stream=True)``.
+
+        Each blocking step of the SDK's chunk iterator runs on the pool,
+        with ``timeout`` applying per chunk. Streamed calls bypass the
+        response cache.
+        """
+        kwargs = {"stream": True}
+        if generation_config is not None:
+            kwargs["generation_config"] = generation_config
+        response = await self.run(model.generate_content, prompt, timeout=timeout, **kwargs)
+
+        chunks = iter(response)
+        while True:
+            chunk = await self.run(next, chunks, None, timeout=timeout)
+            if chunk is None:
+                break
+            try:
+                text = chunk.text
+            except Exception:
+                # Chunks without text parts (e.g. only safety metadata)
+                continue
+            if text:
+                yield text
+
+    async def _generate(self, model, prompt: str, generation_config: Any = None,
+                        timeout: Optional[float] = None) -> Any:
+        if generation_config is not None:
+            return await self.run(model.generate_content, prompt,
+                                  generation_config=generation_config, timeout=timeout)
+        return await self.run(model.generate_content, prompt, timeout=timeout)
+
+    def _get_cache(self) -> CacheManager:
+        if self._cache is None:
+            self._cache = CacheManager()
+        return self._cache
+
+    @staticmethod
+    def _cache_key(model, prompt: str, generation_config: Any = None) -> str:
+        """Fingerprint of the model name, generation config and prompt"""
+        if dataclasses.is_dataclass(generation_config):
+            config = dataclasses.asdict(generation_config)
+        elif isinstance(generation_config, dict):
+            config = generation_config
+        else:
+            config = repr(generation_config) if generation_config is not None else None
+        payload = json.dumps(
+            [str(getattr(model, "model_name", type(model).__name__)), config, prompt],
+            sort_keys=True, default=str
+        )
+        return f"llm_{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def get_stats(self) -> dict:
+        """Get executor statistics"""
+        return {
+            "max_workers": self.max_workers,
+            "default_timeout": self.default_timeout,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "cache": self.get_cache_stats(),
+        }
+
+    def get_cache_stats(self) -> dict:
+        """Response cache hits, misses and hit rate per call type"""
+        stats = {}
+        for call_type in sorted(set(self.cache_hits) | set(self.cache_misses)):
+            hits = self.cache_hits[call_type]
+            misses = self.cache_misses[call_type]
+            stats[call_type] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            }
+        return stats
+
+    def shutdown(self):
+        """Shut down the thread pool without waiting for running calls"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Shared executor used by every service that talks to Gemini
+llm_executor = LLMExecutor()
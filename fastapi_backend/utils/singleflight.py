@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Coalesces concurrent requests for the same key into one in-flight call"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Calls started by ``do``, referenced until they finish
+        self._tasks: Set[asyncio.Future] = set()
+
+        # Statistics
+        self.calls = 0
+        self.deduplicated = 0
+
+    def join(self, key: str) -> Tuple[asyncio.Future, bool]:
+        """Join the in-flight call for ``key``.
+
+        Returns the shared future and whether the caller is the leader. The
+        leader must finish the call, with ``lead`` or with ``complete`` or
+        ``fail``; everyone awaits ``wait(future)``.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            return future, False
+
+        self.calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future, True
+
+    def complete(self, key: str, result: Any):
+        """Publish the leader's result to every waiter"""
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def fail(self, key: str, error: BaseException):
+        """Propagate the leader's error to every waiter"""
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+            # Mark the exception as retrieved in case nobody is waiting
+            future.exception()
+
+    async def wait(self, future: asyncio.Future) -> Any:
+        """Await a shared future without letting one waiter cancel it for the others"""
+        return await asyncio.shield(future)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``func`` once for all concurrent callers with the same key.
+
+        The call runs in a task owned by the flight rather than by the
+        first caller, so a caller that is cancelled (a client disconnect)
+        stops waiting without cancelling the call for everyone else.
+        """
+        future, leader = self.join(key)
+        if leader:
+            task = asyncio.ensure_future(func())
+            self._tasks.add(task)
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await self.wait(future)
+
+    def lead(self, keys: List[str], func: Callable[[], Awaitable[Dict[str, Any]]]) -> asyncio.Future:
+        """Resolve several keys the caller leads with one call, in a task owned by the flight.
+
+        ``func`` returns a value per key; each key's waiters get its value,
+        or None if it is missing. The caller awaits its own keys with
+        ``wait`` like everyone else, so cancelling it leaves the call running.
+        """
+        task = asyncio.ensure_future(func())
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._finish_many(keys, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Future):
+        self._tasks.discard(task)
+        if task.cancelled():
+            self.fail(key, asyncio.CancelledError())
+        elif task.exception() is not None:
+            self.fail(key, task.exception())
+        else:
+            self.complete(key, task.result())
+
+    def _finish_many(self, keys: List[str], task: asyncio.Future):
+        self._tasks.discard(task)
+        for key in keys:
+            if task.cancelled():
+                self.fail(key, asyncio.CancelledError())
+            elif task.exception() is not None:
+                self.fail(key, task.exception())
+            else:
+                self.complete(key, task.result().get(key))
+
+    def in_flight(self) -> int:
+        """Number of keys currently being resolved"""
+        return len(self._inflight)
+
+    def get_stats(self) -> dict:
+        """Get deduplication statistics"""
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "in_flight": self.in_flight(),
+        }